@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Batch analysis of many models in parallel worker processes.
+
+Models are given as files, directories or glob patterns and may be
+pickled systems, snapshots (see pycpa.snapshot), SMFF or SymTA/S 1.4 files.
+The format is detected from the file content.
+The results of all models are written to a single CSV table with one row
+per task (or a single row for models which could not be analyzed).
+Files of unknown format (e.g. the results table itself) are skipped.
+Models which are already listed in the table are skipped,
+hence an interrupted batch can be resumed by running it again.
+
+Example::
+
+    batch_analysis.py --models variants/ --results results.csv --jobs 8 --model_timeout 60
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import division
+
+import csv
+import glob
+import io
+import math
+import multiprocessing
+import os
+import pickletools
+import signal
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from pycpa import analysis
+from pycpa import options
+from pycpa import smff_loader
+from pycpa import snapshot
+from pycpa import symload
+
+# pickled systems are deeply recursive
+sys.setrecursionlimit(10000)
+
+COLUMNS = ['model', 'status', 'seconds', 'resource', 'task', 'bcrt', 'wcrt', 'message']
+
+OK = 'ok'
+NOT_SCHEDULABLE = 'not_schedulable'
+TIMEOUT = 'timeout'
+ERROR = 'error'
+
+
+def model_files(patterns, exclude=()):
+    """ Expands files, directories and glob patterns to a sorted list of files.
+    Files in exclude (e.g. the results table) are left out.
+    """
+    files = list()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(os.path.join(pattern, f) for f in os.listdir(pattern)
+                         if not f.startswith('.') and
+                         os.path.isfile(os.path.join(pattern, f)))
+        elif os.path.isfile(pattern):
+            files.append(pattern)
+        else:
+            files.extend(f for f in glob.glob(pattern) if os.path.isfile(f))
+    exclude = set(os.path.abspath(f) for f in exclude)
+    return sorted(set(os.path.normpath(f) for f in files
+                      if os.path.abspath(f) not in exclude))
+
+
+def _is_pickle(head):
+    """ True if head is the beginning of a pickle, i.e. it starts
+    with the protocol (protocol 2 and newer) or with MARK or GLOBAL """
+    try:
+        opcode, _, _ = next(pickletools.genops(io.BytesIO(head)))
+    except Exception:
+        return False
+    return opcode.name in ('PROTO', 'MARK', 'GLOBAL')
+
+
+def model_format(filename):
+    """ Returns the format of a model file
+    ('snapshot', 'pickle', 'smff' or 'symta') or None if it is unknown """
+    if snapshot.is_snapshot(filename):
+        return 'snapshot'
+
+    with open(filename, 'rb') as f:
+        head = f.read(64).lstrip(b'\xef\xbb\xbf \t\r\n')
+    if not head.startswith(b'<'):
+        return 'pickle' if _is_pickle(head) else None
+
+    # the root element tells SMFF and SymTA/S apart
+    try:
+        for _, element in ElementTree.iterparse(filename, events=('start',)):
+            root = element.tag
+            break
+    except ElementTree.ParseError:
+        return None
+    if root == 'SystemModel':
+        return 'smff'
+    if root.endswith('SymTASystem'):
+        return 'symta'
+    return None
+
+
+def load_model(filename):
+    """ Loads a system from a pickle, snapshot, SMFF or SymTA/S file """
+    fmt = model_format(filename)
+    if fmt == 'snapshot':
+        return snapshot.load(filename)
+    if fmt == 'pickle':
+        with open(filename, 'rb') as f:
+            return pickle.load(f)
+    if fmt == 'smff':
+        return smff_loader.SMFFStreamLoader().parse(filename)
+    if fmt == 'symta':
+        return symload.SymtaStreamLoader14().parse(filename)
+    raise ValueError("unknown model format of %s" % filename)
+
+
+def _open_csv(filename, mode):
+    """ Opens a CSV file as required by the csv module """
+    if sys.version_info[0] < 3:
+        return open(filename, mode + 'b')
+    return open(filename, mode, newline='')
+
+
+def _alarm(signum, frame):
+    raise analysis.TimeoutException("model timeout reached")
+
+
+def analyze_model(args):
+    """ Loads and analyzes a single model in a worker process.
+    Returns the model name and its rows for the results table.
+    """
+    filename, config, model_timeout = args
+    start = time.time()
+    status, message, rows = OK, '', list()
+
+    use_alarm = model_timeout is not None and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _alarm)
+        signal.alarm(int(math.ceil(model_timeout)))
+    try:
+        s = load_model(filename)
+        task_results = analysis.analyze_system(s, config=config)
+        for r in sorted(s.resources, key=str):
+            for t in sorted(r.tasks, key=str):
+                rows.append({'resource': r.name, 'task': t.name,
+                             'bcrt': task_results[t].bcrt,
+                             'wcrt': task_results[t].wcrt})
+    except analysis.NotSchedulableException as e:
+        status, message = NOT_SCHEDULABLE, str(e.value)
+    except analysis.TimeoutException as e:
+        status, message = TIMEOUT, str(e.value)
+    except Exception as e:
+        status, message = ERROR, "%s: %s" % (type(e).__name__, e)
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+
+    if status != OK:
+        rows = [{}]
+    seconds = "%.3f" % (time.time() - start)
+    for row in rows:
+        row.update({'model': filename, 'status': status, 'seconds': seconds,
+                    'message': message})
+    return filename, status, rows
+
+
+def finished_models(results_file):
+    """ Returns the models which are already listed in results_file """
+    if not os.path.isfile(results_file):
+        return set()
+    with _open_csv(results_file, 'r') as f:
+        return set(row['model'] for row in csv.DictReader(f))
+
+
+def batch_analysis(models, results_file, jobs=None, model_timeout=None):
+    """ Analyzes all models not yet listed in results_file
+    and appends their results.
+    """
+    done = finished_models(results_file)
+    todo = list()
+    for m in model_files(models, exclude=[results_file]):
+        if m in done:
+            continue
+        if model_format(m) is None:
+            print("skipping %s: unknown model format" % m)
+            continue
+        todo.append(m)
+    print("%d models, %d already analyzed" % (len(todo) + len(done), len(done)))
+
+    config = options.get_config()
+    if model_timeout is not None:
+        # let the analysis stop by itself before the hard timeout
+        config = config.replace(timeout=min(config.timeout, model_timeout))
+    work = [(m, config, model_timeout) for m in todo]
+
+    write_header = len(done) == 0 and not os.path.isfile(results_file)
+    with _open_csv(results_file, 'a') as f:
+        writer = csv.DictWriter(f, COLUMNS)
+        if write_header:
+            writer.writeheader()
+
+        if jobs == 1:
+            pool = None
+            results = map(analyze_model, work)
+        else:
+            pool = multiprocessing.Pool(jobs)
+            results = pool.imap_unordered(analyze_model, work)
+
+        try:
+            for i, (filename, status, rows) in enumerate(results):
+                writer.writerows(rows)
+                # written results survive an interrupted batch
+                f.flush()
+                print("[%d/%d] %s: %s" % (i + 1, len(todo), filename, status))
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+
+if __name__ == "__main__":
+    options.parser.add_argument('--models', type=str, nargs='+', required=True,
+                                help='model files, directories or glob patterns')
+    options.parser.add_argument('--results', type=str, default='results.csv',
+                                help='results table (CSV), models already in this table are skipped')
+    options.parser.add_argument('--jobs', '-j', type=int, default=None,
+                                help='number of worker processes (default: number of CPUs)')
+    options.parser.add_argument('--model_timeout', type=float, default=None,
+                                help='time limit in seconds for loading and analyzing a single model')
+
+    options.init_pycpa()
+    batch_analysis(options.get_opt('models'), options.get_opt('results'),
+                   options.get_opt('jobs'), options.get_opt('model_timeout'))
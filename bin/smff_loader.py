@@ -23,10 +23,13 @@ from pycpa import smff_loader
 from pycpa import graph
 from pycpa import options
 
-def smff_test(filename, outfile, plot, verbose):
+def smff_test(filename, outfile, plot, verbose, stream=False):
 
     print ("loading " + filename)
-    loader = smff_loader.SMFFLoader()
+    if stream:
+        loader = smff_loader.SMFFStreamLoader()
+    else:
+        loader = smff_loader.SMFFLoader()
     s = loader.parse(filename)
 
 
@@ -68,7 +71,10 @@ if __name__ == "__main__":
                     help='annotated output xml')
     options.parser.add_argument('--graph', '-g', action='store_true',
                     help='Graph the system, file will be saved to FILE.pdf. Where FILE is the input xml.')
+    options.parser.add_argument('--stream', action='store_true',
+                    help='Use the streaming loader, which does not keep the XML document in memory.')
 
     # TODO this explicit init  might break something in a regression test suite
     options.init_pycpa()
-    smff_test(options.get_opt('file'), options.get_opt('ofile'), options.get_opt('graph'), options.get_opt('verbose'))
+    smff_test(options.get_opt('file'), options.get_opt('ofile'), options.get_opt('graph'), options.get_opt('verbose'),
+              options.get_opt('stream'))
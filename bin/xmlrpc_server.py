@@ -23,11 +23,17 @@ from pycpa import cparpc
 
 options.parser.add_argument('--port', '-p', type=int, default=7080,
         help='http port to listen on')
+options.parser.add_argument('--results_budget', type=int, default=None,
+        help='estimated memory (in bytes) for stored analysis results, '
+        'least-recently used results are evicted above this budget')
+options.parser.add_argument('--results_ttl', type=float, default=None,
+        help='time (in seconds) after which unused analysis results are evicted')
 
 
 if __name__ == '__main__':
     options.init_pycpa()
-    rpc = cparpc.CPARPC()
+    rpc = cparpc.CPARPC(results_memory_budget=options.get_opt('results_budget'),
+                        results_ttl=options.get_opt('results_ttl'))
     xmlrpc.addIntrospection(rpc)
     reactor.listenTCP(options.get_opt("port"), server.Site(rpc))
     reactor.run()
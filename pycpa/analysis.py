@@ -23,10 +23,15 @@ from __future__ import unicode_literals
 from __future__ import division
 
 
+import array
+import contextlib
 import gc
 import logging
+import math
+import threading
 import copy
 import time
+import timeit
 from collections import deque
 import functools
 
@@ -48,7 +53,7 @@ logger = logging.getLogger(__name__)
 class NotSchedulableException(Exception):
     """ Thrown if the system is not schedulable """
     def __init__(self, value):
-        super(NotSchedulableException, self).__init__()
+        super(NotSchedulableException, self).__init__(value)
         self.value = value
 
     def __str__(self):
@@ -57,31 +62,132 @@ class NotSchedulableException(Exception):
 class TimeoutException(Exception):
     """ Thrown if the analysis timed out"""
     def __init__(self, value):
-        super(TimeoutException, self).__init__()
+        super(TimeoutException, self).__init__(value)
         self.value = value
 
     def __str__(self):
         return repr(self.value)
 
 
+try:
+    array.array('q')
+    _BUSY_TIMES_TYPECODE = 'q'
+except ValueError:
+    # Python 2 has no 'q' (long long) arrays
+    _BUSY_TIMES_TYPECODE = 'l'
+
+
+class BusyTimes(object):
+    """ Busy times of a task, i.e. busy_times[q] is the maximum busy time
+    of q activations.
+    The busy times are stored compactly as integer array as long as they are
+    integers (the common case), otherwise as a list.
+    Apart from that, BusyTimes behaves like (and compares equal to) a list.
+    """
+    __slots__ = ('_values',)
+
+    def __init__(self, values=()):
+        try:
+            self._values = array.array(_BUSY_TIMES_TYPECODE, values)
+        except (TypeError, OverflowError):
+            # e.g. float or fractional busy times
+            self._values = list(values)
+
+    def append(self, value):
+        try:
+            self._values.append(value)
+        except (TypeError, OverflowError):
+            self._values = list(self._values)
+            self._values.append(value)
+
+    def tolist(self):
+        return list(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._values[index])
+        return self._values[index]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, BusyTimes):
+            other = other._values
+        try:
+            if len(other) != len(self._values):
+                return False
+        except TypeError:
+            return NotImplemented
+        if type(other) is type(self._values):
+            # compared element-wise in C for arrays
+            return self._values == other
+        return list(self._values) == list(other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    __hash__ = None
+
+    def __getstate__(self):
+        # required to pickle __slots__ classes with protocols < 2
+        return self._values
+
+    def __setstate__(self, values):
+        self._values = values
+
+    def __repr__(self):
+        return repr(list(self._values))
+
+
+class BusyWindowDetails(dict):
+    """ Details on a busy window as recorded by Scheduler.b_plus().
+
+    Keys are interfering tasks or names of other components
+    (e.g. 'q*WCET' or 'blocker').
+    Values are (number of activations, execution time) tuples
+    or plain values.
+    Strings are only built when the details are printed (see to_strings()).
+    """
+    __slots__ = ()
+
+    def to_strings(self):
+        """ Returns the details as a dict of human-readable strings """
+        return dict(_details_str(k, v) for k, v in self.items())
+
+
+def _details_str(key, value):
+    """ Returns a (key, value) pair of busy-window details as strings """
+    if isinstance(key, model.Task):
+        key = str(key) + ':eta*WCET'
+    if isinstance(value, tuple) and len(value) == 2:
+        value = '%s*%s=%s' % (value[0], value[1], value[0] * value[1])
+    return str(key), str(value)
+
+
 class TaskResult(object):
-    """ This class stores all analysis results for a single task """
-
-    # : Worst-case response time
-    wcrt = 0
-    # : Best-case response time
-    bcrt = 0  # init wcrt, bcrt with 0 so initial response time jitter is 0
-    # : List of busy-times
-    busy_times = list()
-    # : Worst-case activation backlog
-    max_backlog = float('inf')
-    # : Number of activations q for which the worst-case response-time was found
-    q_wcrt = 0
-    # : dict containing details on the busy-window of the worst-case response
-    # time
-    b_wcrt = dict()
+    """ This class stores all analysis results for a single task
+
+    * wcrt: Worst-case response time
+    * bcrt: Best-case response time
+    * busy_times: Busy times (see BusyTimes), lists are converted on assignment
+    * max_backlog: Worst-case activation backlog
+    * q_wcrt: Number of activations q for which the worst-case response-time was found
+    * b_wcrt: BusyWindowDetails of the busy-window of the worst-case response time
+    * epsilon: epsilon of the scheduler if the busy times are approximated
+      (see Scheduler.epsilon), None if they are exact
+    """
+    __slots__ = ('wcrt', 'bcrt', '_busy_times', 'max_backlog', 'q_wcrt', 'b_wcrt',
+                 'epsilon')
 
     def __init__(self):
+        self.b_wcrt = BusyWindowDetails()
         self.clean()
 
     def clean(self):
@@ -90,17 +196,36 @@ class TaskResult(object):
         # zero initially
         self.wcrt = 0
         self.bcrt = 0
-        self.busy_times = list()
+        self.busy_times = BusyTimes()
         self.max_backlog = float('inf')
         self.q_wcrt = 0
+        self.epsilon = None
+
+    @property
+    def busy_times(self):
+        """ List of busy-times """
+        return self._busy_times
+
+    @busy_times.setter
+    def busy_times(self, busy_times):
+        if not isinstance(busy_times, BusyTimes):
+            busy_times = BusyTimes(busy_times)
+        self._busy_times = busy_times
+
+    def __getstate__(self):
+        # required to pickle __slots__ classes with protocols < 2
+        return dict((k, getattr(self, k)) for k in self.__slots__
+                    if hasattr(self, k))
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
 
     def b_wcrt_str(self):
         """ Returns a string with the components of b_wcrt
         sorted alphabetically """
-        s = ''
-        for k in sorted(self.b_wcrt.keys()):
-            s += k + ':' + str(self.b_wcrt[k]) + ', '
-        return s[:-2]
+        details = dict(_details_str(k, v) for k, v in self.b_wcrt.items())
+        return ', '.join(k + ':' + details[k] for k in sorted(details))
 
 class JunctionStrategy(object):
     """ This class encapsulates the junction-specific analysis """
@@ -168,8 +293,24 @@ class JunctionStrategy(object):
 class Scheduler(object):
     """ This class encapsulates the scheduler-specific analysis """
 
-    def __init__(self):
-        pass
+    #: if not None, b_plus() is approximated (see b_plus_approximate())
+    epsilon = None
+
+    #: Whether b_plus() supports the approximation (see epsilon).
+    #: Schedulers which override b_plus() without using b_plus_approximate()
+    #: must set this to False.
+    supports_approximation = True
+
+    def __init__(self, epsilon=None):
+        """
+        :param epsilon: if not None, approximate the busy times
+            with a relative error of about epsilon (see b_plus_approximate())
+        :type epsilon: float
+        """
+        if epsilon is not None and not self.supports_approximation:
+            raise ValueError("%s does not support approximate busy times "
+                             "(epsilon=%g)" % (type(self).__name__, epsilon))
+        self.epsilon = epsilon
 
     def get_dependent_tasks(self, task):
         return set()
@@ -190,32 +331,113 @@ class Scheduler(object):
         :type task: model.Task
         :param q: the number of activations
         :type q: integer
-        :param details: reference to a dict of details on the busy window (instead of busy time)
-        :type q: boolean
+        :param details: if not None, the details on the busy window are stored
+            in this dict when the busy time has converged
+        :type details: BusyWindowDetails
+
+        Implementations should report their fixed-point iterations
+        via record_b_plus() for the instrumentation (see AnalysisStats).
         :rtype: integer (max. busy-time for q activations)
         """
 
+        if self.epsilon is not None:
+            return self.b_plus_approximate(task, q,
+                                           task.get_resource_interferers(),
+                                           details)
+
         w = q * task.wcet
+        iterations = 0
         while True:
+            iterations += 1
             s = 0
             for ti in task.get_resource_interferers():
                 s += ti.wcet * ti.in_event_model.eta_plus(w)
             w_new = q * task.wcet + s
             if w == w_new:
                 if details is not None:
-                    sum_dict = dict()
-                    sum_dict['q*WCET'] = q * task.wcet
-                    details['q*WCET'] = str(q) + '*' + str(task.wcet)
+                    details['q*WCET'] = (q, task.wcet)
                     for ti in task.get_resource_interferers():
-                        sum_dict[str(ti) + '.eta*WCET'] = \
-                            ti.in_event_model.eta_plus(w) * ti.wcet
-                        desc_string = str(ti.in_event_model.eta_plus(w))\
-                                        + '*' + str(ti.wcet)
-                        details[str(ti) + ':eta*WCET'] = desc_string
-                        details['sum'] = sum_dict
+                        details[ti] = (ti.in_event_model.eta_plus(w), ti.wcet)
+                record_b_plus(task, iterations)
                 return w
             w = w_new
 
+    def b_plus_approximate(self, task, q, interferers, details=None):
+        """ Approximate maximum busy-time for q activations of a task,
+        which is a safe upper bound of the exact busy-time.
+
+        Each activation of the interferers within the busy window
+        is assumed to interfere (i.e. preemptive scheduling).
+        The activations of an interferer are counted exactly up to
+        k = ceil(1/epsilon) activations and beyond that by the linear bound
+        of model.EventModel.eta_plus_linear(), similar to [Fisher2005]_.
+        For periodic event models (with jitter), this overestimates
+        the interference of each interferer by less than a factor (1 + epsilon).
+        As the linear parts are solved in closed form, the fixed-point
+        iteration takes at most len(interferers) * (k + 1) + 1 steps
+        (instead of a number of steps that grows with the busy time).
+
+        The approximation is reported in details['approximation'].
+
+        :param task: the analyzed task
+        :type task: model.Task
+        :param q: the number of activations
+        :type q: integer
+        :param interferers: the interfering tasks
+        :param details: see b_plus()
+        :rtype: integer (approximate max. busy-time for q activations)
+        """
+        k = int(math.ceil(1. / self.epsilon))
+        # linear bounds (a, r) of interferers beyond k activations
+        linear = dict()
+        w = q * task.wcet
+        iterations = 0
+        while True:
+            iterations += 1
+            s = 0
+            a_sum = 0.
+            r_sum = 0.
+            for ti in interferers:
+                bound = linear.get(ti, None)
+                if bound is None:
+                    n = ti.in_event_model.eta_plus(w)
+                    if n > k:
+                        bound = ti.in_event_model.eta_plus_linear(k)
+                    if bound is None:
+                        s += ti.wcet * n
+                        continue
+                    linear[ti] = bound
+                a_sum += ti.wcet * bound[0]
+                r_sum += ti.wcet * bound[1]
+
+            if r_sum >= 1:
+                raise NotSchedulableException("approximate interference "
+                                              "of %s exceeds the resource "
+                                              "capacity (epsilon=%g)"
+                                              % (task.name, self.epsilon))
+            # fixed point of the linear parts for the current exact part
+            w_new = (q * task.wcet + s + a_sum) / (1. - r_sum) \
+                if linear else q * task.wcet + s
+            if w_new == w:
+                break
+            w = w_new
+
+        # busy times of a discrete time base
+        w = int(math.ceil(w))
+        if details is not None:
+            details['q*WCET'] = (q, task.wcet)
+            for ti in interferers:
+                if ti in linear:
+                    a, r = linear[ti]
+                    details[ti] = (a + r * w, ti.wcet)
+                else:
+                    details[ti] = (ti.in_event_model.eta_plus(w), ti.wcet)
+            details['approximation'] = 'epsilon=%g, linear beyond %d: %s' % \
+                (self.epsilon, k,
+                 ', '.join(sorted(str(ti) for ti in linear)) or '-')
+        record_b_plus(task, iterations)
+        return w
+
     def b_min(self, task, q):
         """ Minimum Busy-Time for q activations of a task.
 
@@ -231,6 +453,23 @@ class Scheduler(object):
 
         return q * task.bcet
 
+    def wcrt_lower_bound(self, task, limit=None):
+        """ Lower bound on the worst-case response time computed by
+        compute_wcrt(), which is used to screen deadlines before the analysis
+        (see options check_violations).
+        Only the event models of source tasks are known at that time.
+
+        This default implementation returns the WCET, as b_plus()
+        is at least q * WCET.
+
+        :param task: the analyzed task
+        :type task: model.Task
+        :param limit: implementations may stop improving the bound
+            once it exceeds limit (e.g. the deadline of the task)
+        :rtype: integer (lower bound of the wcrt)
+        """
+        return task.wcet
+
     def stopping_condition(self, task, q, w):
         """ Return true if a sufficient number of activations q
         have been evaluated for a task during the busy-time w.
@@ -255,7 +494,7 @@ class Scheduler(object):
             return True
         return False
 
-    def compute_wcrt(self, task, task_results=None):
+    def compute_wcrt(self, task, task_results=None, config=None):
         """ Compute the worst-case response time of Task
 
         .. warning::
@@ -266,6 +505,8 @@ class Scheduler(object):
         :type task: model.Task
         :param task_results: dictionary which stores analysis results
         :type task_results: dict (analysis.TaskResult)
+        :param config: analysis options (default: options.get_config())
+        :type config: options.AnalysisConfig
         :rtype: integer (worst-case response time)
 
         For this, we construct busy windows for q=1, 2, ... task activations
@@ -277,7 +518,11 @@ class Scheduler(object):
         Should not be called directly (use System.analyze() instead).
         """
 
-        max_iterations = options.get_opt('max_iterations')
+        if config is None:
+            config = options.get_config()
+        max_iterations = config.max_iterations
+        max_wcrt = config.max_wcrt
+        timeout = config.timeout
 
         logger.debug('compute wcrt of %s' % (task.name))
 
@@ -291,17 +536,34 @@ class Scheduler(object):
         wcrt = 0
         start = timefunc()
 
-        b_wcrt = dict()  # store details of busy window leading to wcrt
+        timeline = getattr(_local, 'timeline', None)
+
+        # stop as soon as the deadline is exceeded if violations stop
+        # the analysis anyway (results only grow during the analysis)
+        deadline = None
+        deadlines = getattr(_local, 'deadlines', None)
+        if deadlines:
+            deadline = deadlines.get(task, None)
+
+        # details of busy window leading to wcrt,
+        # recorded by b_plus() along with the busy time
+        b_wcrt = BusyWindowDetails()
+        details = None
         if task_results:
             task_results[task].busy_times = [0]  # busy time of 0 activations
-        self.b_plus(task, 1, details=b_wcrt, task_results=task_results)
         while True:
             elapsed = timefunc() - start
-            if elapsed > options.get_opt('timeout'):
+            if elapsed > timeout:
                 raise TimeoutException("Timeout reached in compute_wcrt at q=%d" % (q-1))
 
             logger.debug('iteration for q=%d' %(q))
-            w = self.b_plus(task, q, task_results=task_results)
+            if not config.lean:
+                details = BusyWindowDetails()
+            if timeline is not None:
+                recorded = timeline.begin('q=%d' % q, 'compute_wcrt')
+            w = self.b_plus(task, q, details=details, task_results=task_results)
+            if timeline is not None:
+                timeline.end(recorded, {'w': w})
             if task_results:
                 logger.debug('setting results %d', w)
                 task_results[task].busy_times.append(w)
@@ -311,19 +573,24 @@ class Scheduler(object):
             # w, current_response))
 
             elapsed = timefunc() - start
-            if elapsed > options.get_opt('timeout'):
+            if elapsed > timeout:
                 raise TimeoutException("Timeout reached in compute_wcrt at q=%d" % (q-1))
 
+            if details is not None and (current_response > wcrt or q == 1):
+                b_wcrt = details
             if current_response > wcrt:
                 wcrt = current_response
                 q_wcrt = q
-                self.b_plus(task, q, details=b_wcrt, task_results=task_results)
 
             # TODO: this should go in central "constraint checking" function
-            if options.get_opt('max_wcrt') < wcrt:
+            if max_wcrt < wcrt:
                 raise NotSchedulableException("max_wcrt > wcrt of %s, "
                                               "tasks (likely) not schedulable!"
                                               % task.name)
+            if deadline is not None and wcrt > deadline:
+                raise NotSchedulableException("Deadline violated for task %s, "
+                                              "wcrt>=%s at q=%d, deadline=%s"
+                                              % (task.name, wcrt, q, deadline))
 
             # Check stopcondition
             if self.stopping_condition(task, q, w) == True:
@@ -344,6 +611,7 @@ class Scheduler(object):
             task_results[task].q_wcrt = q_wcrt
             task_results[task].wcrt = wcrt
             task_results[task].b_wcrt = b_wcrt
+            task_results[task].epsilon = self.epsilon
         # logger.debug(task.name + " busy times: " +
         # str(task_results[task].busy_times))
         return wcrt
@@ -396,7 +664,7 @@ class Scheduler(object):
         return max_backlog
 
 
-def analyze_task(task, task_results):
+def analyze_task(task, task_results, config=None):
     """ Analyze Task BUT DONT propagate event model.
     This is the "local analysis step", see Section 7.1.4 in [Richter2005]_.
     """
@@ -410,12 +678,19 @@ def analyze_task(task, task_results):
     assert (task.bcet <= task.wcet), 'BCET must not be larger '\
             'than WCET for task %s' % (task.name)
 
+    timeline = getattr(_local, 'timeline', None)
+    if timeline is not None:
+        recorded = timeline.begin(task.name, 'analyze_task', sample=True)
+
     task.update_execution_time(task_results)
 
     task.resource.scheduler.compute_bcrt(task, task_results)
-    task.resource.scheduler.compute_wcrt(task, task_results)
+    task.resource.scheduler.compute_wcrt(task, task_results, config=config)
     task.resource.scheduler.compute_max_backlog(task, task_results)
 
+    if timeline is not None:
+        timeline.end(recorded, {'wcrt': task_results[task].wcrt})
+
     assert (task_results[task].bcrt <= task_results[task].wcrt),\
             'Task:%s, BCRT (%d) must not be larger than WCRT (%d)' % \
             (task.name, task_results[task].bcrt, task_results[task].wcrt)
@@ -451,10 +726,253 @@ def out_event_model(task, task_results, dst_task=None):
         return em
 
 
+# task graph of the analysis running in the current thread
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def _use_task_graph(task_graph):
+    """ Makes task_graph the task graph of the current thread
+    (see current_task_graph()) """
+    previous = getattr(_local, 'task_graph', None)
+    _local.task_graph = task_graph
+    try:
+        yield task_graph
+    finally:
+        _local.task_graph = previous
+
+
+def current_task_graph():
+    """ Returns the util.TaskGraph of the system which is analyzed
+    in the current thread or None if no analysis is running.
+    The graph structure does not change during an analysis,
+    hence reachability queries can use this index.
+    """
+    return getattr(_local, 'task_graph', None)
+
+
+class TaskStats(object):
+    """ Counters of the local analyses of a task (or of all tasks of a resource)
+
+    * analyses: Number of local analyses
+    * b_plus_calls: Number of calls of Scheduler.b_plus()
+    * iterations: Fixed-point iterations within b_plus()
+    * q_max: Maximum number of activations q in a busy window
+    * time: Wall time of the local analyses in seconds
+    """
+    __slots__ = ('analyses', 'b_plus_calls', 'iterations', 'q_max', 'time')
+
+    def __init__(self):
+        self.analyses = 0
+        self.b_plus_calls = 0
+        self.iterations = 0
+        self.q_max = 0
+        self.time = 0.
+
+    def add(self, other):
+        """ Adds the counters of other """
+        self.analyses += other.analyses
+        self.b_plus_calls += other.b_plus_calls
+        self.iterations += other.iterations
+        self.q_max = max(self.q_max, other.q_max)
+        self.time += other.time
+
+
+class EventModelStats(object):
+    """ Cache statistics of an event model """
+    __slots__ = ('eta_plus_calls', 'eta_plus_hits',
+                 'delta_min_calls', 'delta_min_hits')
+
+    def __init__(self):
+        self.eta_plus_calls = 0
+        self.eta_plus_hits = 0
+        self.delta_min_calls = 0
+        self.delta_min_hits = 0
+
+    def eta_plus_hit_rate(self):
+        """ Fraction of eta_plus() calls answered from the cache """
+        if self.eta_plus_calls == 0:
+            return None
+        return float(self.eta_plus_hits) / self.eta_plus_calls
+
+    def delta_min_hit_rate(self):
+        """ Fraction of delta_min() calls answered from the cache """
+        if self.delta_min_calls == 0:
+            return None
+        return float(self.delta_min_hits) / self.delta_min_calls
+
+    def record(self, method, hit):
+        """ Counts a call of method ('eta_plus' or 'delta_min') """
+        if method == 'eta_plus':
+            self.eta_plus_calls += 1
+            if hit:
+                self.eta_plus_hits += 1
+        else:
+            self.delta_min_calls += 1
+            if hit:
+                self.delta_min_hits += 1
+
+
+class AnalysisStats(object):
+    """ Instrumentation of analysis runs.
+
+    Pass an AnalysisStats object to analyze_system() to fill it.
+    During the analysis, it is available as GlobalAnalysisState.stats,
+    i.e. also in progress_hook and post_hook.
+    Counters accumulate if the same object is used for several runs.
+
+    * tasks: dict of TaskStats per task (see also resources())
+    * event_models: dict of EventModelStats per event model
+    * phases: wall time in seconds per phase of the global analysis
+      ('init', 'local_analysis', 'propagation', 'gc', 'constraints')
+    * global_iterations: Number of iterations of the global analysis
+    * wall_time, cpu_time: Duration of the analysis in seconds
+    """
+
+    def __init__(self):
+        self.tasks = dict()
+        self.event_models = dict()
+        self.phases = dict.fromkeys(['init', 'local_analysis', 'propagation',
+                                     'gc', 'constraints'], 0.)
+        self.global_iterations = 0
+        self.wall_time = 0.
+        self.cpu_time = 0.
+
+    def task(self, task):
+        """ Returns the TaskStats of task """
+        s = self.tasks.get(task, None)
+        if s is None:
+            s = self.tasks[task] = TaskStats()
+        return s
+
+    def event_model(self, em):
+        """ Returns the EventModelStats of em """
+        s = self.event_models.get(em, None)
+        if s is None:
+            s = self.event_models[em] = EventModelStats()
+        return s
+
+    def resources(self):
+        """ Returns a dict of TaskStats per resource,
+        which sum up the counters of the tasks on that resource """
+        resources = dict()
+        for task, s in self.tasks.items():
+            if task.resource not in resources:
+                resources[task.resource] = TaskStats()
+            resources[task.resource].add(s)
+        return resources
+
+    def __repr__(self):
+        return "AnalysisStats(%d tasks, %d global iterations, %.3f s)" % \
+            (len(self.tasks), self.global_iterations, self.wall_time)
+
+
+@contextlib.contextmanager
+def _use_timeline(timeline):
+    """ Makes timeline the timeline.Timeline of the current thread
+    and writes it to its file (if any) when the analysis ends
+    """
+    if timeline is None:
+        yield timeline
+        return
+
+    previous = getattr(_local, 'timeline', None)
+    _local.timeline = timeline
+    try:
+        yield timeline
+    finally:
+        _local.timeline = previous
+        timeline.close()
+        if timeline.filename is not None:
+            timeline.write()
+
+
+@contextlib.contextmanager
+def _use_deadlines(deadlines):
+    """ Makes deadlines (dict of wcrt constraints per task) the deadlines
+    at which compute_wcrt() stops in the current thread """
+    previous = getattr(_local, 'deadlines', None)
+    _local.deadlines = deadlines
+    try:
+        yield deadlines
+    finally:
+        _local.deadlines = previous
+
+
+@contextlib.contextmanager
+def _use_context(context):
+    """ Activates the model.RunContext context (if not None) """
+    if context is None:
+        yield context
+        return
+
+    with context:
+        yield context
+
+
+def current_stats():
+    """ Returns the AnalysisStats of the analysis running in the current
+    thread or None if the analysis is not instrumented.
+    """
+    return getattr(_local, 'stats', None)
+
+
+def record_b_plus(task, iterations):
+    """ Called by Scheduler.b_plus() implementations to report a call
+    and the number of fixed-point iterations it took.
+    Does nothing (and is cheap) if the analysis is not instrumented.
+    """
+    stats = getattr(_local, 'stats', None)
+    if stats is not None:
+        s = stats.task(task)
+        s.b_plus_calls += 1
+        s.iterations += iterations
+
+
+# guards model._instrumented_runs
+_instrument_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _use_stats(stats):
+    """ Makes stats the AnalysisStats of the current thread
+    (see current_stats()).
+    The event model calls are counted by model.record_event_model_call(),
+    which only looks up the stats of the thread while any analysis
+    is instrumented.
+    """
+    if stats is None:
+        yield stats
+        return
+
+    with _instrument_lock:
+        model._instrumented_runs += 1
+
+    previous = getattr(_local, 'stats', None)
+    _local.stats = stats
+    model._local.stats = stats
+    wall_start = timeit.default_timer()
+    cpu_start = timefunc()
+    try:
+        yield stats
+    finally:
+        stats.wall_time += timeit.default_timer() - wall_start
+        stats.cpu_time += timefunc() - cpu_start
+        _local.stats = previous
+        model._local.stats = previous
+        with _instrument_lock:
+            model._instrumented_runs -= 1
+
+
 def _invalidate_event_model_caches(task):
     """ Invalidate all event model caches """
     task.invalidate_event_model_cache()
-    for t in util.breadth_first_search(task):
+    task_graph = current_task_graph()
+    if task_graph is not None and task in task_graph:
+        reachable = task_graph.bfs(task)
+    else:
+        reachable = util.breadth_first_search(task)
+    for t in reachable:
         t.invalidate_event_model_cache()
 
 
@@ -466,6 +984,10 @@ def _propagate(task, task_results):
     :param task_results: dictionary which stores analysis results
     :type task_results: dict (analysis.TaskResult)
     """
+    timeline = getattr(_local, 'timeline', None)
+    if timeline is not None:
+        recorded = timeline.begin(task.name, 'propagate', sample=True)
+
     _invalidate_event_model_caches(task)
     for t in task.next_tasks:
         # logger.debug("propagating to " + str(t))
@@ -475,10 +997,17 @@ def _propagate(task, task_results):
             # task_results).load())
             t.in_event_model = out_event_model(task, task_results, t)
         elif isinstance(t, model.Junction):
+            if timeline is not None:
+                recorded_junction = timeline.begin(t.name, 'junction')
             t.strategy.propagate(t, task_results)
+            if timeline is not None:
+                timeline.end(recorded_junction)
         else:
             raise TypeError("invalid propagation target")
 
+    if timeline is not None:
+        timeline.end(recorded)
+
 
 def _assert_event_model_conservativeness(emif_small, emif_large, n_max=1000):
     """ Assert that emif_large is no greater than emif_small """
@@ -494,8 +1023,20 @@ class GlobalAnalysisState(object):
     At the moment this is only the list of dirty tasks.
     Half the anlysis context is stored in the Task class itself!
     """
-    def __init__(self, system, task_results):
-        """ Initialize the analysis """
+    def __init__(self, system, task_results, dirty_tasks=None, config=None,
+                 targets=None):
+        """ Initialize the analysis.
+        If dirty_tasks is given, the analysis state of a previous run
+        is kept and only dirty_tasks and the tasks affected by them
+        are marked for re-analysis.
+        If targets is given, only the tasks on which the targets depend
+        are analyzed (see _restrict_to_targets()).
+        """
+        # options of this analysis run
+        if config is None:
+            config = options.get_config()
+        self.config = config
+
         # Set of tasks requiring another local analysis due to updated input
         # events
         self.dirtyTasks = set()
@@ -508,13 +1049,21 @@ class GlobalAnalysisState(object):
         # set of junctions used during depdency detection in order to avoid
         # infinite recursions
         self.mark_junctions = set()
+        # AnalysisStats of this run (None if not instrumented)
+        self.stats = None
+        # set of tasks which are analyzed for the targets
+        # (None if all tasks are analyzed)
+        self.relevant_tasks = None
 
         self._mark_all_dirty(system)
+        self._init_dependent_tasks(system)
 
-        # # clean old analysis state before we start a new analysis
-        self.clean_analysis_state()
+        if targets is not None:
+            self._restrict_to_targets(targets)
 
-        self._init_dependent_tasks(system)
+        # # clean old analysis state before we start a new analysis
+        if dirty_tasks is None:
+            self.clean_analysis_state()
 
         # analyze tasks with most dependencies first
 
@@ -527,7 +1076,15 @@ class GlobalAnalysisState(object):
         # (which is safe but not efficient).
         self._init_analysis_order()
 
-        uninizialized = deque(self.dirtyTasks)
+        if dirty_tasks is None:
+            uninizialized = deque(self.dirtyTasks)
+        else:
+            # event models of the previous run are still in place
+            uninizialized = deque()
+            self._mark_incremental_dirty(dirty_tasks, task_results)
+            if self.relevant_tasks is not None:
+                self.dirtyTasks &= self.relevant_tasks
+
         while len(uninizialized) > 0:
             # if there in no task with an valid event model, then the
             # app-graph is
@@ -550,6 +1107,9 @@ class GlobalAnalysisState(object):
                 uninizialized.append(t)
 
         for r in system.resources:
+            if self.relevant_tasks is not None and \
+                    self.relevant_tasks.isdisjoint(r.tasks):
+                continue  # event models are not propagated to r
             load = r.load()
             logger.info("load on %s: %f" % (r.name, load))
             if load >= 1.0:
@@ -561,6 +1121,9 @@ class GlobalAnalysisState(object):
                                               "load on %s exceeds 1.0"
                                               "(load is %f)" % (r.name, load))
 
+        if self.config.check_violations:
+            _screen_constraints(system.constraints, self.relevant_tasks)
+
     def clean_analysis_state(self):
         """ Clean the analysis state """
         for t in self.dirtyTasks:
@@ -602,7 +1165,51 @@ class GlobalAnalysisState(object):
 
     def _mark_dependents_dirty(self, task):
         """ add all dependencies of task to the dirty set """
-        self.dirtyTasks |= self.dependentTask[task]
+        if self.relevant_tasks is None:
+            self.dirtyTasks |= self.dependentTask[task]
+        else:
+            self.dirtyTasks |= self.dependentTask[task] & self.relevant_tasks
+
+    def _restrict_to_targets(self, targets):
+        """ Restrict the analysis to the backward slice of targets,
+        i.e. the target tasks and all tasks which (transitively) mark
+        them dirty: their predecessors, the predecessors of their
+        resource interferers and the scheduler-dependent tasks.
+        The results of all other tasks cannot influence the targets.
+
+        :param targets: tasks, model.Path or model.EffectChain objects
+        """
+        predecessors = dict()
+        for task, dependents in self.dependentTask.items():
+            for t in dependents:
+                predecessors.setdefault(t, list()).append(task)
+
+        seeds = [t for t in _target_tasks(targets) if t in self.dependentTask]
+        relevant = util.TaskGraph(seeds, lambda t: predecessors.get(t, ()))
+        self.relevant_tasks = set(relevant.nodes)
+        self.dirtyTasks &= self.relevant_tasks
+        logger.info("analyzing %d of %d tasks for the targets" %
+                    (len(self.relevant_tasks), len(self.dependentTask)))
+
+    def _mark_incremental_dirty(self, changed_tasks, task_results):
+        """ Restrict the dirty set to the tasks affected by changed_tasks,
+        i.e. the changed tasks, all tasks on the same resources and
+        all tasks depending on them.
+        The event models of the changed tasks are propagated again,
+        as their input event models may have changed.
+        The results of the previous run are a lower bound of the new
+        fixed point only if the changes increase the results
+        (see analyze_system()).
+        """
+        self.dirtyTasks = set()
+        for t in changed_tasks:
+            self.dirtyTasks.add(t)
+            self.dirtyTasks |= set(t.get_resource_interferers())
+            self._mark_dependents_dirty(t)
+
+        for t in changed_tasks:
+            if t.in_event_model is not None:
+                _propagate(t, task_results)
 
     def _init_dependent_tasks(self, system):
         """ Initialize dependentTask """
@@ -645,18 +1252,15 @@ class GlobalAnalysisState(object):
         as an indicator as to which task to analyze first
         """
 
-        all_dep_tasks = {}
-
-        # print "building dependencies for %d tasks" % (len(context.dirtyTasks))
-        for task in self.dirtyTasks:  # go through all tasks
-            all_dep_tasks[task] = util.breadth_first_search(
-                task, None, self.get_dependent_tasks)
+        # number of tasks reachable via dependencies (computed at once
+        # for all tasks, as tasks on the same resource form cycles)
+        dependencies = util.TaskGraph(self.dirtyTasks, self.get_dependent_tasks)
 
         # sort by name first (as secondary key in case the lengths are the same
         all_tasks_by_name = sorted(
-            self.dependentTask.keys(), key=lambda x: x.name)
+            self.dirtyTasks, key=lambda x: x.name)
         self.analysisOrder = sorted(all_tasks_by_name,
-                                    key=lambda x: len(all_dep_tasks[x]),
+                                    key=dependencies.num_reachable,
                                     reverse=True)
 
     def _init_analysis_order_simple(self):
@@ -672,18 +1276,84 @@ class GlobalAnalysisState(object):
                                     reverse=True)
 
 
+def _target_tasks(targets):
+    """ Yields the tasks of targets (tasks, paths or effect chains) """
+    for target in targets:
+        if isinstance(target, model.Task):
+            yield target
+        else:
+            for t in target.tasks:
+                if isinstance(t, model.Task):
+                    yield t
+
+
 def analyze_system(system, task_results=None, only_dependent_tasks=False,
-                   progress_hook=None, **kwargs):
+                   progress_hook=None, dirty_tasks=None, config=None,
+                   stats=None, timeline=None, targets=None, context=None,
+                   **kwargs):
     """ Analyze all tasks until we find a fixed point
 
         system -- the system to analyze
         task_results -- if not None, all intermediate analysis
         results from a previous run are reused
-
-        Returns a dictionary with results for each task.
+        dirty_tasks -- if not None, task_results must contain the results
+        of a previous (successful) analysis of system. Only the tasks in
+        dirty_tasks (e.g. tasks whose WCET was increased since)
+        and the tasks affected by their changes are re-analyzed.
+        The analysis continues from the previous fixed point, hence the
+        changes must only increase the results: after a decrease
+        (or a change of the structure), it may converge to a larger
+        fixed point than a full analysis.
+        config -- options.AnalysisConfig for this run. By default, a
+        snapshot of the global options is used. While the analysis runs,
+        options.get_opt() returns the options of config in this thread.
+        stats -- if not None, an AnalysisStats object which is filled
+        with counters and timings of this run.
+        The overhead of the instrumentation is only paid if stats is given.
+        timeline -- if not None, a timeline.Timeline which records the
+        local analyses and propagations of this run in the Chrome trace
+        format. It is written to timeline.filename (if set) at the end
+        of the analysis, even if the analysis fails.
+        targets -- if not None, a list of tasks, model.Path and
+        model.EffectChain objects. Only the tasks on which the results
+        of the targets depend are analyzed (the backward dependency slice)
+        and only constraints of these tasks are checked.
+
+        context -- if not None, a model.RunContext in which the analysis
+        state (propagated event models, analysis_results) is stored
+        instead of the model, i.e. system is not changed by the analysis.
+        Activate the context to evaluate the results, e.g. for a path
+        analysis. For dirty_tasks, the context of the previous run must
+        be given.
+
+        Returns a dictionary with results for each task
+        (for each analyzed task if targets is given).
 
         This based on the procedure described in Section 7.2 in [Richter2005]_.
     """
+    if config is None:
+        config = options.get_config()
+
+    deadlines = None
+    if config.check_violations:
+        deadlines = system.constraints._wcrt_constraints
+
+    with _use_context(context), _use_stats(stats), _use_timeline(timeline), \
+            options.use_config(config), _use_deadlines(deadlines), \
+            _use_task_graph(util.TaskGraph.from_system(system)):
+        return _analyze_system(system, task_results, only_dependent_tasks,
+                               progress_hook, dirty_tasks, config, stats,
+                               targets, **kwargs)
+
+
+def _analyze_system(system, task_results, only_dependent_tasks,
+                    progress_hook, dirty_tasks, config, stats, targets,
+                    **kwargs):
+    """ Implementation of analyze_system() """
+    if stats is not None:
+        clock = timeit.default_timer
+        phase_start = clock()
+
     if task_results is None:
         task_results = dict()
         for r in system.resources:
@@ -692,7 +1362,18 @@ def analyze_system(system, task_results=None, only_dependent_tasks=False,
                     task_results[t] = TaskResult()
                     t.analysis_results = task_results[t]
 
-    analysis_state = GlobalAnalysisState(system, task_results)
+    analysis_state = GlobalAnalysisState(system, task_results, dirty_tasks,
+                                         config, targets)
+    analysis_state.stats = stats
+
+    # results of the analyzed tasks (constraints are checked on these)
+    relevant_results = task_results
+    if analysis_state.relevant_tasks is not None:
+        relevant_results = dict((t, task_results[t])
+                                for t in analysis_state.relevant_tasks
+                                if t in task_results)
+    if stats is not None:
+        stats.phases['init'] += clock() - phase_start
 
     iteration = 0
     start = timefunc()
@@ -707,7 +1388,12 @@ def analyze_system(system, task_results=None, only_dependent_tasks=False,
 
         # explicitly invoke garbage collection because there seem to be circluar references
         # TODO should be using weak references instead for model propagation
+        if stats is not None:
+            stats.global_iterations += 1
+            phase_start = clock()
         gc_count = gc.collect()
+        if stats is not None:
+            stats.phases['gc'] += clock() - phase_start
         for t in analysis_state.analysisOrder:
             if t not in analysis_state.dirtyTasks:
                 continue
@@ -723,17 +1409,30 @@ def analyze_system(system, task_results=None, only_dependent_tasks=False,
                 continue  # skip analysis of tasks w/o dependents
 
             old_jitter = task_results[t].wcrt - task_results[t].bcrt
-            old_busytimes = copy.copy(task_results[t].busy_times)
-            analyze_task(t, task_results)
+            # compute_wcrt() assigns new busy times, i.e. the old ones
+            # need not be copied
+            old_busytimes = task_results[t].busy_times
+            if stats is not None:
+                phase_start = clock()
+            analyze_task(t, task_results, config)
+            if stats is not None:
+                elapsed = clock() - phase_start
+                stats.phases['local_analysis'] += elapsed
+                task_stats = stats.task(t)
+                task_stats.analyses += 1
+                task_stats.time += elapsed
+                task_stats.q_max = max(task_stats.q_max,
+                                       len(task_results[t].busy_times) - 1)
 
             #sanity check
-            assert functools.reduce(lambda x, y: x and y,\
+            assert config.lean or functools.reduce(lambda x, y: x and y,\
                            [b - a >= t.wcet for a,b \
                             in util.window(task_results[t].busy_times)]) == True, "Busy_times for task %s on resource %s: %s" % (t.name, t.resource.name, str(task_results[t].busy_times))
 
             new_jitter = task_results[t].wcrt - task_results[t].bcrt
             new_busytimes = task_results[t].busy_times
 
+            # BusyTimes compare the lengths first
             if new_jitter != old_jitter or old_busytimes != new_busytimes:
                 # If jitter has changed, the input event models of all
                 # dependent task(s) have also changed,
@@ -742,10 +1441,14 @@ def analyze_system(system, task_results=None, only_dependent_tasks=False,
                 # another analysis
 
                 # propagate event model
+                if stats is not None:
+                    phase_start = clock()
                 _propagate(t, task_results)
 
                 # mark all dependencies dirty
                 analysis_state._mark_dependents_dirty(t)
+                if stats is not None:
+                    stats.phases['propagation'] += clock() - phase_start
                 break  # break the for loop to restart iteration
 
             elapsed = (timefunc() - start)
@@ -753,17 +1456,22 @@ def analyze_system(system, task_results=None, only_dependent_tasks=False,
                          % (iteration, elapsed, t.name,
                             task_results[t].wcrt,
                             len(analysis_state.dirtyTasks)))
-            if elapsed > options.get_opt('timeout'):
+            if elapsed > config.timeout:
                 raise TimeoutException("Timeout reached after iteration %d" % iteration)
             iteration += 1
 
         elapsed = timefunc() - start
-        if elapsed > options.get_opt('timeout'):
+        if elapsed > config.timeout:
             raise TimeoutException("Timeout reached after iteration %d" % iteration)
 
         # # check for constraint violations
-        if options.get_opt("check_violations"):
-            violations = check_violations(system.constraints, task_results)
+        if config.check_violations:
+            if stats is not None:
+                phase_start = clock()
+            violations = check_violations(system.constraints,
+                                          relevant_results)
+            if stats is not None:
+                stats.phases['constraints'] += clock() - phase_start
             if violations == True:
                 logger.error("Analysis stopped!")
                 raise NotSchedulableException("Violation of constraints")
@@ -772,15 +1480,19 @@ def analyze_system(system, task_results=None, only_dependent_tasks=False,
     # print "Global iteration done after %d iterations" % (round)
 
     # # also print the violations if on-the-fly checking was turned off
-    if not options.get_opt("check_violations"):
-        check_violations(system.constraints, task_results)
-    
+    if not config.check_violations:
+        if stats is not None:
+            phase_start = clock()
+        check_violations(system.constraints, relevant_results)
+        if stats is not None:
+            stats.phases['constraints'] += clock() - phase_start
+
     # a hook that allows to inspect the analysis_state object after the analysis run
     post_hook = kwargs.get('post_hook', None)
     if post_hook is not None:
         post_hook(analysis_state)
 
-    return task_results
+    return relevant_results
 
 
 def check_violations(constraints, task_results, wcrt=True, path=True,
@@ -831,11 +1543,49 @@ def check_violations(constraints, task_results, wcrt=True, path=True,
 
     return violations
 
+def _screen_constraints(constraints, tasks=None):
+    """ Cheap necessary checks of the constraints before the analysis.
+    Raises NotSchedulableException if a constraint is violated
+    regardless of the analysis results, i.e. if the load exceeds
+    a load constraint or if the lower bound of a task's wcrt
+    (see Scheduler.wcrt_lower_bound()) exceeds its deadline.
+    If tasks is not None, only the constraints of these tasks are checked.
+    """
+    for resource, load in constraints._load_constraints.items():
+        if not _has_event_models(resource):
+            continue
+        if resource.load() > load:
+            raise NotSchedulableException("Load constraint violated for "
+                                          "resource %s, load=%f, threshold=%f"
+                                          % (resource.name, resource.load(),
+                                             load))
+
+    for task, deadline in constraints._wcrt_constraints.items():
+        if task.resource is None or task.skip_analysis:
+            continue
+        if tasks is not None and task not in tasks:
+            continue
+        bound = task.resource.scheduler.wcrt_lower_bound(task, deadline)
+        if bound > deadline:
+            raise NotSchedulableException("Deadline violated for task %s, "
+                                          "wcrt>=%s, deadline=%s"
+                                          % (task.name, bound, deadline))
+
+
+def _has_event_models(resource):
+    """ Whether the load of resource is known,
+    i.e. the event models of all its tasks are set """
+    return all(t.in_event_model is not None for t in resource.tasks)
+
+
 def _check_wcrt_constraints(constraints, task_results):
-    """ Check all wcrt constraints and return a list of violating tasks
+    """ Check all wcrt constraints and return a list of violating tasks.
+    Tasks without results (i.e. which were not analyzed) are skipped.
     """
     violations = list()
     for task, deadline in constraints._wcrt_constraints.items():
+        if task not in task_results:
+            continue
         if task_results[task].wcrt > deadline:
             violations.append(task)
     return violations
@@ -846,6 +1596,8 @@ def _check_path_constraints(constraints, task_results):
     """
     violations = list()
     for path, (deadline, n) in constraints._path_constraints.items():
+        if not all(t in task_results for t in _target_tasks([path])):
+            continue
         bcl, wcl = path_analysis.end_to_end_latency(path, task_results, n)
         if  wcl > deadline:
             violations.append((path, wcl))
@@ -856,6 +1608,8 @@ def _check_backlog_constraints(constraints, task_results):
     """
     violations = list()
     for task, size in constraints._backlog_constraints.items():
+        if task not in task_results:
+            continue
         task.resource.scheduler.compute_max_backlog(task, task_results)
         if task_results[task].max_backlog > size:
             violations.append(task)
@@ -867,6 +1621,8 @@ def _check_load_constrains(constraints, task_results):
     """
     violations = list()
     for resource, load in constraints._load_constraints.items():
+        if not _has_event_models(resource):
+            continue
         if resource.load() > load:
             violations.append(resource)
     return violations
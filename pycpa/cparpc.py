@@ -19,9 +19,18 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import division
 
+import collections
+import copy
+import itertools
+import json
+import time
 import traceback
 
+# CPARPC is a twisted resource, hence twisted cannot be imported lazily here.
+# No other pycpa module imports cparpc (see test/test_import_time.py).
 from twisted.web import xmlrpc
+from twisted.internet import defer
+from twisted.internet import threads
 
 try:
     import cPickle as pickle
@@ -35,15 +44,17 @@ except ImportError:
 
 from pycpa import model
 from pycpa import schedulers
+from pycpa import junctions
 from pycpa import analysis
 from pycpa import path_analysis
 from pycpa import graph
+from pycpa import snapshot
 
 import logging
 
 logger = logging.getLogger("xmlrpc")
 
-PYCPA_XMLRPC_VERSION = 6
+PYCPA_XMLRPC_VERSION = 12
 
 GENERAL_ERROR = 1
 INVALID_SCHEDULER = 2
@@ -52,6 +63,62 @@ INVALID_EVENT_MODEL_DESC = 5
 INVALID_RESULTS = 7
 ILLEGAL_SYSTEM = 8
 NOT_SCHEDULABLE = 9
+JOB_PENDING = 10
+
+# attributes of analysis.TaskResult returned by get_task_result()
+RESULT_FIELDS = ['wcrt', 'bcrt', 'busy_times', 'max_backlog', 'q_wcrt', 'b_wcrt']
+
+# task attributes for which a larger value can only increase the results,
+# i.e. the previous results may be reused if they are increased.
+# Other attributes (e.g. a changed priority, which may decrease the
+# interference of some tasks) are re-analyzed from scratch.
+MONOTONE_TASK_ATTRIBUTES = ['wcet']
+
+
+class AnalysisJob(object):
+    """ An analysis of a system which runs in a worker thread.
+    Created by :func:`CPARPC.xmlrpc_submit_analysis`.
+    """
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, system):
+        # # name (required for the 'name' id type)
+        self.name = 'job'
+
+        # # system under analysis
+        self.system = system
+
+        # # one of RUNNING, DONE, FAILED
+        self.status = AnalysisJob.RUNNING
+
+        # # ID of the results object once the job is done
+        self.results_id = None
+
+        # # xmlrpc.Fault if the job failed
+        self.fault = None
+
+        # # deferreds of clients waiting for the result
+        self.waiting = list()
+
+    def result(self):
+        """ Returns the results id or raises the fault of a failed job """
+        if self.status == AnalysisJob.FAILED:
+            raise self.fault
+        return self.results_id
+
+    def finish(self, status, results_id=None, fault=None):
+        """ Store the outcome and notify all waiting clients """
+        self.status = status
+        self.results_id = results_id
+        self.fault = fault
+        waiting, self.waiting = self.waiting, list()
+        for d in waiting:
+            if status == AnalysisJob.FAILED:
+                d.errback(fault)
+            else:
+                d.callback(results_id)
 
 
 class CPARPC(xmlrpc.XMLRPC):
@@ -63,12 +130,48 @@ class CPARPC(xmlrpc.XMLRPC):
     and :py:mod:`pycpa.analysis` for information about the analysis.
 
     """
-    def __init__(self):
+    def __init__(self, results_memory_budget=None, results_ttl=None):
         xmlrpc.XMLRPC.__init__(self, allowNone=False, useDateTime=False)
 
         # dictionary to store all object references
         self._objects = dict()
 
+        # ids of the objects created from (and released with) each object
+        self._children = dict()
+
+        # id of the object from which each object was created
+        self._parents = dict()
+
+        # ids of the objects of each session
+        self._sessions = dict()
+        self._session_counter = itertools.count(1)
+
+        # results ids in least-recently-used order,
+        # each with its estimated size and time of last use
+        self._results_lru = collections.OrderedDict()
+
+        # sum of the estimated sizes of all results in _results_lru
+        self._results_size_total = 0
+
+        #: Estimated memory (in bytes) which all stored results may occupy.
+        #: Least-recently used results are evicted above this budget.
+        #: None means unlimited.
+        self.results_memory_budget = results_memory_budget
+
+        #: Time (in seconds) after which unused results are evicted.
+        #: None means unlimited.
+        self.results_ttl = results_ttl
+
+        # id of the most recent results of each system
+        self._last_results = dict()
+
+        # tasks of each system whose parameters were increased since its
+        # most recent analysis (None if the system requires a full re-analysis)
+        self._changes = dict()
+
+        # ids of the running analysis jobs of each system
+        self._running_jobs = dict()
+
         #: Specifies how unique IDs are generated
         self.id_type = 'id_numeric'
 
@@ -77,24 +180,36 @@ class CPARPC(xmlrpc.XMLRPC):
                 "spp" : schedulers.SPPScheduler
         }
 
+        #: Dictionary of junction strategy classes.
+        self.junction_strategies = {
+                "and" : junctions.ANDJoin,
+                "or" : junctions.ORJoin
+        }
+
         #: Prefix for function calls in debug output
         self.debug_prefix = 'proxy.'
 
-    def _unique(self, obj):
-        """ Returns a unique id for obj """
+    def _unique(self, obj, session_id=None):
+        """ Returns a unique id for obj.
+        If session_id is given, the id is prefixed by the session id.
+        """
+
+        prefix = ''
+        if session_id:
+            prefix = session_id + '.'
 
         if self.id_type == 'numeric':
             # Convert to string, because XML RPC does not support long ints
-            return str(id(obj))
+            return prefix + str(id(obj))
 
         if self.id_type == 'id_numeric':
-            return 'id_{}'.format(id(obj))
+            return prefix + 'id_{}'.format(id(obj))
 
         if isinstance(obj, dict):
             # results does not have a name property
-            uid = 'results'
+            uid = prefix + 'results'
         else:
-            uid = obj.name
+            uid = prefix + obj.name
 
         if self.id_type == 'full':
             #TODO: Prefix uid with full name
@@ -111,11 +226,174 @@ class CPARPC(xmlrpc.XMLRPC):
 
         return uid
 
+    def _register(self, obj, parent_id=None, session_id=None):
+        """ Store obj and return its id.
+        An object created from a parent object (e.g. a task from a resource)
+        belongs to the session of the parent and is released with it.
+        """
+        if parent_id is not None:
+            session_id = self._session_of(parent_id)
+        elif session_id and session_id not in self._sessions:
+            raise xmlrpc.Fault(INVALID_ID, "invalid session '{0}'"
+                               .format(session_id))
+
+        obj_id = self._unique(obj, session_id)
+        self._objects[obj_id] = obj
+        self._children[obj_id] = set()
+        if parent_id is not None:
+            self._parents[obj_id] = parent_id
+            self._children[parent_id].add(obj_id)
+        if session_id:
+            self._sessions[session_id].add(obj_id)
+        return obj_id
+
+    def _session_of(self, obj_id):
+        """ Returns the session id of an object id (None for no session) """
+        session_id = obj_id.split('.', 1)[0] if '.' in obj_id else None
+        if session_id in self._sessions and obj_id in self._sessions[session_id]:
+            return session_id
+        return None
+
+    def _release(self, obj_id):
+        """ Remove obj_id and all objects created from it """
+        if obj_id not in self._objects:
+            return
+        for child_id in list(self._children.pop(obj_id, ())):
+            self._release(child_id)
+
+        del self._objects[obj_id]
+        if obj_id in self._results_lru:
+            size, _ = self._results_lru.pop(obj_id)
+            self._results_size_total -= size
+        self._last_results.pop(obj_id, None)
+        self._changes.pop(obj_id, None)
+        self._running_jobs.pop(obj_id, None)
+
+        parent_id = self._parents.pop(obj_id, None)
+        if parent_id in self._children:
+            self._children[parent_id].discard(obj_id)
+
+        session_id = self._session_of(obj_id)
+        if session_id is not None:
+            self._sessions[session_id].discard(obj_id)
+
+    def _system_of(self, obj_id):
+        """ Returns the id of the system from which obj_id was created """
+        while obj_id in self._parents:
+            obj_id = self._parents[obj_id]
+        return obj_id
+
+    def _mark_changed(self, obj_id, tasks=None):
+        """ Record that the system of obj_id has been modified.
+        tasks are tasks whose parameters have only been increased
+        (see MONOTONE_TASK_ATTRIBUTES): the analysis may then continue
+        from the previous fixed point, as the results can only grow.
+        If tasks is None (e.g. the structure of the system has changed or
+        a parameter was decreased), the next analysis must start from
+        scratch, as it could otherwise converge to a larger fixed point
+        than the least one.
+        """
+        system_id = self._system_of(obj_id)
+        if system_id not in self._changes:
+            # system has not been analyzed yet
+            return
+        if tasks is None:
+            self._changes[system_id] = None
+        elif self._changes[system_id] is not None:
+            self._changes[system_id] |= set(tasks)
+
+    @staticmethod
+    def _is_increase(attribute, old_value, value):
+        """ True if setting a task attribute from old_value to value
+        can only increase the analysis results """
+        if attribute not in MONOTONE_TASK_ATTRIBUTES:
+            return False
+        try:
+            return old_value is not None and value >= old_value
+        except TypeError:
+            return False
+
+    @staticmethod
+    def _results_size(results):
+        """ Rough estimate of the memory (in bytes) occupied by a results dict """
+        size = 64
+        for r in results.values():
+            size += 512 + 8 * len(r.busy_times) + 128 * len(r.b_wcrt)
+        return size
+
+    @staticmethod
+    def _result_field(result, field):
+        """ Returns a field of a TaskResult in a marshallable form """
+        value = getattr(result, field)
+        if isinstance(value, analysis.BusyTimes):
+            return value.tolist()
+        if isinstance(value, analysis.BusyWindowDetails):
+            return value.to_strings()
+        return value
+
+    def _task_ids(self, system_id, results):
+        """ Returns the sorted (id, task) pairs of all tasks created
+        from system_id which are contained in results """
+        task_ids = list()
+        stack = [system_id]
+        while len(stack) > 0:
+            obj_id = stack.pop()
+            obj = self._objects[obj_id]
+            if isinstance(obj, model.Task) and obj in results:
+                task_ids.append((obj_id, obj))
+            stack.extend(self._children.get(obj_id, ()))
+        task_ids.sort(key=lambda x: x[0])
+        return task_ids
+
+    def _touch_results(self, results_id):
+        """ Mark results as recently used """
+        size, _ = self._results_lru.pop(results_id)
+        self._results_lru[results_id] = (size, time.time())
+
+    def _is_expired(self, results_id):
+        """ True if results have not been used within results_ttl """
+        _, last_used = self._results_lru[results_id]
+        return self.results_ttl is not None and \
+            last_used < time.time() - self.results_ttl
+
+    def _evict_results(self):
+        """ Evict expired results and least-recently used results
+        above the memory budget.
+        Called whenever results are stored.
+        """
+        while len(self._results_lru) > 0:
+            rid = next(iter(self._results_lru))
+            if not self._is_expired(rid):
+                break
+            logger.debug("evicting expired results {}".format(rid))
+            self._release(rid)
+
+        if self.results_memory_budget is not None:
+            while self._results_size_total > self.results_memory_budget and \
+                    len(self._results_lru) > 0:
+                rid = next(iter(self._results_lru))
+                logger.debug("evicting results {}".format(rid))
+                self._release(rid)
+
+    def _reparent(self, obj_id, parent_id):
+        """ Make obj_id an object created from parent_id,
+        i.e. obj_id is released together with parent_id """
+        old_parent_id = self._parents.get(obj_id, None)
+        if old_parent_id in self._children:
+            self._children[old_parent_id].discard(obj_id)
+        self._parents[obj_id] = parent_id
+        self._children[parent_id].add(obj_id)
 
     def _obj_from_id(self, identifier, check_type=None):
         """ Return a reference to the object with the supplied id.
         If check_type is not None, the object is checked to be of type check_type.
         """
+        if identifier in self._results_lru:
+            if self._is_expired(identifier):
+                logger.debug("evicting expired results {}".format(identifier))
+                self._release(identifier)
+            else:
+                self._touch_results(identifier)
         if identifier not in self._objects:
             raise xmlrpc.Fault(INVALID_ID, "invalid id '{0}'"
                                .format(identifier))
@@ -148,23 +426,72 @@ class CPARPC(xmlrpc.XMLRPC):
         return 0
 
 
-    def xmlrpc_new_system(self, name):
+    def xmlrpc_new_system(self, name, session_id=''):
         """ create new pycpa system and return it's id
 
         :param name: Name of the system.
         :type name: string
+        :param session_id: ID of the session to which the system belongs
+            (see :func:`xmlrpc_open_session`), empty for no session.
+        :type session_id: string
         :returns: ID of the created system
         :rtype: string
 
         """
         name = str(name)
         s = model.System(name)
-        sid = self._unique(s)
-        self._objects[sid] = s
+        sid = self._register(s, session_id=session_id)
         logger.debug("{} = {}new_system('{}')".format(sid, self.debug_prefix,
                                                       name))
         return sid
 
+    def xmlrpc_open_session(self):
+        """ Open a new session.
+        Systems can be created within a session (see :func:`xmlrpc_new_system`).
+        All objects created from these systems belong to the same session
+        and can be deleted at once with :func:`xmlrpc_close_session`
+        without affecting other clients.
+
+        :returns: ID of the session
+        :rtype: string
+        """
+        session_id = 'session_{}'.format(next(self._session_counter))
+        self._sessions[session_id] = set()
+        logger.debug("{} = {}open_session()".format(session_id, self.debug_prefix))
+        return session_id
+
+    def xmlrpc_close_session(self, session_id):
+        """ Delete all objects of a session and close it.
+
+        :param session_id: ID of the session
+        :type session_id: string
+        :returns: 0
+        """
+        if session_id not in self._sessions:
+            raise xmlrpc.Fault(INVALID_ID, "invalid session '{0}'"
+                               .format(session_id))
+        for obj_id in list(self._sessions[session_id]):
+            self._release(obj_id)
+        del self._sessions[session_id]
+        logger.debug("{}close_session({})".format(self.debug_prefix, session_id))
+        return 0
+
+    def xmlrpc_release(self, obj_id):
+        """ Delete the server-side reference to an object
+        and to all objects created from it,
+        e.g. releasing a system releases its resources, tasks, paths and results.
+        Released tasks, resources or paths are still part of their system
+        unless the system itself is released.
+
+        :param obj_id: ID of the object
+        :type obj_id: string
+        :returns: 0
+        """
+        self._obj_from_id(obj_id)
+        self._release(obj_id)
+        logger.debug("{}release({})".format(self.debug_prefix, obj_id))
+        return 0
+
     def xmlrpc_protocol(self):
         """
         :returns: protocol version
@@ -175,10 +502,21 @@ class CPARPC(xmlrpc.XMLRPC):
 
     def xmlrpc_clear_models(self):
         """ Delete all models, i.e. all systems, resources, tasks, results etc.
+        This affects all clients, use :func:`xmlrpc_close_session`
+        to delete the models of a single session.
 
         :returns: 0
         """
         self._objects.clear()
+        self._children.clear()
+        self._parents.clear()
+        self._results_lru.clear()
+        self._results_size_total = 0
+        self._last_results.clear()
+        self._changes.clear()
+        self._running_jobs.clear()
+        for objects in self._sessions.values():
+            objects.clear()
         logger.debug("{}clear_models()".format(self.debug_prefix))
         return 0
 
@@ -193,11 +531,11 @@ class CPARPC(xmlrpc.XMLRPC):
         :rtype: string
         """
         system = self._obj_from_id(system_id, model.System)
+        self._check_modifiable(system_id)
         name = str(name)
         r = model.Resource(name)
         system.bind_resource(r)
-        rid = self._unique(r)
-        self._objects[rid] = r
+        rid = self._register(r, parent_id=system_id)
         logger.debug("{} = {}new_resource({}, '{}')"
                      .format(rid, self.debug_prefix, system_id, name))
 
@@ -217,6 +555,7 @@ class CPARPC(xmlrpc.XMLRPC):
         """
         scheduler_string = str(scheduler_string)
         resource = self._obj_from_id(resource_id, model.Resource)
+        self._check_modifiable(resource_id)
         scheduler = self.scheduling_policies.get(scheduler_string, None)
         if scheduler is None:
             logger.error("invalid scheduler %s selected", scheduler_string)
@@ -224,6 +563,7 @@ class CPARPC(xmlrpc.XMLRPC):
         logger.debug("{}assign_scheduler({}, '{}')"
                      .format(self.debug_prefix, resource_id, scheduler_string))
         resource.scheduler = scheduler()
+        self._mark_changed(resource_id)
         return 0
 
     def xmlrpc_get_valid_schedulers(self):
@@ -260,7 +600,21 @@ class CPARPC(xmlrpc.XMLRPC):
             raise xmlrpc.Fault(GENERAL_ERROR,
                                'private attributes can not be set')
         obj = self._obj_from_id(obj_id)
+        self._check_modifiable(obj_id)
+        old_value = getattr(obj, attribute, None)
+        unchanged = hasattr(obj, attribute) and \
+            type(old_value) == type(value) and old_value == value
         setattr(obj, attribute, value)
+
+        if unchanged:
+            # the previous results remain valid
+            pass
+        elif isinstance(obj, model.Task) and \
+                self._is_increase(attribute, old_value, value):
+            self._mark_changed(obj_id, [obj])
+        elif not isinstance(obj, (model.Path, AnalysisJob, dict)):
+            # path attributes only affect the path analysis
+            self._mark_changed(obj_id)
         logger.debug("{}set_attribute({}, '{}', {})"
                      .format(self.debug_prefix, obj_id, attribute, value))
         return 0
@@ -276,7 +630,7 @@ class CPARPC(xmlrpc.XMLRPC):
         :returns: Value of the attribute
         :rtype: Depends on attribute.
         """
-        return getattr(self._objects[obj_id], attribute)
+        return getattr(self._obj_from_id(obj_id), attribute)
 
 
     def xmlrpc_tasks_by_name(self, system_id, name):
@@ -303,9 +657,10 @@ class CPARPC(xmlrpc.XMLRPC):
         :rtype: string
         """
         resource = self._obj_from_id(resource_id, model.Resource)
+        self._check_modifiable(resource_id)
         task = model.Task(str(name))
-        task_id = self._unique(task)
-        self._objects[task_id] = task
+        task_id = self._register(task, parent_id=resource_id)
+        self._mark_changed(task_id)
         resource.bind_task(task)
         logger.debug("{} = {}new_task({}, '{}')"
                      .format(task_id, self.debug_prefix, resource_id, name))
@@ -313,8 +668,39 @@ class CPARPC(xmlrpc.XMLRPC):
             self.xmlrpc_set_attribute(task_id, k, v)
         return task_id
 
+    def xmlrpc_new_junction(self, system_id, name, strategy_string):
+        """ Create a new junction with name and bind it to a system.
+        Junctions are linked to tasks with :func:`xmlrpc_link_task`.
+
+        :param system_id: ID of the system
+        :type system_id: string
+        :param name: Name of the junction.
+        :type name: string
+        :param strategy_string: 'and' or 'or'
+        :type strategy_string: string
+        :returns: ID of the created junction
+        :rtype: string
+        """
+        system = self._obj_from_id(system_id, model.System)
+        self._check_modifiable(system_id)
+        name = str(name)
+        strategy_string = str(strategy_string)
+        strategy = self.junction_strategies.get(strategy_string, None)
+        if strategy is None:
+            raise xmlrpc.Fault(GENERAL_ERROR, "invalid junction strategy '%s'"
+                               % strategy_string)
+        j = model.Junction(name, strategy())
+        system.bind_junction(j)
+        jid = self._register(j, parent_id=system_id)
+        self._mark_changed(system_id)
+        logger.debug("{} = {}new_junction({}, '{}', '{}')"
+                     .format(jid, self.debug_prefix, system_id, name,
+                             strategy_string))
+        return jid
+
     def xmlrpc_link_task(self, task_id, target_id):
         """ Make task with target_id dependent of the task with task_id.
+        Both may also be junctions (see :func:`xmlrpc_new_junction`).
 
         :param task_id: ID of the task that activates the target task
         :type task_id: string
@@ -323,9 +709,12 @@ class CPARPC(xmlrpc.XMLRPC):
         :returns: 0
 
         """
-        task = self._obj_from_id(task_id, model.Task)
-        target = self._obj_from_id(target_id, model.Task)
+        task = self._obj_from_id(task_id, (model.Task, model.Junction))
+        target = self._obj_from_id(target_id, (model.Task, model.Junction))
+        self._check_modifiable(task_id)
+        self._check_modifiable(target_id)
         task.link_dependent_task(target)
+        self._mark_changed(task_id)
         logger.debug("{}link_task({}, {})"
                      .format(self.debug_prefix, task_id, target_id))
         return 0
@@ -343,6 +732,7 @@ class CPARPC(xmlrpc.XMLRPC):
         :rtype: string
         """
         system = self._obj_from_id(system_id, model.System)
+        self._check_modifiable(system_id)
 
         tasks = []
         for t_id in task_ids:
@@ -352,8 +742,7 @@ class CPARPC(xmlrpc.XMLRPC):
         p = model.Path(name, tasks)
 
         system.bind_path(p)
-        pid = self._unique(p)
-        self._objects[pid] = p
+        pid = self._register(p, parent_id=system_id)
         logger.debug("{} = {}new_path({}, '{}', [{}])"
                      .format(pid, self.debug_prefix,
                              system_id, name, ", ".join(task_ids)))
@@ -376,6 +765,7 @@ class CPARPC(xmlrpc.XMLRPC):
 
         """
         task = self._obj_from_id(task_id, model.Task)
+        self._check_modifiable(task_id)
         em = None
         try:
             em = model.PJdEventModel(int(period), int(jitter), int(min_dist))
@@ -383,6 +773,7 @@ class CPARPC(xmlrpc.XMLRPC):
             raise xmlrpc.Fault(INVALID_EVENT_MODEL_DESC,
                                "invalid event model parametrization")
         task.in_event_model = em
+        self._mark_changed(task_id)
 
         # casting to int in debug output so that it matches what our code
         # actually does to the input
@@ -409,6 +800,7 @@ class CPARPC(xmlrpc.XMLRPC):
 
         """
         task = self._obj_from_id(task_id, model.Task)
+        self._check_modifiable(task_id)
         em = None
         try:
             em = model.CTEventModel(int(c), int(T), int(min_dist))
@@ -416,10 +808,134 @@ class CPARPC(xmlrpc.XMLRPC):
             raise xmlrpc.Fault(INVALID_EVENT_MODEL_DESC,
                                "invalid event model parametrization")
         task.in_event_model = em
+        self._mark_changed(task_id)
         logger.debug("{}assign_ct_event_model({}, {}, {}, {})".
                      format(self.debug_prefix, task_id, c, T, min_dist))
         return 0
 
+    def _assign_event_model(self, task_id, em_desc):
+        """ Assign an event model given as a struct (see :func:`xmlrpc_load_system`) """
+        em_type = em_desc.get('type', 'pjd')
+        try:
+            if em_type == 'pjd':
+                return self.xmlrpc_assign_pjd_event_model(task_id,
+                        em_desc['P'], em_desc.get('J', 0), em_desc.get('dmin', 0))
+            elif em_type == 'ct':
+                return self.xmlrpc_assign_ct_event_model(task_id,
+                        em_desc['c'], em_desc['T'], em_desc.get('dmin', 1))
+        except KeyError as e:
+            raise xmlrpc.Fault(INVALID_EVENT_MODEL_DESC,
+                               "missing event model parameter %s" % e)
+        raise xmlrpc.Fault(INVALID_EVENT_MODEL_DESC,
+                           "invalid event model type '%s'" % em_type)
+
+    def xmlrpc_load_system(self, system_desc, session_id=''):
+        """ Create a complete system from a single (nested) struct.
+        This replaces the individual calls to
+        :func:`xmlrpc_new_system`, :func:`xmlrpc_new_resource`,
+        :func:`xmlrpc_assign_scheduler`, :func:`xmlrpc_new_task`,
+        :func:`xmlrpc_assign_pjd_event_model`, :func:`xmlrpc_new_junction`,
+        :func:`xmlrpc_link_task` and :func:`xmlrpc_new_path`.
+        The struct has the following form
+        (all entries except names are optional)::
+
+            {'name': 'system',
+             'resources': [
+                {'name': 'r1', 'scheduler': 'spp', 'attributes': {},
+                 'tasks': [
+                    {'name': 't11', 'key': 't11',
+                     'attributes': {'wcet': 10, 'bcet': 5,
+                                    'scheduling_parameter': 1},
+                     'event_model': {'type': 'pjd', 'P': 30, 'J': 5, 'dmin': 0}},
+                    ...]},
+                ...],
+             'junctions': [{'name': 'j1', 'key': 'j1', 'strategy': 'or'}, ...],
+             'links': [['t11', 't21'], ['t12', 'j1'], ['j1', 't22'], ...],
+             'paths': [{'name': 'p1', 'tasks': ['t11', 't21'], 'attributes': {}}]}
+
+        Tasks and junctions are referenced in links and paths by their key,
+        which defaults to the name and must be unique.
+        Event models are of type 'pjd' (P, J, dmin) or 'ct' (c, T, dmin).
+        If anything goes wrong, all objects created so far are discarded.
+
+        :param system_desc: description of the system
+        :type system_desc: struct or JSON string
+        :param session_id: ID of the session to which the system belongs,
+            empty for no session.
+        :type session_id: string
+        :returns: ids of the created objects in the form
+            {'system': id, 'resources': {name: id},
+            'tasks': {key: id}, 'junctions': {key: id}, 'paths': {name: id}}
+        :rtype: struct
+        """
+        if not isinstance(system_desc, dict):
+            try:
+                system_desc = json.loads(system_desc)
+            except ValueError as e:
+                raise xmlrpc.Fault(GENERAL_ERROR, "invalid system description: %s" % e)
+
+        sid = self.xmlrpc_new_system(system_desc.get('name', ''), session_id)
+        try:
+            return self._load_system(sid, system_desc)
+        except Exception as e:
+            # discard the partially created system
+            self._release(sid)
+            if isinstance(e, xmlrpc.Fault):
+                raise
+            raise xmlrpc.Fault(GENERAL_ERROR, "invalid system description: %r" % e)
+
+    def _load_system(self, sid, system_desc):
+        """ Helper for :func:`xmlrpc_load_system` """
+        id_map = {'system': sid, 'resources': dict(), 'tasks': dict(),
+                  'junctions': dict(), 'paths': dict()}
+
+        for r_desc in system_desc.get('resources', []):
+            rid = self.xmlrpc_new_resource(sid, r_desc['name'],
+                                           r_desc.get('attributes', {}))
+            id_map['resources'][r_desc['name']] = rid
+            if 'scheduler' in r_desc:
+                self.xmlrpc_assign_scheduler(rid, r_desc['scheduler'])
+
+            for t_desc in r_desc.get('tasks', []):
+                key = t_desc.get('key', t_desc['name'])
+                if key in id_map['tasks']:
+                    raise xmlrpc.Fault(GENERAL_ERROR,
+                                       "duplicate task key '%s'" % key)
+                tid = self.xmlrpc_new_task(rid, t_desc['name'],
+                                           t_desc.get('attributes', {}))
+                id_map['tasks'][key] = tid
+                if 'event_model' in t_desc:
+                    self._assign_event_model(tid, t_desc['event_model'])
+
+        for j_desc in system_desc.get('junctions', []):
+            key = j_desc.get('key', j_desc['name'])
+            if key in id_map['tasks'] or key in id_map['junctions']:
+                raise xmlrpc.Fault(GENERAL_ERROR,
+                                   "duplicate junction key '%s'" % key)
+            id_map['junctions'][key] = self.xmlrpc_new_junction(
+                sid, j_desc['name'], j_desc.get('strategy', 'or'))
+
+        def _task_id(key):
+            if key not in id_map['tasks']:
+                raise xmlrpc.Fault(INVALID_ID, "unknown task key '%s'" % key)
+            return id_map['tasks'][key]
+
+        def _element_id(key):
+            if key in id_map['junctions']:
+                return id_map['junctions'][key]
+            return _task_id(key)
+
+        for src, dst in system_desc.get('links', []):
+            self.xmlrpc_link_task(_element_id(src), _element_id(dst))
+
+        for p_desc in system_desc.get('paths', []):
+            pid = self.xmlrpc_new_path(sid, p_desc['name'],
+                                       [_task_id(k) for k in p_desc['tasks']],
+                                       p_desc.get('attributes', {}))
+            id_map['paths'][p_desc['name']] = pid
+
+        return id_map
+
     def xmlrpc_get_task_result(self, results_id, task_id):
         """ Obtain the analysis results for a task.
 
@@ -427,8 +943,9 @@ class CPARPC(xmlrpc.XMLRPC):
         :type task_id: string
         :param task_id: ID of the task
         :type task_id: string
-        :returns: a dictionary of results for task_id.
-        :rtype: :py:class:`pycpa.analysis.TaskResult`
+        :returns: a dictionary of results for task_id
+            with the attributes of :py:class:`pycpa.analysis.TaskResult`.
+        :rtype: struct
 
         """
         results = self._obj_from_id(results_id, dict)
@@ -436,7 +953,83 @@ class CPARPC(xmlrpc.XMLRPC):
         if task not in results:
             raise xmlrpc.Fault(INVALID_RESULTS, "no results for task")
 
-        return results[task]
+        return dict((f, self._result_field(results[task], f))
+                    for f in RESULT_FIELDS)
+
+    def xmlrpc_get_all_results(self, results_id, fields=None, path_ids=None,
+                               n_max=1, columnar=False):
+        """ Obtain the analysis results of all tasks and the latencies
+        of several paths with a single call.
+
+        Results of tasks are keyed by task id and contain the requested
+        attributes of :py:class:`pycpa.analysis.TaskResult`.
+        For each path, the best- and worst-case latencies for
+        n = 1..n_max events are returned.
+
+        In row format, the result is::
+
+            {'tasks': {task_id: {field: value}},
+             'paths': {path_id: [[bcl(1), wcl(1)], ..., [bcl(n_max), wcl(n_max)]]}}
+
+        In columnar format, each field is a list ordered like
+        the list of task ids, which avoids repeating the field names::
+
+            {'tasks': {'ids': [task_id, ...], field: [value, ...]},
+             'paths': {path_id: {'bcl': [...], 'wcl': [...]}}}
+
+        :param results_id: ID of the results
+        :type results_id: string
+        :param fields: result attributes to return,
+            default: wcrt, bcrt, max_backlog and q_wcrt
+        :type fields: list of strings
+        :param path_ids: IDs of the paths to compute latencies for
+        :type path_ids: list of strings
+        :param n_max: Maximum number of activations to obtain the latency for
+        :type n_max: integer
+        :param columnar: if True, return columns instead of one struct per task
+        :type columnar: boolean
+        :returns: results of all tasks and paths
+        :rtype: struct
+        """
+        results = self._obj_from_id(results_id, dict)
+        if not fields:
+            fields = ['wcrt', 'bcrt', 'max_backlog', 'q_wcrt']
+        fields = [str(f) for f in fields]
+        for f in fields:
+            if f not in RESULT_FIELDS:
+                raise xmlrpc.Fault(GENERAL_ERROR, "invalid result field '%s'" % f)
+
+        paths = [(pid, self._obj_from_id(pid, model.Path))
+                 for pid in (path_ids or [])]
+
+        # results are keyed by tasks, so we need the reverse id mapping
+        task_ids = self._task_ids(self._system_of(results_id), results)
+
+        if columnar:
+            tasks = {'ids': [oid for oid, _ in task_ids]}
+            for f in fields:
+                tasks[f] = [self._result_field(results[t], f)
+                            for _, t in task_ids]
+        else:
+            tasks = dict()
+            for oid, t in task_ids:
+                tasks[oid] = dict((f, self._result_field(results[t], f))
+                                  for f in fields)
+
+        latencies = dict()
+        for pid, path in paths:
+            curve = [path_analysis.end_to_end_latency(path, results, n)
+                     for n in range(1, n_max + 1)]
+            if columnar:
+                latencies[pid] = {'bcl': [l[0] for l in curve],
+                                  'wcl': [l[1] for l in curve]}
+            else:
+                latencies[pid] = [list(l) for l in curve]
+
+        logger.debug("{}get_all_results({}, {}, {}, {}, {})"
+                     .format(self.debug_prefix, results_id, fields,
+                             path_ids, n_max, columnar))
+        return {'tasks': tasks, 'paths': latencies}
 
     def xmlrpc_pickle_system(self, system_id):
         """ Pickle the pycpa system on the server-side
@@ -454,39 +1047,290 @@ class CPARPC(xmlrpc.XMLRPC):
                                "Error during pickle")
         return 0
 
+    def xmlrpc_save_snapshot(self, system_id, filename):
+        """ Store the system as a snapshot file on the server-side
+        (see :mod:`pycpa.snapshot`)
 
-    def xmlrpc_analyze_system(self, system_id):
-        """ Analyze system and return a result id.
-
-        :param system_id: ID of the system to analyze
+        :param system_id: ID of the system
         :type system_id: string
-        :returns: ID of a results object
-        :rtype: string
+        :param filename: name of the snapshot file
+        :type filename: string
+        :returns: 0 on sucess
         """
         system = self._obj_from_id(system_id, model.System)
+        try:
+            snapshot.dump(system, filename)
+        except (snapshot.SnapshotError, IOError) as e:
+            raise xmlrpc.Fault(GENERAL_ERROR, "cannot save snapshot: %s" % e)
+        return 0
+
+    def xmlrpc_load_snapshot(self, filename, session_id=''):
+        """ Create a system from a snapshot file on the server-side
+        (see :func:`xmlrpc_save_snapshot`).
 
-        results = None
+        :param filename: name of the snapshot file
+        :type filename: string
+        :param session_id: ID of the session to which the system belongs,
+            empty for no session.
+        :type session_id: string
+        :returns: ids of the created objects in the form
+            {'system': id, 'resources': {name: id},
+            'tasks': {name: id}, 'paths': {name: id}}
+        :rtype: struct
+        """
+        try:
+            system = snapshot.load(filename)
+        except (snapshot.SnapshotError, IOError) as e:
+            raise xmlrpc.Fault(GENERAL_ERROR, "cannot load snapshot: %s" % e)
+
+        sid = self._register(system, session_id=session_id)
+        id_map = {'system': sid, 'resources': dict(), 'tasks': dict(),
+                  'paths': dict()}
+        for r in sorted(system.resources, key=lambda r: str(r.name)):
+            rid = self._register(r, parent_id=sid)
+            id_map['resources'][r.name] = rid
+            for t in sorted(r.tasks, key=lambda t: str(t.name)):
+                id_map['tasks'][t.name] = self._register(t, parent_id=rid)
+        for p in sorted(system.paths, key=lambda p: str(p.name)):
+            id_map['paths'][p.name] = self._register(p, parent_id=sid)
+        logger.debug("{} = {}load_snapshot('{}')".format(sid, self.debug_prefix,
+                                                         filename))
+        return id_map
+
+
+    def _is_analyzing(self, system_id):
+        """ True if an analysis job of system_id is running """
+        return len(self._running_jobs.get(system_id, ())) > 0
+
+    def _check_modifiable(self, obj_id):
+        """ Raise a fault if the system of obj_id is being analyzed.
+        The analysis job reads the model at arbitrary points in time,
+        hence the model must not change until it has finished.
+        """
+        if self._is_analyzing(self._system_of(obj_id)):
+            raise xmlrpc.Fault(GENERAL_ERROR,
+                               "system is being analyzed and cannot be "
+                               "modified until the job has finished")
+
+    def _check_system(self, system, system_id):
+        """ Raise a fault if system cannot be analyzed. """
         for r in system.resources:
             if r.scheduler is None:
                 raise xmlrpc.Fault(ILLEGAL_SYSTEM,
                                    "component %s has no scheduler assigned"
                                    % r.name)
 
-        logger.debug("analyzing...")
+        if self._is_analyzing(system_id):
+            raise xmlrpc.Fault(GENERAL_ERROR,
+                               "system is already being analyzed")
+
+    def _plan_analysis(self, system_id):
+        """ Decide how to analyze a system based on the modifications
+        since its most recent analysis.
+        Returns a tuple (cached_id, task_results, dirty_tasks):
+        cached_id is the id of still valid results (or None),
+        task_results and dirty_tasks are passed to analysis.analyze_system.
+        """
+        rid = self._last_results.get(system_id, None)
+        changes = self._changes.get(system_id, None)
+
+        # changes during the upcoming analysis are recorded from now on
+        self._changes[system_id] = set()
+
+        if rid is None or rid not in self._objects or changes is None:
+            return None, None, None
+
+        if len(changes) == 0:
+            logger.debug("system {} unchanged, reusing {}".format(system_id, rid))
+            self._changes[system_id] = changes
+            return rid, None, None
+
+        # re-analyze the modified part, but keep the previous results intact
+        task_results = dict()
+        for t, r in self._objects[rid].items():
+            task_results[t] = copy.copy(r)
+            t.analysis_results = task_results[t]
+        return None, task_results, changes
+
+    def _analysis_done(self, system_id, results):
+        """ Store the results of a successful analysis and return their id """
+        rid = self._store_results(results, system_id)
+        self._last_results[system_id] = rid
+        return rid
+
+    def _analysis_failed(self, system_id):
+        """ The model state after a failed analysis is not reusable """
+        if system_id in self._changes:
+            self._changes[system_id] = None
+
+    def _analyze(self, system, task_results=None, dirty_tasks=None):
+        """ Analyze system and return a result id.
+        Converts analysis exceptions into faults.
+        """
         try:
-            results = analysis.analyze_system(system)
-            rid = self._unique(results)
-            self._objects[rid] = results
+            results = analysis.analyze_system(system, task_results,
+                                              dirty_tasks=dirty_tasks)
         except analysis.NotSchedulableException as e:
             raise xmlrpc.Fault(NOT_SCHEDULABLE, "not schedulable: %s" % (str(e)))
         except Exception as e:
             # Print the exception plus traceback to server
             traceback.print_exc()
             raise xmlrpc.Fault(GENERAL_ERROR, str(e))
+        return results
+
+    def _store_results(self, results, system_id):
+        """ Register a results dict and return its id.
+        Results are subject to eviction (see results_memory_budget).
+        """
+        rid = self._register(results, parent_id=system_id)
+        size = self._results_size(results)
+        self._results_lru[rid] = (size, time.time())
+        self._results_size_total += size
+        self._evict_results()
+        return rid
+
+    def xmlrpc_analyze_system(self, system_id):
+        """ Analyze system and return a result id.
+
+        If the system has not been modified since its last analysis,
+        the id of the previous results is returned.
+        If only the WCETs of some tasks have been increased,
+        only these tasks and the tasks affected by them are re-analyzed.
+        Any other modification leads to a full analysis.
+
+        The analysis blocks the server until it is finished.
+        Use :func:`xmlrpc_submit_analysis` for long-running analyses.
+
+        :param system_id: ID of the system to analyze
+        :type system_id: string
+        :returns: ID of a results object
+        :rtype: string
+        """
+        system = self._obj_from_id(system_id, model.System)
+        self._check_system(system, system_id)
+
+        rid, task_results, dirty_tasks = self._plan_analysis(system_id)
+        if rid is None:
+            logger.debug("analyzing...")
+            try:
+                results = self._analyze(system, task_results, dirty_tasks)
+            except xmlrpc.Fault:
+                self._analysis_failed(system_id)
+                raise
+            rid = self._analysis_done(system_id, results)
         logger.debug("{} = {}analyze_system({})".
                      format(rid, self.debug_prefix, system_id))
         return rid
 
+    def xmlrpc_submit_analysis(self, system_id):
+        """ Start the analysis of a system in a worker thread
+        and return immediately.
+        Other clients are served while the analysis is running.
+        Calls which modify the system (e.g. :func:`xmlrpc_set_attribute`)
+        are rejected with a fault until the job has finished.
+        Unmodified systems are not analyzed again
+        (see :func:`xmlrpc_analyze_system`).
+        Use :func:`xmlrpc_job_status` and :func:`xmlrpc_job_result`
+        to obtain the results id.
+        A successful job is released together with its results
+        (see results_memory_budget and results_ttl),
+        a failed job once its fault has been returned by
+        :func:`xmlrpc_job_result`.
+
+        :param system_id: ID of the system to analyze
+        :type system_id: string
+        :returns: ID of the analysis job
+        :rtype: string
+        """
+        system = self._obj_from_id(system_id, model.System)
+        self._check_system(system, system_id)
+
+        job = AnalysisJob(system)
+        job_id = self._register(job, parent_id=system_id)
+
+        rid, task_results, dirty_tasks = self._plan_analysis(system_id)
+        if rid is not None:
+            job.finish(AnalysisJob.DONE, results_id=rid)
+            self._reparent(job_id, rid)
+            logger.debug("{} = {}submit_analysis({})".
+                         format(job_id, self.debug_prefix, system_id))
+            return job_id
+
+        def _done(results):
+            self._running_jobs.get(system_id, set()).discard(job_id)
+            if system_id not in self._objects:
+                # system has been released in the meantime
+                return
+            rid = self._analysis_done(system_id, results)
+            if job_id in self._objects:
+                if rid in self._objects:
+                    self._reparent(job_id, rid)
+                else:
+                    # results have been evicted right away
+                    self._release(job_id)
+            job.finish(AnalysisJob.DONE, results_id=rid)
+            logger.debug("job {} done: {}".format(job_id, rid))
+
+        def _failed(failure):
+            if failure.check(xmlrpc.Fault):
+                fault = failure.value
+            else:
+                fault = xmlrpc.Fault(GENERAL_ERROR, str(failure.value))
+            self._running_jobs.get(system_id, set()).discard(job_id)
+            self._analysis_failed(system_id)
+            if len(job.waiting) > 0:
+                # the fault is returned to the waiting clients right away
+                self._release(job_id)
+            job.finish(AnalysisJob.FAILED, fault=fault)
+            logger.debug("job {} failed: {}".format(job_id, fault))
+
+        self._running_jobs.setdefault(system_id, set()).add(job_id)
+        d = threads.deferToThread(self._analyze, system, task_results, dirty_tasks)
+        d.addCallbacks(_done, _failed)
+
+        logger.debug("{} = {}submit_analysis({})".
+                     format(job_id, self.debug_prefix, system_id))
+        return job_id
+
+    def xmlrpc_job_status(self, job_id):
+        """ Return the status of an analysis job.
+
+        :param job_id: ID of the job
+        :type job_id: string
+        :returns: 'running', 'done' or 'failed'
+        :rtype: string
+        """
+        job = self._obj_from_id(job_id, AnalysisJob)
+        return job.status
+
+    def xmlrpc_job_result(self, job_id, wait=True):
+        """ Obtain the results id of an analysis job.
+        The results id can be used like the one returned by
+        :func:`xmlrpc_analyze_system`.
+        If the analysis failed, the fault of the analysis is raised
+        and the job is released.
+
+        :param job_id: ID of the job
+        :type job_id: string
+        :param wait: if True, the call returns when the job has finished,
+            otherwise a JOB_PENDING fault is raised for running jobs.
+        :type wait: boolean
+        :returns: ID of a results object
+        :rtype: string
+        """
+        job = self._obj_from_id(job_id, AnalysisJob)
+        if job.status == AnalysisJob.FAILED:
+            self._release(job_id)
+        if job.status != AnalysisJob.RUNNING:
+            return job.result()
+
+        if not wait:
+            raise xmlrpc.Fault(JOB_PENDING, "job is still running")
+
+        d = defer.Deferred()
+        job.waiting.append(d)
+        return d
+
     def xmlrpc_end_to_end_latency(self, path_id, results_id, n):
         """ Perform a path analysis to obtain the end-to-end latency.
         Requires that the system has been analyzed before
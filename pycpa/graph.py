@@ -19,9 +19,6 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import division
 
-import sys
-
-
 from . import model
 
 def get_junction_name(j):
@@ -32,55 +29,48 @@ def get_junction_name(j):
 
 class dotgraph(object):
     """ Minimalistic implementation of the pygraphviz API.
-    With this, you can write graphs to a file. """
+    With this, you can write graphs to a file.
 
-    def __init__(self, **kwargs):
-        self.dot_str = 'strict digraph {\n'
-        self.dot_str += 'graph' + self._str_attr(kwargs)
+    The DOT output is collected as a list of parts and joined
+    (or streamed to a file) only once, i.e. in linear time.
+    """
 
+    def __init__(self, **kwargs):
+        self.parts = ['strict digraph {\n', 'graph', self._str_attr(kwargs), ';\n']
         #[conpound=true, ordering=out, rankdir=LR, remincross=true\n'
-        self.dot_str += ';\n'
         self.node_strs = dict()
 
+    @property
+    def dot_str(self):
+        """ DOT output so far (without the closing brace) """
+        return ''.join(self.parts)
+
     def _str_attr(self, attr):
-        first = True
-        node_str = '['
-        for k,v in attr.items():
-            if first:
-                first = False
-            else:
-                node_str += ',\n'
-            node_str += '%s=\"%s\"' % (k,v)
-        node_str += ']'
-        return node_str
+        return '[' + ',\n'.join('%s=\"%s\"' % (k, v) for k, v in attr.items()) + ']'
 
     def add_subnode(self, name, **kwargs):
-        node_str = '"{name}"'.format(name=name)
-        node_str += self._str_attr(kwargs) + ';\n'
-        self.node_strs [name] = node_str
+        self.node_strs[name] = '"%s"%s;\n' % (name, self._str_attr(kwargs))
 
     def add_node(self, name, **kwargs):
         self.add_subnode(name, **kwargs)
-        self.dot_str += self.node_strs[name]
+        self.parts.append(self.node_strs[name])
 
     def add_subgraph(self, nodes, name):
-        subgraph_str = 'subgraph "{name}"'.format(name=name)
-        subgraph_str += '{\n'
+        self.parts.append('subgraph "%s"{\n' % name)
         for n in nodes:
-            subgraph_str += '  ' + self.node_strs[n] + '\n'
-
-        subgraph_str += '}\n'
-        self.dot_str += subgraph_str
+            self.parts.extend(('  ', self.node_strs[n], '\n'))
+        self.parts.append('}\n')
 
     def add_edge(self, n1, n2, **kwargs):
-        edge_str = '"{n1}" -> "{n2}"'.format(n1=n1, n2=n2)
-        edge_str += self._str_attr(kwargs) + ';\n'
-        self.dot_str += edge_str
+        self.parts.append('"%s" -> "%s"%s;\n' % (n1, n2, self._str_attr(kwargs)))
+
+    def _write_to(self, f):
+        f.writelines(self.parts)
+        f.write('}\n') # close graph
 
     def write(self, filename):
-        f = open(filename, 'w')
-        dot_str = self.dot_str + '}\n' # close graph
-        f.write(dot_str)
+        with open(filename, 'w') as f:
+            self._write_to(f)
 
     def has_node(self, name):
         return name in self.node_strs
@@ -97,19 +87,24 @@ class dotgraph(object):
         if format is None and path is not None:
             format=os.path.splitext(path)[-1].lower()[1:]
 
-        dot_str = '' + self.dot_str + '}\n' # close graph
         cmd = '{prog} -T{fmt} -o {path}'.format(prog=prog, fmt=format, path=path)
 
-        p = Popen(cmd, shell=True, stdin=PIPE, stdout=PIPE)
-        if sys.version_info[0] < 3:
-            p.communicate(input=dot_str)
-        else:
-            p.communicate(input=bytes(dot_str, 'utf-8'))
-
+        p = Popen(cmd, shell=True, stdin=PIPE, stdout=PIPE, bufsize=-1)
+        # stream the graph to the layout program
+        try:
+            for part in self.parts:
+                p.stdin.write(part.encode('utf-8'))
+            p.stdin.write(b'}\n') # close graph
+            p.stdin.close()
+        except (IOError, OSError):
+            # the layout program exited early (see its return code)
+            pass
+        p.stdout.read()
+        if p.wait() != 0:
+            raise IOError("'{}' failed with exit code {}".format(cmd, p.returncode))
 
     def string(self):
-        dot_str = self.dot_str + '}\n' # close graph
-        return dot_str
+        return self.dot_str + '}\n' # close graph
 
 
 def graph_system(s, filename=None, layout='dot',
@@ -120,7 +115,8 @@ def graph_system(s, filename=None, layout='dot',
                  show=False,
                  dotout=None,
                  use_pygraphviz=False,
-                 chains=list()
+                 chains=list(),
+                 max_cluster_size=None
                  ):
     """
     Return a graph of the system
@@ -137,6 +133,9 @@ def graph_system(s, filename=None, layout='dot',
     :param show: Show plot
     :type show: boolean
     :param dotout: If set, write a dot file to this filename
+    :param max_cluster_size: Level of detail for large systems: resources with more tasks
+        are drawn as a single node (with the number of tasks) instead of a cluster of tasks
+    :type max_cluster_size: integer or None
     :rtype: None
     """
 
@@ -158,12 +157,51 @@ def graph_system(s, filename=None, layout='dot',
     task_num = 0
     elen = 10
 
+    # node names of tasks in collapsed resources and of junctions
+    node_names = dict()
+    # collapsed resources and their edges (drawn only once)
+    collapsed_nodes = set()
+    collapsed_edges = set()
+
+    def node_name(t):
+        if t not in node_names:
+            if isinstance(t, model.Junction):
+                node_names[t] = get_junction_name(t)
+            else:
+                return t.name
+        return node_names[t]
+
+    def add_edge(src, dst, **kwargs):
+        if src in collapsed_nodes or dst in collapsed_nodes:
+            if src == dst or (src, dst) in collapsed_edges:
+                return
+            collapsed_edges.add((src, dst))
+        g.add_edge(src, dst, **kwargs)
+
+    def add_dependency_nodes(t):
+        if t.mutex is not None and not g.has_node(t.mutex.name):
+            g.add_node(t.mutex.name, color='#aaccaa', shape='hexagon')
+        for nt in t.next_tasks:
+            if isinstance(nt, model.Junction) and not g.has_node(node_name(nt)):
+                g.add_node(node_name(nt), label=nt.mode, shape='diamond')
+
     for r in s.resources:
         if len(r.tasks) == 0 and not empty_resources:
             continue  # dont plot resources without tasks
 
         if g.has_node(r.name):
             print("graph_system warning: duplicate resource %s", r.name)
+
+        if max_cluster_size is not None and len(r.tasks) > max_cluster_size:
+            g.add_node(r.name, label='%s\\n(%d tasks)' % (r.name, len(r.tasks)),
+                       color='#aaaacc', shape='box3d')
+            collapsed_nodes.add(r.name)
+            for t in r.tasks:
+                node_names[t] = r.name
+                add_dependency_nodes(t)
+            task_num += len(r.tasks)
+            continue
+
         g.add_subnode(r.name, color='#aaaacc', shape='none')
         res_tasks = [r.name]
         for t in r.tasks:
@@ -180,12 +218,7 @@ def graph_system(s, filename=None, layout='dot',
                 lab += ' param: %s' % (str(t.scheduling_parameter))
             g.add_subnode(t.name, label=str(lab))
             res_tasks.append(t.name)
-            if t.mutex is not None:
-                g.add_node(t.mutex.name, color='#aaccaa', shape='hexagon')
-            for nt in t.next_tasks:
-                if isinstance(nt, model.Junction):
-                    g.add_node(get_junction_name(nt), label=nt.mode, shape='diamond')
-
+            add_dependency_nodes(t)
 
         g.add_subgraph(res_tasks, str("cluster_" + r.name))
 
@@ -195,25 +228,28 @@ def graph_system(s, filename=None, layout='dot',
         for t in r.tasks:
             for nt in t.next_tasks:
                 if isinstance(nt, model.Junction):
-                    g.add_edge(t.name, get_junction_name(nt), len=elen)  # edge to junction
+                    add_edge(node_name(t), node_name(nt), len=elen)  # edge to junction
                     for jnt in nt.next_tasks:  # edges from junction
-                        g.add_edge(get_junction_name(nt), jnt.name, len=elen, constraint='True')
+                        add_edge(node_name(nt), node_name(jnt), len=elen, constraint='True')
                 else:
-                    g.add_edge(t.name, nt.name, len=elen, constraint='True')
+                    add_edge(node_name(t), node_name(nt), len=elen, constraint='True')
 
             if t.mutex is not None:
-                g.add_edge(t.name, t.mutex.name, color='#aaccaa', len=1)
+                add_edge(node_name(t), t.mutex.name, color='#aaccaa', len=1)
 
             if t.prev_task is None:
-                g.add_node(str(t.in_event_model), len=10 * elen,
-                           style='dashed')
-                g.add_edge(str(t.in_event_model), t.name, constraint='True',
-                           style='dashed')
+                em_name = str(t.in_event_model)
+                if not g.has_node(em_name):
+                    g.add_node(em_name, len=10 * elen,
+                               style='dashed')
+                add_edge(em_name, node_name(t), constraint='True',
+                         style='dashed')
 
     for c in chains:
         sequence = c.tasks
         for i in range(len(sequence)-1):
-            g.add_edge(sequence[i], sequence[i+1], len=elen, style='dotted', arrowhead='open', color='blue')
+            add_edge(node_name(sequence[i]), node_name(sequence[i+1]),
+                     len=elen, style='dotted', arrowhead='open', color='blue')
 
     if filename is not None:
         g.draw(filename, prog=layout)
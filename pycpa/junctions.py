@@ -63,9 +63,15 @@ class ORJoin(analysis.JunctionStrategy):
     def _filter_propagate_tasks(self, junction, propagate_tasks):
         # find potential functional cycles in the app-graph
         # propagate tasks are all previous input tasks without cycles
-        subgraph = util.breadth_first_search(junction)
+        task_graph = analysis.current_task_graph()
+        if task_graph is not None and junction in task_graph:
+            in_cycle = lambda prev: (prev in task_graph and
+                                      task_graph.is_reachable(junction, prev))
+        else:
+            subgraph = util.breadth_first_search(junction)
+            in_cycle = lambda prev: prev in subgraph
         for prev in junction.prev_tasks:
-            if prev in subgraph:
+            if in_cycle(prev):
                 logger.warning("Cutting functional cycle at join. PLEASE BE SURE THAT YOU KNOW WHAT YOU'RE DOING!")
                 propagate_tasks.remove(prev)
 
@@ -80,6 +86,14 @@ class ORJoin(analysis.JunctionStrategy):
                 return em
             
 
+def _max_rate(in_event_models):
+    """ Rate of an AND junction: the fastest input determines the output """
+    rates = [emif.rate() for emif in in_event_models]
+    if None in rates:
+        return None
+    return max(rates)
+
+
 class ANDJoin(analysis.JunctionStrategy):
     """ Compute output event models for an AND junction.
     This corresponds to Lemma 4.2 in [Jersak2005]_.
@@ -90,11 +104,14 @@ class ANDJoin(analysis.JunctionStrategy):
 
     def calculate_out_event_model(self, junction):
         assert len(junction.in_event_models) > 0
+        # bind the input event models of this run (see model.RunContext)
+        in_event_models = junction.in_event_models
         em = model.EventModel()
         em.deltamin_func = lambda n: (
-            min(emif.delta_min(n) for emif in junction.in_event_models.values()))
+            min(emif.delta_min(n) for emif in in_event_models.values()))
         em.deltaplus_func = lambda n: (
-            max(emif.delta_plus(n) for emif in junction.in_event_models.values()))
+            max(emif.delta_plus(n) for emif in in_event_models.values()))
+        em.rate = lambda: _max_rate(in_event_models.values())
         em.__description__ = "AND " + \
                 "".join([emif.__description__
                          for emif in junction.in_event_models.values()])
@@ -132,6 +149,8 @@ class OREventModel(model.EventModel):
         return sum([emif.eta_min(w) for emif in self.in_event_models])
 
     def eta_plus(self, w):
+        # not cached, i.e. calls are never answered from the cache
+        model.record_event_model_call(self, 'eta_plus', False)
         return sum([emif.eta_plus(w) for emif in self.in_event_models])
 
     def eta_min_closed(self, w):
@@ -140,5 +159,18 @@ class OREventModel(model.EventModel):
     def eta_plus_closed(self, w):
         return sum([emif.eta_plus_closed(w) for emif in self.in_event_models])
 
+    def eta_plus_linear(self, k):
+        bounds = [emif.eta_plus_linear(k) for emif in self.in_event_models]
+        if None in bounds:
+            return None
+        return (sum(a for a, _ in bounds), sum(r for _, r in bounds))
+
+    def rate(self):
+        """ Sum of the input rates """
+        rates = [emif.rate() for emif in self.in_event_models]
+        if None in rates:
+            return None
+        return sum(rates)
+
 
 # vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
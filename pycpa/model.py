@@ -27,6 +27,7 @@ from __future__ import division
 import math
 import logging
 import copy
+import threading
 import warnings
 
 from . import options
@@ -37,6 +38,125 @@ INFINITY = float('inf')
 logger = logging.getLogger(__name__)
 
 
+# run contexts of the current thread (see RunContext)
+_local = threading.local()
+# number of active run contexts in all threads
+_active_contexts = 0
+_contexts_lock = threading.Lock()
+
+_MISSING = object()
+
+
+class RunContext(object):
+    """ Mutable state of one analysis run.
+
+    While a RunContext is active in a thread (``with context:``
+    or analysis.analyze_system(..., context=context)), the analysis
+    state of the model elements is stored in the context instead of
+    the elements themselves. This is
+    the propagated event models (Task.in_event_model of tasks
+    activated by other tasks), Task.analysis_results,
+    Junction.in_event_models, Junction.out_event_model,
+    Junction.analysis_results and Fork.out_event_model.
+    Hence, one System is not changed by the analysis and can be
+    analyzed concurrently, e.g. in several threads with
+    different configurations, without copying it.
+
+    Propagated event models refer to the event models of their tasks
+    lazily. Thus, the context of a run must be active to evaluate them,
+    e.g. for a path analysis of its results.
+
+    As long as no context is active (in any thread), these attributes
+    are plain instance attributes, i.e. there is no overhead.
+    """
+
+    def __init__(self):
+        # attribute name -> element -> value
+        self.values = dict()
+
+    def __enter__(self):
+        global _active_contexts
+        with _contexts_lock:
+            if _active_contexts == 0:
+                _install_run_attributes()
+            _active_contexts += 1
+        if getattr(_local, 'contexts', None) is None:
+            _local.contexts = list()
+        _local.contexts.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active_contexts
+        _local.contexts.pop()
+        with _contexts_lock:
+            _active_contexts -= 1
+            if _active_contexts == 0:
+                _remove_run_attributes()
+        return False
+
+
+def current_run_context():
+    """ Returns the active RunContext of the current thread (or None) """
+    contexts = getattr(_local, 'contexts', None)
+    if contexts:
+        return contexts[-1]
+    return None
+
+
+def _run_attribute(name, default):
+    """ Returns a property for the per-run attribute name.
+    In a thread with an active RunContext, the value is stored in the
+    context, otherwise in the element itself.
+    default(element) is the initial value in a context.
+    """
+    def get(self):
+        context = current_run_context()
+        if context is None:
+            return self.__dict__.get(name)
+        values = context.values.setdefault(name, dict())
+        value = values.get(self, _MISSING)
+        if value is _MISSING:
+            value = values[self] = default(self)
+        return value
+
+    def set(self, value):
+        context = current_run_context()
+        if context is None:
+            self.__dict__[name] = value
+        else:
+            context.values.setdefault(name, dict())[self] = value
+            # elements created in a context are initialized
+            self.__dict__.setdefault(name, value)
+
+    return property(get, set)
+
+
+def _run_attributes():
+    """ Returns (class, attribute name, initial value in a context)
+    of the analysis state of the model classes """
+    return [(Task, 'in_event_model',
+             # event models of source tasks are part of the model
+             lambda t: t.__dict__.get('in_event_model')
+             if t.prev_task is None else None),
+            (Task, 'analysis_results', lambda t: None),
+            (Fork, 'out_event_model', lambda f: None),
+            (Junction, 'out_event_model', lambda j: None),
+            (Junction, 'in_event_models', lambda j: dict()),
+            (Junction, 'analysis_results', lambda j: dict())]
+
+
+def _install_run_attributes():
+    """ Redirects the analysis state to the active RunContext
+    (properties take precedence over instance attributes) """
+    for cls, name, default in _run_attributes():
+        setattr(cls, name, _run_attribute(name, default))
+
+
+def _remove_run_attributes():
+    for cls, name, _ in _run_attributes():
+        delattr(cls, name)
+
+
 def _warn_float(value, reason=""):
     """ Prints a warning with reason if value is float.
     """
@@ -89,6 +209,24 @@ class ConstraintsManager(object):
         self._load_constraints[resource] = load
 
 
+# number of instrumented analyses running in all threads
+# (see analysis.AnalysisStats), guarded by analysis._instrument_lock
+_instrumented_runs = 0
+
+
+def record_event_model_call(em, method, hit):
+    """ Called by EventModel.eta_plus() and delta_min() (and overrides
+    thereof) to count a call of method and whether it was answered
+    from the cache in the AnalysisStats of the current thread.
+    Does nothing (and is cheap) if no analysis is instrumented.
+    """
+    if _instrumented_runs == 0:
+        return
+    stats = getattr(_local, 'stats', None)
+    if stats is not None:
+        stats.event_model(em).record(method, hit)
+
+
 class EventModel (object):
     """ The event model describing the activation of tasks as described
     in [Jersak2005]_, [Richter2005]_, [Henia2005]_.
@@ -230,6 +368,8 @@ class EventModel (object):
             as defined in [Richter2005]_.
         """
         n = self.eta_plus_cache.get(w, None)
+        if _instrumented_runs:
+            record_event_model_call(self, 'eta_plus', n is not None)
         if n is not None:
             return n
 
@@ -420,6 +560,10 @@ class EventModel (object):
         if n < 2:
             return 0
 
+        if _instrumented_runs:
+            record_event_model_call(self, 'delta_min',
+                                    n in self.delta_min_cache)
+
         # # Caching is activated
         if self.en_caching == True:
             d = self.delta_min_cache.get(n, None)
@@ -454,10 +598,43 @@ class EventModel (object):
         return self.deltaplus_func(n)
 
 
+    def eta_plus_linear(self, k):
+        """ Linear upper bound of the eta-plus function
+            Returns (a, r) such that eta_plus(w) <= a + r * w for all w >= 0,
+            which is used to approximate eta_plus beyond k events
+            (see analysis.Scheduler.epsilon),
+            or None if there is no such bound.
+
+            This default implementation uses the subadditivity of eta_plus,
+            i.e. eta_plus(w) <= k * ceil(w / delta_min(k + 1)).
+            It overestimates by up to a factor of two
+            and should be overridden by event models with a known rate.
+        """
+        d = self.delta_min(k + 1)
+        if not d > 0 or d == INFINITY:
+            return None
+        return (k, float(k) / d)
+
+    def rate(self):
+        """ Long-term event rate, i.e. the limit of n / delta_min(n),
+            or an upper bound of it.
+            Returns None if the rate is not known analytically,
+            in which case load() samples delta_min.
+
+            Event models whose long-term behavior is known
+            (e.g. periodic models) should override this.
+        """
+        return None
+
     def load(self, accuracy=1000):
         """ Returns the asymptotic load,
-        i.e. the avg. number of events per time
+        i.e. the avg. number of events per time.
+        If the event model provides its rate(), accuracy is ignored.
+        Otherwise, the load is estimated from delta_min(accuracy).
         """
+        rate = self.rate()
+        if rate is not None:
+            return float(rate)
         # print "load = ", float(self.eta_plus(accuracy)),"/",accuracy
         # return float(self.eta_plus(accuracy)) / accuracy
         if self.delta_min(accuracy) == 0:
@@ -523,6 +700,21 @@ class PJdEventModel (EventModel):
     def deltamin_func(self, n):
         return max((n - 1) * self.dmin, (n - 1) * self.P - self.J)
 
+    def eta_plus_linear(self, k):
+        """ eta_plus(w) <= ceil((w + J) / P) < 1 + (w + J) / P,
+        i.e. the bound overestimates by less than one event
+        """
+        if not self.P > 0:
+            return EventModel.eta_plus_linear(self, k)
+        return (1 + float(self.J) / self.P, 1. / self.P)
+
+    def rate(self):
+        """ One event per max(P, dmin), independent of the jitter """
+        d = max(self.P, self.dmin)
+        if not d > 0:
+            return float('inf')
+        return 1. / d
+
 
 class CTEventModel (EventModel):
     """ c events every T time event model.
@@ -557,6 +749,12 @@ class CTEventModel (EventModel):
     def deltaplus_func(self, n):
         return INFINITY
 
+    def rate(self):
+        """ c events every T """
+        if self.c == 0 or self.T >= INFINITY:
+            return None
+        return float(self.c) / self.T
+
 
 class LimitedDeltaEventModel(EventModel):
     """ User supplied event model on a limited delta domain.
@@ -623,6 +821,21 @@ class LimitedDeltaEventModel(EventModel):
         else:
             return self.limited_delta_plus_func(n)
 
+    def rate(self):
+        """ Rate of the additive extension.
+        Beyond limit_q_min, delta_min grows by max_k(delta_min(k + 1) / k)
+        per event (i.e. the tail slope), so the rate is computed from
+        the limited domain only.
+        """
+        if self.limit_q_min == float('inf') or \
+                self.max_additive is not util.recursive_max_additive:
+            return None
+        slope = max(float(self.delta_min(k + 1)) / k
+                    for k in range(1, self.limit_q_min))
+        if not slope > 0:
+            return float('inf')
+        return 1. / slope
+
 
 
 
@@ -1192,6 +1405,60 @@ class System(object):
         # inside Path
         return path
 
+    def components(self):
+        """ Decomposes the system into independent components.
+        Tasks of different components are neither linked (directly or
+        via junctions) nor mapped to the same resource or mutex,
+        hence each component can be analyzed on its own.
+        Returns a list of sets of tasks and junctions, largest first.
+        """
+        parent = dict()
+
+        def find(e):
+            root = e
+            while parent[root] is not root:
+                root = parent[root]
+            while parent[e] is not root:  # path compression
+                parent[e], e = root, parent[e]
+            return root
+
+        def union(a, b):
+            ra, rb = find(a), find(b)
+            if ra is not rb:
+                parent[ra] = rb
+
+        elements = list()
+        for r in sorted(self.resources, key=lambda r: str(r.name)):
+            elements.extend(sorted(r.tasks, key=lambda t: str(t.name)))
+        elements.extend(sorted(self.junctions, key=lambda j: str(j.name)))
+        for e in elements:
+            parent[e] = e
+
+        # elements which are only reachable via links are appended
+        i = 0
+        while i < len(elements):
+            e = elements[i]
+            for n in e.next_tasks:
+                if n not in parent:
+                    parent[n] = n
+                    elements.append(n)
+                union(e, n)
+            i += 1
+
+        mutexes = dict()
+        for r in self.resources:
+            tasks = list(r.tasks)
+            for t in tasks[1:]:
+                union(tasks[0], t)
+            for t in tasks:
+                if t.mutex is not None:
+                    union(mutexes.setdefault(t.mutex, t), t)
+
+        components = dict()
+        for e in elements:
+            components.setdefault(find(e), set()).add(e)
+        return sorted(components.values(), key=len, reverse=True)
+
     def print_subgraphs(self):
         """ enumerate all subgraphs of the application graph.
         if a subgraph is not well-formed (e.g. a source is missing),
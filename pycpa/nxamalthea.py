@@ -1,11 +1,13 @@
 import xml.etree.ElementTree as ET
-import networkx as nx
 from . import util
 from . import model
 from . import schedulers
 
+import collections
 import csv
 
+nx = util.LazyModule('networkx', "networkx is required for the Amalthea parser")
+
 xsi='{http://www.w3.org/2001/XMLSchema-instance}'
 XSI_TYPE='{http://www.w3.org/2001/XMLSchema-instance}type'
 
@@ -19,18 +21,50 @@ LABEL = 'label'
 RESSOURCE = 'ressource'
 TYPE = 'TYPE'
 PRIO = 'scheduling_parameter'
+RUNNABLE_CALL = 'runnable_call'
 
+# top-level models of an Amalthea file used by the parser
+_MODELS = ('mappingModel', 'swModel', 'hwModel', 'stimuliModel', 'constraintsModel', 'osModel')
 
-class NxAmaltheaParser(object):
-    def __init__(self, xml_file, scale=1.0):
 
-        root = ET.parse(xml_file).getroot()
-        self.mappingModel= root.find('mappingModel')
-        self.sw_model = root.find('swModel')
-        self.hw_model = root.find('hwModel')
-        self.stim_model = root.find('stimuliModel')
-        self.constr_model = root.find('constraintsModel')
-        self.os_model = root.find('osModel')
+class NxAmaltheaParser(object):
+    def __init__(self, xml_file, scale=1.0, streaming=False):
+        """ Reads an Amalthea model.
+            All elements required by the parse_* methods are indexed once
+            (runnables, tasks, stimuli by name, schedulers and task allocations).
+            If streaming is True, the file is read with ET.iterparse and all
+            elements besides the indexed ones and the hwModel are discarded
+            while reading, i.e. the tree of the whole model is never built
+            (the *_model attributes besides hw_model are None).
+        """
+        # name -> runnable element
+        self.runnables = collections.OrderedDict()
+        # name -> task element
+        self.tasks = collections.OrderedDict()
+        # name -> stimulus element
+        self.stimuli = dict()
+        # label names defined in the swModel
+        self.label_names = list()
+        # taskScheduler elements
+        self.task_schedulers = list()
+        # taskAllocation elements
+        self.task_allocations = list()
+
+        if streaming:
+            self._iterparse(xml_file)
+        else:
+            root = ET.parse(xml_file).getroot()
+            self.mappingModel= root.find('mappingModel')
+            self.sw_model = root.find('swModel')
+            self.hw_model = root.find('hwModel')
+            self.stim_model = root.find('stimuliModel')
+            self.constr_model = root.find('constraintsModel')
+            self.os_model = root.find('osModel')
+
+            for model_element in (self.sw_model, self.stim_model, self.os_model, self.mappingModel):
+                if model_element is not None:
+                    for e in model_element:
+                        self._index(model_element.tag, e)
 
         self.time_base = util.ns
         self.scale = scale
@@ -38,13 +72,58 @@ class NxAmaltheaParser(object):
 
         self.G = nx.MultiDiGraph()
 
+    def _index(self, model_tag, e):
+        """ adds a child element of a top-level model to the indexes """
+        if model_tag == 'swModel':
+            if e.tag == 'runnables':
+                self.runnables[e.get('name')] = e
+            elif e.tag == 'tasks':
+                self.tasks[e.get('name')] = e
+            elif e.tag == 'labels':
+                self.label_names.append(e.get('name'))
+        elif model_tag == 'stimuliModel':
+            if e.tag == 'stimuli':
+                self.stimuli[e.get('name')] = e
+        elif model_tag == 'osModel':
+            if e.tag == 'operatingSystems':
+                self.task_schedulers.extend(e.iter('taskSchedulers'))
+        elif model_tag == 'mappingModel':
+            if e.tag == 'taskAllocation':
+                self.task_allocations.append(e)
+
+    def _iterparse(self, xml_file):
+        """ builds the indexes in a single pass over xml_file """
+        self.mappingModel = self.sw_model = self.stim_model = None
+        self.constr_model = self.os_model = self.hw_model = None
+
+        # only the indexed elements (and the hwModel) are kept
+        stack = list()
+        for event, e in ET.iterparse(xml_file, events=('start', 'end')):
+            if event == 'start':
+                stack.append(e)
+                continue
+
+            stack.pop()
+            depth = len(stack)
+            if depth == 2 and stack[1].tag in _MODELS:
+                if stack[1].tag == 'hwModel':
+                    # the (small) hwModel is kept as a whole
+                    continue
+                self._index(stack[1].tag, e)
+                if e.tag == 'labels':
+                    e.clear()
+                stack[-1].remove(e)
+            elif depth == 1:
+                if e.tag == 'hwModel':
+                    self.hw_model = e
+                stack[-1].remove(e)
+
     def clean_xml_string(self, s=None):
         #remove type substring from xml strings
         return s[:s.index('?')]
 
     def parse_runnables_and_labels_to_nx(self):
-        for r in self.sw_model.iter('runnables'):
-            r_name = r.get('name')
+        for r_name, r in self.runnables.items():
             bcet = int(float(r.find('runnableItems/default/deviation/lowerBound').get('value')) * float(self.time_per_instruction) * self.scale)
             wcet = int(float(r.find('runnableItems/default/deviation/upperBound').get('value')) * float(self.time_per_instruction) * self.scale)
 
@@ -69,10 +148,10 @@ class NxAmaltheaParser(object):
 
     def _number_of_labels_in_xml(self):
         n = 0 
-        for label in self.sw_model.iter('labels'):
+        for label_name in self.label_names:
             n = n + 1
-            if not self.G.has_node(label.get('name')):
-                print("%s not in the Graph" % label.get('name'))
+            if not self.G.has_node(label_name):
+                print("%s not in the Graph" % label_name)
         return n
 
 
@@ -82,10 +161,10 @@ class NxAmaltheaParser(object):
         s_param = dict()
         if stim_type == "Periodic":
             #returns a dict vwith value and unit as keys
-            s_param = stimulus.find('recurrence').attrib
+            s_param = dict(stimulus.find('recurrence').attrib)
         elif stim_type == "Sporadic":
-            s_param['lowerBound'] = stimulus.find('stimulusDeviation').find('lowerBound').attrib
-            s_param['upperBound'] = stimulus.find('stimulusDeviation').find('upperBound').attrib
+            s_param['lowerBound'] = dict(stimulus.find('stimulusDeviation').find('lowerBound').attrib)
+            s_param['upperBound'] = dict(stimulus.find('stimulusDeviation').find('upperBound').attrib)
         else:
             raise ValueError
         s_param['EMType'] = stim_type
@@ -93,14 +172,13 @@ class NxAmaltheaParser(object):
     
 
     def parse_tasks_and_cores_to_nx(self):
-        for t in self.sw_model.iter('tasks'):
-            t_name = t.get('name')
+        for t_name, t in self.tasks.items():
             t_prio = t.get('priority')
             # find event model
             stimulus_name = self.clean_xml_string(t.get('stimuli'))
-            for  stimulus in self.stim_model.iter('stimuli'):
-                if stimulus.get('name') == stimulus_name:
-                    stim_params = self._get_stimulus_params(stimulus)
+            if stimulus_name not in self.stimuli:
+                raise ValueError("stimulus %s of task %s not found" % (stimulus_name, t_name))
+            stim_params = self._get_stimulus_params(self.stimuli[stimulus_name])
             
             self.G.add_node(t_name, TYPE=TASK, event_model=stim_params, scheduling_parameter=t_prio)
 
@@ -121,12 +199,12 @@ class NxAmaltheaParser(object):
         #    self.G.add_node(c_name)
 
         #Get all the schedulers in the Model - typically one per core; shortcut for task allocation
-        for sched in self.os_model.find('operatingSystems').iter('taskSchedulers'):
+        for sched in self.task_schedulers:
             s_name = sched.get('name')
             _,sched_algo = sched.find('schedulingAlgorithm').get(XSI_TYPE).split(':')
             self.G.add_node(s_name, TYPE = RESSOURCE, schedulingAlgorithm = sched_algo)
 
-        for ta in self.mappingModel.iter('taskAllocation'):
+        for ta in self.task_allocations:
             task = self.clean_xml_string(ta.get('task'))
             sched = self.clean_xml_string(ta.get('scheduler'))
             self.G.add_edge(task,sched, TYPE=MAPPING)
@@ -137,9 +215,7 @@ class NxAmaltheaParser(object):
     def parse_runnable_sequence(self):
         # adds edges to the graph G that specify the sequence of runnables in a task
         # assumes that runnables and tasks are already parsed
-        for t in self.sw_model.iter('tasks'):
-            t_name = t.get('name')
-
+        for t_name, t in self.tasks.items():
             graphEntries = t.find('callGraph/graphEntries')
             prefix,tag =  graphEntries.get(XSI_TYPE).split(":")
             if tag == 'CallSequence':
@@ -176,16 +252,70 @@ class NxAmaltheaParser(object):
 class NxConverter(object):
     def __init__(self,G):
         """ This class manages the conversion of a networkx task/runnable system to a pyCPA system
+
+            The graph is indexed once (see _build_index()). The index is rebuilt
+            if G is replaced, if nodes or edges are added or removed and by
+            get_cpa_sys() and write_to_csv(). If only attributes of nodes are
+            changed in place, call clear_index() before using the other methods.
         """
-        self.G = G
         self.cpa_base = util.ns
+        self.G = G
+
+    @property
+    def G(self):
+        return self._G
+
+    @G.setter
+    def G(self, G):
+        self._G = G
+        self.clear_index()
+
+    def clear_index(self):
+        """ Discards the index, i.e. it is rebuilt on next use """
+        # indexes built by _build_index()
+        self._nodes = None
+        self._reverse_prios = None
+        self._execution_times = None
+        # number of nodes and edges of the indexed graph
+        self._indexed_size = None
+
+    def _graph_size(self):
+        return self.G.number_of_nodes(), self.G.number_of_edges()
+
+    def _build_index(self):
+        """ Indexes the graph in a single pass over its nodes and edges:
+            node data by name, reversed priorities and the WCET/BCET of each task
+            (sum over the runnables mapped to it).
+        """
+        self._indexed_size = self._graph_size()
+        self._nodes = dict(self.G.nodes(data=True))
+
+        # pyCPA starts with 1 as the highest one; amalthe does it the other way around (like OSEK)
+        name_list = [n for n, d in self._nodes.items() if d[TYPE] == TASK]
+        prio_list = [self._nodes[n][PRIO] for n in name_list]
+        prio_list.reverse()
+        self._reverse_prios = dict(zip(name_list, prio_list))
+
+        self._execution_times = dict((n, [0, 0]) for n in name_list)
+        for u, v, d in self.G.edges(data=True):
+            if d[TYPE] == MAPPING and self._nodes[u][TYPE] == TASK \
+                    and self._nodes[v][TYPE] == RUNNABLE:
+                times = self._execution_times[u]
+                times[0] += int(self._nodes[v]['wcet'])
+                times[1] += int(self._nodes[v]['bcet'])
+
+    def _index(self):
+        if self._nodes is None or self._indexed_size != self._graph_size():
+            self._build_index()
+        return self._nodes
 
     def get_cpa_sys(self, reverse_prios=True):
        """ returns a pyCPA system based on the stored networkx graph
             reversing prios ensures that Amalthea Models parsed to nx are compatible with pyCPA
        """
+       self._build_index()
        s = model.System()
-       for n,d in self.G.nodes(data=True):
+       for n,d in self._nodes.items():
            if d['TYPE'] == RESSOURCE:
                #for the time being we only support SPP
                #r = s.bind_resource(model.Resource(self.G.node[n], schedulers.SPPScheduler()))
@@ -194,7 +324,7 @@ class NxConverter(object):
                for u,v,d_edge in self.G.out_edges(n,data=True):
                    if d_edge[TYPE] == MAPPING:
                        #v is a task
-                       assert (self.G.node[v][TYPE] == TASK )
+                       assert (self._nodes[v][TYPE] == TASK )
                        task_params = self.get_task_params(v,reverse_prios)
                        t = r.bind_task(model.Task(name=v, **task_params))
                        t.in_event_model = self.construct_event_model(v)
@@ -203,40 +333,28 @@ class NxConverter(object):
     def get_task_params(self,t,reverse_prios=True):
         """ returns dict with wcet, bcet, scheduling_parameter
         """
+        nodes = self._index()
         t_params = dict()
-        t_params['wcet'] = 0
-        t_params['bcet'] = 0
+        t_params['wcet'], t_params['bcet'] = self._execution_times[t]
         # pyCPA starts with 1 as the highest one; amalthe does it the other way around (like OSEK)
         if reverse_prios == True:
             t_params['scheduling_parameter'] = self.get_reverse_prio(t)
         else:
-            t_params['scheduling_parameter'] = self.G.node[t]['scheduling_parameter']
-
-        #Filter out a subgraph that only contains runnables, tasks and mapping edges
-        tasks_runnables = [ n for n,d in self.G.nodes(data=True) if (d[TYPE] ==
-            RUNNABLE or d[TYPE] == TASK)]
-        H = self.G.subgraph( tasks_runnables )
-        #Iterate over the runnables and compute WCET/BCET as a sum over the neigbors!
-        for u,v,d in H.out_edges(t,data=True):
-            if (d[TYPE] == MAPPING and self.G.node[v][TYPE] == RUNNABLE):
-                #print(u,v,d)
-                t_params['wcet'] = int(self.G.node[v]['wcet']) + int(t_params['wcet'])
-                t_params['bcet'] = int(self.G.node[v]['bcet']) + int(t_params['bcet'])
-
-        #print(t_params)
+            t_params['scheduling_parameter'] = nodes[t]['scheduling_parameter']
+
         return t_params
 
     def construct_event_model(self, task=None):
         #TODO: In principle we would have to check whether the task in fact has an event model
         # or whether it is activated by another task; in that case the dict key event_model must not
         # exist
-        if self.G.node[task]['event_model']['EMType'] == 'Periodic':
-            s_param = self.G.node[task]['event_model']
+        if self._index()[task]['event_model']['EMType'] == 'Periodic':
+            s_param = self._index()[task]['event_model']
             P = util.time_to_time( int(s_param['value']) , base_in=util.str_to_time_base(s_param['unit']), base_out=self.cpa_base)
             return model.PJdEventModel(P=P, J=0)
 
-        elif self.G.node[task]['event_model']['EMType'] == 'Sporadic':
-            s_param = self.G.node[task]['event_model']['lowerBound']
+        elif self._index()[task]['event_model']['EMType'] == 'Sporadic':
+            s_param = self._index()[task]['event_model']['lowerBound']
             P = util.time_to_time( int(s_param['value']) , base_in=util.str_to_time_base(s_param['unit']), base_out=self.cpa_base)
             return model.PJdEventModel(P=P, J=0)
         else:
@@ -244,34 +362,23 @@ class NxConverter(object):
 
     def get_reverse_prio(self, task):
         # in pyCPA 1 is the highest priority - Amalthea sorts the other way, i.e. 1 is the lowest
-        # in principle this can be cached!
-        prio_list = list()
-        name_list = list()
-        for n,d in self.G.nodes(data=True):
-            if d[TYPE] == TASK:
-                name_list.append(n)
-                prio_list.append(d[PRIO])
-        prio_list.reverse()
-        prio_cache = dict()
-        for i in range(len(name_list)):
-            prio_cache[name_list[i]] = prio_list[i]
-
-        return prio_cache[task]
+        self._index()
+        return self._reverse_prios[task]
 
     def _get_event_model_params(self, task=None):
         """ Instead of return a cpa event model just return the parameters
             WARNING: Only returns periods at the moment
         """
-        if self.G.node[task]['event_model']['EMType'] == 'Periodic':
-            s_param = self.G.node[task]['event_model']
+        if self._index()[task]['event_model']['EMType'] == 'Periodic':
+            s_param = self._index()[task]['event_model']
             P = util.time_to_time( int(s_param['value']) , base_in=util.str_to_time_base(s_param['unit']), base_out=self.cpa_base)
             return (P,0)
 
-        elif self.G.node[task]['event_model']['EMType'] == 'Sporadic':
-            lB = self.G.node[task]['event_model']['lowerBound']
-            uB = self.G.node[task]['event_model']['upperBound']
+        elif self._index()[task]['event_model']['EMType'] == 'Sporadic':
+            lB = self._index()[task]['event_model']['lowerBound']
+            uB = self._index()[task]['event_model']['upperBound']
             #TODO!
-            s_param = self.G.node[task]['event_model']['lowerBound']
+            s_param = self._index()[task]['event_model']['lowerBound']
             P = util.time_to_time( int(s_param['value']) , base_in=util.str_to_time_base(s_param['unit']), base_out=self.cpa_base)
             return (P,0)
         else:
@@ -280,18 +387,19 @@ class NxConverter(object):
     def write_to_csv(self,filename, reverse_prios=True):
         """ WARNING: Forces P,J as Event Model Parameters! """
 
+        self._build_index()
         with open(filename, 'w') as csvfile:
            fieldnames = ['task_name', 'resource', 'bcet', 'wcet', 'scheduling_parameter', 'period' , 'jitter']
            writer = csv.DictWriter(csvfile, fieldnames = fieldnames)
            writer.writeheader()
 
-           for n,d in self.G.nodes(data=True):
+           for n,d in self._nodes.items():
                if d['TYPE'] == RESSOURCE:
                    # get the neigbors of n that have a MAPPING to a task
                    for u,v,d_edge in self.G.out_edges(n,data=True):
                        if d_edge[TYPE] == MAPPING:
                            #v is a task (i.e. the name)
-                           assert (self.G.node[v][TYPE] == TASK )
+                           assert (self._nodes[v][TYPE] == TASK )
                            task_params = self.get_task_params(v,reverse_prios)
                            task_params['task_name'] = v
                            task_params['resource'] = n 
@@ -29,9 +29,10 @@ MAX_ERRORS = 10
 INFINITY = float('inf')
 TIMEOUT = INFINITY
 
-import argparse
+import contextlib
 import logging
 import sys
+import threading
 
 from . import __license_text__, __version__
 
@@ -42,30 +43,83 @@ propagation_methods = sorted([b'jitter_offset',
                        b'jitter_bmin',
                        b'optimal'])
 
-parser = argparse.ArgumentParser(description='Scheduling Analysis', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-parser.add_argument('--max_iterations', type=int,
-                    default=MAX_ITERATIONS,
-                    help='Maximum number of iterations in a local analysis (default=%d)' % (MAX_ITERATIONS))
-parser.add_argument('--max_wcrt', type=int,
-                    default=MAX_WCRT,
-                    help='Maximum response-time in a local analysis (default=%f)' % (MAX_WCRT))
-parser.add_argument('--timeout', type=float,
-                    default=TIMEOUT,
-                    help='Analysis timeout dfault=%f)' % (TIMEOUT))
-parser.add_argument('--e2e_improved', action='store_true',
-                    help='enable improved end to end analysis (experimental)')
-parser.add_argument('--nocaching', action='store_true',
-                    help='disable event-model caching')
-parser.add_argument('--check_violations', action='store_true',
-                    help='check for constraint violations during analysis')
-parser.add_argument('--show', action='store_true',
-                    help='Show plots (interactive).')
-parser.add_argument('--propagation', choices=propagation_methods, default='busy_window',
-                    help='Event model propagation method')
-parser.add_argument('--verbose', '-v', action='store_true',
-                    help='be more talkative')
-parser.add_argument('--debug', '-d', action='store_true',
-                    help='print debug messages')
+# arguments of the pycpa argument parser as (flags, keyword arguments)
+_arguments = [
+    (('--max_iterations',), dict(type=int,
+                                 default=MAX_ITERATIONS,
+                                 help='Maximum number of iterations in a local analysis (default=%d)' % (MAX_ITERATIONS))),
+    (('--max_wcrt',), dict(type=int,
+                           default=MAX_WCRT,
+                           help='Maximum response-time in a local analysis (default=%f)' % (MAX_WCRT))),
+    (('--timeout',), dict(type=float,
+                          default=TIMEOUT,
+                          help='Analysis timeout dfault=%f)' % (TIMEOUT))),
+    (('--e2e_improved',), dict(action='store_true',
+                               help='enable improved end to end analysis (experimental)')),
+    (('--nocaching',), dict(action='store_true',
+                            help='disable event-model caching')),
+    (('--check_violations',), dict(action='store_true',
+                                   help='check for constraint violations during analysis')),
+    (('--lean',), dict(action='store_true',
+                       help='skip busy-window details and sanity checks (faster analysis)')),
+    (('--show',), dict(action='store_true',
+                       help='Show plots (interactive).')),
+    (('--propagation',), dict(choices=propagation_methods, default='busy_window',
+                              help='Event model propagation method')),
+    (('--verbose', '-v'), dict(action='store_true',
+                               help='be more talkative')),
+    (('--debug', '-d'), dict(action='store_true',
+                             help='print debug messages')),
+]
+
+
+_parser = None
+
+
+def _get_parser():
+    """ Returns the argument parser, which is built on first use.
+    Scripts add their own arguments via ``options.parser``.
+    """
+    global _parser
+    if _parser is None:
+        import argparse
+        _parser = argparse.ArgumentParser(description='Scheduling Analysis', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+        for flags, kwargs in _arguments:
+            _parser.add_argument(*flags, **kwargs)
+    return _parser
+
+
+class _LazyParser(object):
+    """ Stands in for the argument parser and builds it on first use,
+    so that argparse is only imported if the command line is parsed """
+
+    def __getattr__(self, name):
+        return getattr(_get_parser(), name)
+
+
+#: The argparse.ArgumentParser of pycpa (built on first use).
+parser = _LazyParser()
+
+
+class _Options(object):
+    """ Default options (used instead of an argparse.Namespace
+    if the parser has not been built) """
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+def _default_options():
+    """ Returns the defaults of _arguments without building the parser """
+    defaults = dict()
+    for flags, kwargs in _arguments:
+        dest = flags[0].lstrip('-').replace('-', '_')
+        if kwargs.get('action') == 'store_true':
+            defaults[dest] = kwargs.get('default', False)
+        else:
+            defaults[dest] = kwargs.get('default', None)
+    return defaults
 
 
 
@@ -75,11 +129,81 @@ welcome = "pyCPA - Compositional Performance Analysis in Python.\n\n" \
 _opts = None
 _opts_dict = None
 
+# per-thread stack of active AnalysisConfig objects
+_local = threading.local()
+
+
+class AnalysisConfig(object):
+    """ Immutable snapshot of the options for one analysis run.
+
+    All options of the argument parser are available as plain attributes
+    (e.g. ``config.timeout``).
+    Options not given as keyword arguments are taken from the
+    global options (i.e. command line and set_opt()) at creation time.
+    Analyses with different configurations can run in the same process.
+    """
+
+    def __init__(self, **kwargs):
+        if _opts is None: init_pycpa(implicit=True)
+        values = dict(vars(_opts))
+        for key in kwargs:
+            if key not in values:
+                raise AttributeError("unknown option '%s'" % key)
+        values.update(kwargs)
+        object.__setattr__(self, '_values', values)
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("AnalysisConfig is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("AnalysisConfig is immutable")
+
+    def replace(self, **kwargs):
+        """ Returns a copy with the options given as keyword arguments changed """
+        values = dict(self._values)
+        values.update(kwargs)
+        return AnalysisConfig(**values)
+
+    def __repr__(self):
+        return "AnalysisConfig(%s)" % ", ".join(
+            "%s=%r" % (k, v) for k, v in sorted(self._values.items()))
+
+
+@contextlib.contextmanager
+def use_config(config):
+    """ Context manager which makes config the active configuration
+    of the current thread, i.e. get_opt() returns its options.
+    """
+    stack = getattr(_local, 'configs', None)
+    if stack is None:
+        stack = _local.configs = list()
+    stack.append(config)
+    try:
+        yield config
+    finally:
+        stack.pop()
+
+def get_config():
+    """ Returns the active AnalysisConfig of the current thread
+    or a snapshot of the global options if no analysis is running.
+    """
+    stack = getattr(_local, 'configs', None)
+    if stack:
+        return stack[-1]
+    return AnalysisConfig()
 
 def get_opt(option):
     """ Returns the option specified by the parameter.
     If called for the first time, the parsing is done.
+
+    During an analysis, the option is read from the AnalysisConfig
+    of that analysis (see use_config()).
     """
+    stack = getattr(_local, 'configs', None)
+    if stack:
+        return getattr(stack[-1], option)
     global _opts
     if _opts is None: init_pycpa(implicit=True)
     return getattr(_opts, option)
@@ -140,12 +264,17 @@ def init_pycpa(implicit=False):
         print (welcome)
         print ("invoked via: " + " ".join(sys.argv) + "\n")
 
-        _opts = parser.parse_args()
+        _opts = _get_parser().parse_args()
+    elif _parser is None:
+        # implicit init without additional arguments,
+        # the parser (and argparse) is not needed for the defaults
+        _opts = _Options(**_default_options())
     else:
         # implicit init, through regression test or non-pycpa script
         # distill defaults and arguments from the parser and pretend nothing happend
+        import argparse
         _opts = argparse.Namespace()
-        for action in parser._actions:
+        for action in _parser._actions:
             if action.default == argparse.SUPPRESS:
                 continue
             setattr(_opts, action.dest, action.default)
@@ -0,0 +1,191 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Parallel analysis of independent components.
+
+Many systems consist of several independent subsystems
+(e.g. ECUs which are not linked to each other).
+System.components() finds these components. This module analyzes them
+in separate worker processes and merges the results into one dictionary.
+
+The components are transferred to the workers as snapshots
+(see pycpa.snapshot), hence schedulers, junction strategies and
+event models must be module-level classes of pycpa or registered
+with snapshot.register().
+
+Usage::
+
+    task_results = parallel.analyze_system(s, processes=4)
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import division
+
+import collections
+import logging
+import multiprocessing
+
+from . import analysis
+from . import model
+from . import options
+from . import snapshot
+from . import util
+
+logger = logging.getLogger(__name__)
+
+# number of jobs per worker process (smaller jobs balance better)
+JOBS_PER_PROCESS = 4
+
+
+def _subsystem(system, component):
+    """ Returns a System of the tasks and junctions in component.
+    The elements (and their resources) are shared with system,
+    paths and constraints are included if they refer to component only.
+    """
+    sub = model.System(system.name)
+    for e in component:
+        if isinstance(e, model.Junction):
+            sub.bind_junction(e)
+        elif e.resource is not None:
+            sub.bind_resource(e.resource)
+
+    for p in system.paths:
+        if all(t in component for t in p.tasks):
+            sub.bind_path(p)
+
+    constraints = system.constraints
+    for t, deadline in constraints._wcrt_constraints.items():
+        if t in component:
+            sub.constraints.add_wcrt_constraint(t, deadline)
+    for p, (deadline, n) in constraints._path_constraints.items():
+        if p in sub.paths:
+            sub.constraints.add_path_constraint(p, deadline, n)
+    for t, size in constraints._backlog_constraints.items():
+        if t in component:
+            sub.constraints.add_backlog_constraint(t, size)
+    for r, load in constraints._load_constraints.items():
+        if r in sub.resources:
+            sub.constraints.add_load_constraint(r, load)
+    return sub
+
+
+def _balance(components, n):
+    """ Distributes the components (largest first) to at most n jobs,
+    always adding to the job with the fewest elements """
+    jobs = [set() for _ in range(min(n, len(components)))]
+    for c in components:
+        min(jobs, key=len).update(c)
+    return jobs
+
+
+def _analyze_job(job):
+    """ Analyzes the system of a snapshot description in a worker process.
+    Returns a list of (task index, TaskResult).
+    The task keys of TaskResult.b_wcrt are replaced by task indices.
+    """
+    i, desc, config = job
+    tasks = list()
+    system = snapshot.from_dict(desc, tasks)
+    task_results = analysis.analyze_system(system, config=config)
+
+    index = dict((t, k) for k, t in enumerate(tasks))
+    results = list()
+    for t, r in task_results.items():
+        r.b_wcrt = analysis.BusyWindowDetails((index.get(k, k), v)
+                                              for k, v in r.b_wcrt.items())
+        results.append((index[t], r))
+    return i, results
+
+
+def _propagate_event_models(system, task_results):
+    """ Propagates the event models of the merged results,
+    as the workers analyzed copies of the tasks """
+    pending = collections.deque(t for r in system.resources for t in r.tasks)
+    stalled = 0
+    while len(pending) > 0:
+        t = pending.popleft()
+        if t.in_event_model is None:
+            pending.append(t)
+            stalled += 1
+            if stalled > len(pending):
+                raise analysis.NotSchedulableException(
+                    "Appgraph not well-formed. Dangling tasks: %s" % pending)
+            continue
+        stalled = 0
+        analysis._propagate(t, task_results)
+
+
+def analyze_system(system, processes=None, config=None):
+    """ Analyze the independent components of system in parallel.
+
+    :param system: the system to analyze
+    :type system: model.System
+    :param processes: number of worker processes
+        (default: number of CPUs). If 1 or if the system consists of
+        a single component, the system is analyzed in this process.
+    :param config: options.AnalysisConfig for all components
+        (default: a snapshot of the global options)
+    :rtype: dict (analysis.TaskResult), as analysis.analyze_system()
+
+    Exceptions of the analysis of a component (e.g.
+    analysis.NotSchedulableException) are raised in this process.
+    """
+    if config is None:
+        config = options.get_config()
+    if processes is None:
+        try:
+            processes = multiprocessing.cpu_count()
+        except NotImplementedError:
+            processes = 1
+
+    components = system.components()
+    logger.info("system consists of %d components" % len(components))
+    if processes == 1 or len(components) <= 1:
+        return analysis.analyze_system(system, config=config)
+
+    jobs = list()
+    job_tasks = list()
+    for component in _balance(components, JOBS_PER_PROCESS * processes):
+        refs = dict()
+        desc = snapshot.to_dict(_subsystem(system, component), refs)
+        tasks = [None] * len(desc['tasks'])
+        for e, (kind, k) in refs.items():
+            if kind == 't':
+                tasks[k] = e
+        jobs.append((len(jobs), desc, config))
+        job_tasks.append(tasks)
+
+    # clean old analysis state (as analysis.analyze_system() does)
+    for r in system.resources:
+        for t in r.tasks:
+            t.clean()
+
+    task_results = dict()
+    pool = multiprocessing.Pool(min(processes, len(jobs)))
+    try:
+        for i, results in pool.imap_unordered(_analyze_job, jobs):
+            tasks = job_tasks[i]
+            for k, r in results:
+                r.b_wcrt = analysis.BusyWindowDetails(
+                    (tasks[key] if isinstance(key, int) else key, v)
+                    for key, v in r.b_wcrt.items())
+                task_results[tasks[k]] = r
+                tasks[k].analysis_results = r
+    finally:
+        pool.terminate()
+        pool.join()
+
+    with analysis._use_task_graph(util.TaskGraph.from_system(system)):
+        _propagate_event_models(system, task_results)
+    return task_results
+
+# vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
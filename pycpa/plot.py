@@ -22,17 +22,17 @@ from __future__ import unicode_literals
 from __future__ import division
 
 
-try:
-    from matplotlib import ticker
-    from matplotlib import pyplot
-    from matplotlib import patches
-    from matplotlib.collections import PatchCollection
-    import matplotlib as mpl
-except ImportError:
-    print ("matplotlib not available, plotting disabled")
-
 import math
 
+from . import util
+
+# matplotlib is only imported once something is plotted
+_error = "matplotlib not available, plotting disabled"
+mpl = util.LazyModule('matplotlib', _error)
+pyplot = util.LazyModule('matplotlib.pyplot', _error)
+ticker = util.LazyModule('matplotlib.ticker', _error)
+patches = util.LazyModule('matplotlib.patches', _error)
+
 def augment_range(plot_range):
     """ Adds points around every point in plot_range for accurately plotting integer-based curves """
     a_range = plot_range + [x + 0.0001 for x in plot_range] + [x - 0.0001 for x in plot_range]
@@ -202,7 +202,10 @@ def plot_gantt(tasks, task_results, file_name=None, show=True, xlim=None,
                ):
     """ Plot a gantt chart of a given task list.
         Execution time information is taken from the task attribute
-        q_exec_windows which is written by the simulation framework
+        q_exec_windows which is written by the simulation framework.
+        If the simulation streamed its trace to a
+        simulation.ExecutionTraceSink, q_exec_windows is a view on the trace
+        and the windows are read lazily from the sink.
     """
     #matplotlib.rcParams.update(aesthetic_paper_parameters(column_size = 2 * 252))
 
@@ -260,15 +263,14 @@ def plot_gantt(tasks, task_results, file_name=None, show=True, xlim=None,
 
         # draw preemtion times, activation and response time arrows
         xposshift = 0
-        for q in range(0, len(t.q_exec_windows)):
+        for q, exec_windows in enumerate(t.q_exec_windows):
             #draw actication arrows
             xpos = t.in_event_model.delta_min(q + 1)
 
             #draw the the preemption bars
 
 
-            #print t.q_exec_windows[q]
-            task_activity_end = t.q_exec_windows[q][-1][1]
+            task_activity_end = exec_windows[-1][1]
 
             ax.broken_barh([(xpos, task_activity_end - xpos)],
                            (ypos - preemtion_bar_height / 2. , preemtion_bar_height),
@@ -299,7 +301,7 @@ def plot_gantt(tasks, task_results, file_name=None, show=True, xlim=None,
 
             if plot_activation_finishing == True:
                 # Draw finishing times
-                q_wcrt = t.q_exec_windows[q][-1][1]
+                q_wcrt = exec_windows[-1][1]
                 response_arrow = patches.FancyArrow(q_wcrt, ypos - arrow_yoffset,
                                                     0, -height / 2. ,
                                                     length_includes_head=True,
@@ -311,7 +313,7 @@ def plot_gantt(tasks, task_results, file_name=None, show=True, xlim=None,
                 ax.add_patch(response_arrow)
 
             if annotate_tasks == True and (task and task == t):
-                first_segment = t.q_exec_windows[q][0][0]
+                first_segment = exec_windows[0][0]
 
                 text = '$q=%d$' % (q + 1)
                 #if (annotate_wcrt and annotate_wcrt != t):
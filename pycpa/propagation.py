@@ -78,6 +78,10 @@ class JitterPropagationEventModel(model.EventModel):
     def deltaplus_func(self, n):
         return self.task.in_event_model.delta_plus(n) + self.resp_jitter
 
+    def rate(self):
+        """ Propagation does not change the long-term rate """
+        return self.task.in_event_model.rate()
+
 
 class JitterOffsetPropagationEventModel(model.EventModel):
     """ Derive an output event model from response time jitter
@@ -116,6 +120,10 @@ class JitterOffsetPropagationEventModel(model.EventModel):
     def deltaplus_func(self, n):
         return self.task.in_event_model.delta_plus(n) + self.resp_jitter
 
+    def rate(self):
+        """ Propagation does not change the long-term rate """
+        return self.task.in_event_model.rate()
+
 class JitterBminPropagationEventModel(model.EventModel):
     """ Derive an output event model from response time jitter,
     the b_min as well as the in_event_model (used as reference).
@@ -154,6 +162,10 @@ class JitterBminPropagationEventModel(model.EventModel):
     def deltaplus_func(self, n):
         return self.task.in_event_model.delta_plus(n) + self.resp_jitter
 
+    def rate(self):
+        """ Propagation does not change the long-term rate """
+        return self.task.in_event_model.rate()
+
 class BusyWindowPropagationEventModel(model.EventModel):
     """ Derive an output event model from busy window
     and in_event_model (used as reference).
@@ -203,6 +215,10 @@ class BusyWindowPropagationEventModel(model.EventModel):
         return max([self.task.in_event_model.delta_plus(n - k + 1) + self.busy_times[k]
              for k in range(min_k, max_k)]) - bcrt
 
+    def rate(self):
+        """ Propagation does not change the long-term rate """
+        return self.task.in_event_model.rate()
+
 class SPNPBusyWindowPropagationEventModel(BusyWindowPropagationEventModel):
     """ 
     Performs standard busy window propagation but additionally calculates the
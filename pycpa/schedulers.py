@@ -43,10 +43,14 @@ class RoundRobinScheduler(analysis.Scheduler):
     task.scheduling_parameter is the respective slot size
     """
 
+    supports_approximation = False
+
     def b_plus(self, task, q, details=None, **kwargs):
         w = q * task.wcet
         # print "q=",q
+        iterations = 0
         while True:
+            iterations += 1
             s = 0
             for ti in task.get_resource_interferers():
                 # print "sum+=min(",q,",",ti.in_event_model.eta_plus(w)
@@ -63,20 +67,19 @@ class RoundRobinScheduler(analysis.Scheduler):
 
             if w == w_new:
                 if details is not None:
-                    details['q*WCET'] = str(q) + '*' + str(task.wcet) + '=' + str(q * task.wcet)
+                    details['q*WCET'] = (q, task.wcet)
 
                     for ti in task.get_resource_interferers():
+                        eta = ti.in_event_model.eta_plus(w)
                         if hasattr(task, "scheduling_parameter") and task.scheduling_parameter is not None:
-                            if int(math.ceil(float(q) * task.wcet / task.scheduling_parameter)) * ti.scheduling_parameter < ti.in_event_model.eta_plus(w) * ti.wcet:
-                                details[str(ti)] = '%d*%d' % \
-                                    (int(math.ceil(float(q) * task.wcet / task.scheduling_parameter)),
-                                     ti.scheduling_parameter)
+                            slots = int(math.ceil(float(q) * task.wcet / task.scheduling_parameter))
+                            if slots * ti.scheduling_parameter < eta * ti.wcet:
+                                details[ti] = (slots, ti.scheduling_parameter)
                             else:
-                                details[str(ti)] = '%d*%d' % (ti.in_event_model.eta_plus(w), ti.wcet)
+                                details[ti] = (eta, ti.wcet)
                         else:
-                            details[str(ti)] = "%d*min(%d,%d)=%d*%d" % \
-                                (ti.wcet, q, ti.in_event_model.eta_plus(w),
-                                 ti.wcet, min(q, ti.in_event_model.eta_plus(w)))
+                            details[ti] = (min(q, eta), ti.wcet)
+                analysis.record_b_plus(task, iterations)
                 return w
             w = w_new
 
@@ -90,6 +93,8 @@ class SPNPScheduler(analysis.Scheduler):
     Policy for equal priority is FCFS (i.e. max. interference).
     """
 
+    supports_approximation = False
+
     def __init__(self, priority_cmp=prio_low_wins_equal_fifo, ctx_switch_overhead=0, cycle_time=EPSILON):
         """
         :param priority_cmp: function to evaluate priority comparison of the form foo(a,b). if foo(a,b) == True, then "a" is more important than "b"
@@ -157,7 +162,9 @@ class SPNPScheduler(analysis.Scheduler):
 
         w = (q - 1) * (task.wcet + self.ctx_switch_overhead) + b
 
+        iterations = 0
         while True:
+            iterations += 1
             # logging.debug("w: %d", w)
             # logging.debug("e: %d", q * task.wcet)
             s = 0
@@ -174,14 +181,15 @@ class SPNPScheduler(analysis.Scheduler):
             if w == w_new:
 
                 if details is not None:
-                    details['q*WCET'] = str(q) + '*' + str(task.wcet) + '=' + str(q * task.wcet)
-                    details['blocker'] = str(b)
+                    details['q*WCET'] = (q, task.wcet)
+                    details['blocker'] = b
                     for ti in task.get_resource_interferers():
                         if self.priority_cmp(ti.scheduling_parameter, task.scheduling_parameter):
-                            details[str(ti) + ':eta*WCET'] = str(ti.in_event_model.eta_plus(w + self.cycle_time)) + '*'\
-                                + str(ti.wcet) + '=' + str((ti.wcet + self.ctx_switch_overhead) * ti.in_event_model.eta_plus(w + self.cycle_time))
+                            details[ti] = (ti.in_event_model.eta_plus(w + self.cycle_time),
+                                           ti.wcet + self.ctx_switch_overhead)
                 w += task.wcet
                 assert(w >= q * task.wcet)
+                analysis.record_b_plus(task, iterations)
                 return w
             w = w_new
 
@@ -196,20 +204,65 @@ class SPPScheduler(analysis.Scheduler):
     """
 
 
-    def __init__(self, priority_cmp=prio_low_wins_equal_fifo):
-        analysis.Scheduler.__init__(self)
+    def __init__(self, priority_cmp=prio_low_wins_equal_fifo, epsilon=None):
+        """
+        :param priority_cmp: function to evaluate priority comparison of the form foo(a,b). if foo(a,b) == True, then "a" is more important than "b"
+        :param epsilon: if not None, approximate the busy times
+            (see analysis.Scheduler.b_plus_approximate())
+        """
+        analysis.Scheduler.__init__(self, epsilon)
 
         # # priority ordering
         self.priority_cmp = priority_cmp
 
+    def wcrt_lower_bound(self, task, limit=None):
+        """ Busy window of the first activation (cf. b_plus()),
+        in which each higher (or equal) priority task interferes at least once.
+        Source tasks interfere according to their event models,
+        i.e. the bound is refined by iterating the busy window
+        from below until it converges or exceeds limit.
+        """
+        if task.wcet <= 0:
+            return task.wcet
+        interferers = [ti for ti in task.get_resource_interferers()
+                       if self.priority_cmp(ti.scheduling_parameter,
+                                            task.scheduling_parameter)]
+        w = task.wcet + sum(ti.wcet for ti in interferers)
+        sources = set(ti for ti in interferers
+                      if ti.prev_task is None and ti.in_event_model is not None)
+        if limit is None or len(sources) == 0:
+            return w
+
+        # each step is a lower bound of the least fixed point
+        while w <= limit:
+            w_new = task.wcet
+            for ti in interferers:
+                n = 1
+                if ti in sources:
+                    n = max(1, ti.in_event_model.eta_plus(w))
+                w_new += ti.wcet * n
+            if w_new == w:
+                break
+            w = w_new
+        return w
+
     def b_plus(self, task, q, details=None, **kwargs):
         """ This corresponds to Theorem 1 in [Lehoczky1990]_ or Equation 2.3 in [Richter2005]_. """
         assert(task.scheduling_parameter != None)
         assert(task.wcet >= 0)
 
+        if self.epsilon is not None:
+            return self.b_plus_approximate(
+                task, q, [ti for ti in task.get_resource_interferers()
+                          if self.priority_cmp(ti.scheduling_parameter,
+                                               task.scheduling_parameter)],
+                details)
+
         w = q * task.wcet
 
+        iterations = 0
         while True:
+            iterations += 1
             # logging.debug("w: %d", w)
             # logging.debug("e: %d", q * task.wcet)
             s = 0
@@ -226,11 +279,11 @@ class SPPScheduler(analysis.Scheduler):
             if w == w_new:
                 assert(w >= q * task.wcet)
                 if details is not None:
-                    details['q*WCET'] = str(q) + '*' + str(task.wcet) + '=' + str(q * task.wcet)
+                    details['q*WCET'] = (q, task.wcet)
                     for ti in task.get_resource_interferers():
                         if self.priority_cmp(ti.scheduling_parameter, task.scheduling_parameter):
-                            details[str(ti) + ':eta*WCET'] = str(ti.in_event_model.eta_plus(w)) + '*'\
-                                + str(ti.wcet) + '=' + str(ti.wcet * ti.in_event_model.eta_plus(w))
+                            details[ti] = (ti.in_event_model.eta_plus(w), ti.wcet)
+                analysis.record_b_plus(task, iterations)
                 return w
 
             w = w_new
@@ -247,6 +300,10 @@ class SPPSchedulerActivationOffsets(SPPScheduler):
     """
 
 
+    # interferers may be shifted out of the busy window
+    wcrt_lower_bound = analysis.Scheduler.wcrt_lower_bound
+    supports_approximation = False
+
     def __init__(self, priority_cmp=prio_low_wins_equal_fifo):
         SPPScheduler.__init__(self, priority_cmp)
 
@@ -257,7 +314,9 @@ class SPPSchedulerActivationOffsets(SPPScheduler):
 
         w = q * task.wcet
 
+        iterations = 0
         while True:
+            iterations += 1
             s = 0
             for ti in task.get_resource_interferers():
                 assert(ti.scheduling_parameter != None)
@@ -276,7 +335,7 @@ class SPPSchedulerActivationOffsets(SPPScheduler):
             if w == w_new:
                 assert(w >= q * task.wcet)
                 if details is not None:
-                    details['q*WCET'] = str(q) + '*' + str(task.wcet) + '=' + str(q * task.wcet)
+                    details['q*WCET'] = (q, task.wcet)
                     for ti in task.get_resource_interferers():
                         if self.priority_cmp(ti.scheduling_parameter, task.scheduling_parameter):
                             if hasattr(ti.in_event_model, 'P') and hasattr(task.in_event_model, 'P') and \
@@ -286,8 +345,8 @@ class SPPSchedulerActivationOffsets(SPPScheduler):
                             else:
                                 diff = ti.in_event_model.J
 
-                            details[str(ti) + ':eta*WCET'] = str(ti.in_event_model.eta_plus(w+diff)) + '*'\
-                                + str(ti.wcet) + '=' + str(ti.wcet * ti.in_event_model.eta_plus(w+diff))
+                            details[ti] = (ti.in_event_model.eta_plus(w + diff), ti.wcet)
+                analysis.record_b_plus(task, iterations)
                 return w
 
             if q > 1:
@@ -321,6 +380,10 @@ class SPPSchedulerCorrelatedRox(SPPScheduler):
         Computes the approximate response time bound as presented in [Rox2010]_.
     """
 
+    # interferers may be shifted out of the busy window
+    wcrt_lower_bound = analysis.Scheduler.wcrt_lower_bound
+    supports_approximation = False
+
     def get_dependent_tasks(self, task):
         return task.get_resource_interferers()
 
@@ -333,7 +396,7 @@ class SPPSchedulerCorrelatedRox(SPPScheduler):
         w = q * task.wcet
         while True:
             details.clear()
-            details['q*WCET'] = str(q) + '*' + str(task.wcet) + '=' + str(q * task.wcet)
+            details['q*WCET'] = (q, task.wcet)
 
             idle_intrf = 0
             idle_details = dict()
@@ -343,9 +406,9 @@ class SPPSchedulerCorrelatedRox(SPPScheduler):
                 assert(ti.resource == task.resource)
                 if self.priority_cmp(ti.scheduling_parameter, task.scheduling_parameter):  # equal priority also interferes (FCFS)
 
-                    idle_intrf += ti.wcet * ti.in_event_model.eta_plus(w-ti.in_event_model.correlated_dmin(task))
-                    idle_details[str(ti)+':eta*WCET'] = str(ti.in_event_model.eta_plus(w-ti.in_event_model.correlated_dmin(task))) + '*' +\
-                            str(ti.wcet) + '=' + str(ti.wcet * ti.in_event_model.eta_plus(w-ti.in_event_model.correlated_dmin(task)))
+                    eta = ti.in_event_model.eta_plus(w - ti.in_event_model.correlated_dmin(task))
+                    idle_intrf += ti.wcet * eta
+                    idle_details[ti] = (eta, ti.wcet)
 
             w_new = q * task.wcet + idle_intrf
             for d in idle_details.keys():
@@ -367,7 +430,7 @@ class SPPSchedulerCorrelatedRox(SPPScheduler):
         w = q * task.wcet
         while True:
             details.clear()
-            details['q*WCET'] = str(q) + '*' + str(task.wcet) + '=' + str(q * task.wcet)
+            details['q*WCET'] = (q, task.wcet)
 
             busy_intrf = 0
             busy_details = dict()
@@ -395,12 +458,12 @@ class SPPSchedulerCorrelatedRox(SPPScheduler):
                             mj = tj.in_event_model.eta_plus(a0 - task.in_event_model.correlated_dmin(ti))
 
                         em = CorrelatedDeltaMin(tj.in_event_model, mj, a0 + tj.in_event_model.correlated_dmin(task))
-                        intrf += tj.wcet * em.eta_plus(w + a0)
-                        intrf_details[str(tj)+':eta*WCET'] = str(em.eta_plus(w+a0)) + '+' + str(tj.wcet) +\
-                                '=' + str(tj.wcet * em.eta_plus(w + a0))
+                        eta = em.eta_plus(w + a0)
+                        intrf += tj.wcet * eta
+                        intrf_details[tj] = (eta, tj.wcet)
 
                     intrf -= a0
-                    intrf_details[str(ti)+':offset'] = str(a0)
+                    intrf_details[str(ti)+':offset'] = a0
 
                     if intrf > busy_intrf:
                         busy_intrf = intrf
@@ -438,6 +501,7 @@ class SPPSchedulerCorrelatedRox(SPPScheduler):
                 for d in busy_details.keys():
                     details[d] = busy_details[d]
 
+        analysis.record_b_plus(task, 1)
         return w
 
 class SPPSchedulerCorrelatedRoxExact(SPPScheduler):
@@ -445,6 +509,10 @@ class SPPSchedulerCorrelatedRoxExact(SPPScheduler):
         This is the exact version which performs an extensive search of busy window candidates.
     """
 
+    # interferers may be shifted out of the busy window
+    wcrt_lower_bound = analysis.Scheduler.wcrt_lower_bound
+    supports_approximation = False
+
     def calculate_w(self, task, sequence, details=None):
         w = 0
         q_cur = 0
@@ -453,7 +521,7 @@ class SPPSchedulerCorrelatedRoxExact(SPPScheduler):
             w += ti.wcet
 
             if details is not None:
-                details[str(ti)+':'+str(a)] = str(ti.wcet)
+                details[str(ti)+':'+str(a)] = ti.wcet
 
             if ti is task:
                 q_cur += 1
@@ -548,6 +616,7 @@ class SPPSchedulerCorrelatedRoxExact(SPPScheduler):
 #                    details[d] = classic_details[d]
 
         assert(w >= q * task.wcet)
+        analysis.record_b_plus(task, 1)
         return w
 
 
@@ -555,12 +624,16 @@ class SPPSchedulerRoundRobin(SPPScheduler):
     """ SPP scheduler with non-preemptive round-robin policy for equal priorities
     """
 
+    supports_approximation = False
+
     def b_plus(self, task, q, details=None, **kwargs):
         assert(task.scheduling_parameter != None)
         assert(task.wcet >= 0)
 
         w = q * task.wcet
+        iterations = 0
         while True:
+            iterations += 1
             # logging.debug("w: %d", w)
             # logging.debug("e: %d", q * task.wcet)
             s = 0
@@ -583,6 +656,7 @@ class SPPSchedulerRoundRobin(SPPScheduler):
             w = w_new
 
         assert(w >= q * task.wcet)
+        analysis.record_b_plus(task, iterations)
         return w
 
 
@@ -591,6 +665,8 @@ class TDMAScheduler(analysis.Scheduler):
         task.scheduling_parameter is the slot size of the respective task
     """
 
+    supports_approximation = False
+
     def b_plus(self, task, q, details=None, **kwargs):
         assert(task.scheduling_parameter != None)
         assert(task.wcet >= 0)
@@ -605,12 +681,12 @@ class TDMAScheduler(analysis.Scheduler):
         assert(w >= q * task.wcet)
 
         if details is not None:
-            details['q*WCET'] = str(q) + '*' + str(task.wcet) + '=' + str(q * task.wcet)
+            details['q*WCET'] = (q, task.wcet)
             for tj in task.get_resource_interferers():
-                details["%s.TDMASlot" % (tj)] = str(tj.scheduling_parameter)
-            details['I_TDMA'] = '%d*%d=%d' % (math.ceil(float(q * task.wcet) / task.scheduling_parameter),
-                                      t_tdma - task.scheduling_parameter,
-                                      math.ceil(float(q * task.wcet) / task.scheduling_parameter) * (t_tdma - task.scheduling_parameter))
+                details["%s.TDMASlot" % (tj)] = tj.scheduling_parameter
+            details['I_TDMA'] = (int(math.ceil(float(q * task.wcet) / task.scheduling_parameter)),
+                                 t_tdma - task.scheduling_parameter)
+        analysis.record_b_plus(task, 1)
         return w
 
 # vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
@@ -16,29 +16,167 @@ gantt charts.
 
 from __future__ import absolute_import
 
+import io
 import logging
-from simpy import Environment
+import mmap
+import struct
+
+from . import util
+
+simpy = util.LazyModule('simpy', "simpy is required for the simulation")
 
 
 logger = logging.getLogger("sim")
 
+## Trace output -----------------------------------
+
+class ExecutionTraceSink(object):
+    """ Streams execution segments into a compact binary trace
+        instead of keeping them as python lists in the simulated tasks.
+
+        Each segment is stored as one fixed-size record
+        (task id, activation, start, end).
+        The trace is written to file_name if given,
+        otherwise to an in-memory buffer.
+        Times must be integers (cf. the time conversion in pycpa.util).
+    """
+
+    # little endian: task id, activation, start, end
+    RECORD = struct.Struct('<IIqq')
+
+    def __init__(self, file_name=None):
+        self.file_name = file_name
+        if file_name is None:
+            self.stream = io.BytesIO()
+        else:
+            self.stream = open(file_name, 'w+b')
+
+        # task <-> id mappings
+        self.task_ids = dict()
+        self.tasks = list()
+
+    def task_id(self, task):
+        """ Returns the numeric id of task (assigned on first use) """
+        tid = self.task_ids.get(task, None)
+        if tid is None:
+            tid = len(self.tasks)
+            self.task_ids[task] = tid
+            self.tasks.append(task)
+        return tid
+
+    def write(self, task, q, start, end):
+        """ Append an execution segment of the q-th activation of task """
+        if start != int(start) or end != int(end):
+            raise ValueError('trace sink requires integer times, got (%r, %r)'
+                             % (start, end))
+        self.stream.write(self.RECORD.pack(self.task_id(task), q,
+                                           int(start), int(end)))
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+    def _buffer(self):
+        """ Returns a read-only buffer of all records written so far """
+        self.flush()
+        if self.file_name is None:
+            return self.stream.getbuffer()
+        if self.stream.tell() == 0:
+            return b''
+        return mmap.mmap(self.stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _iter_raw(self):
+        """ Lazily iterates over the raw records (task id, q, start, end) """
+        buf = self._buffer()
+        records = self.RECORD.iter_unpack(buf)
+        try:
+            for r in records:
+                yield r
+        finally:
+            # release the buffer export before closing the buffer
+            del records
+            if isinstance(buf, memoryview):
+                buf.release()
+            elif isinstance(buf, mmap.mmap):
+                buf.close()
+
+    def records(self):
+        """ Lazily iterates over all records as (task, q, start, end) """
+        for tid, q, start, end in self._iter_raw():
+            yield self.tasks[tid], q, start, end
+
+    def exec_windows(self, task):
+        """ Lazily iterates over the activations of task
+            and yields the list of execution segments [(start, end), ...]
+            of each activation, i.e. the elements of task.q_exec_windows.
+        """
+        if task not in self.task_ids:
+            return
+        task_id = self.task_ids[task]
+
+        windows = None
+        q_cur = None
+        for tid, q, start, end in self._iter_raw():
+            if tid != task_id:
+                continue
+            if q != q_cur:
+                if windows is not None:
+                    yield windows
+                windows = list()
+                q_cur = q
+            windows.append((start, end))
+        if windows is not None:
+            yield windows
+
+    def view(self, task):
+        """ Returns a re-iterable view on the execution windows of task,
+            which can be used in place of a q_exec_windows list
+        """
+        return _ExecWindowsView(self, task)
+
+
+class _ExecWindowsView(object):
+    """ Re-iterable view on the execution windows of a task in a trace """
+    def __init__(self, sink, task):
+        self.sink = sink
+        self.task = task
+
+    def __iter__(self):
+        return self.sink.exec_windows(self.task)
+
+
 ## Model components -------------------------------
 
 class SimTask:
     """ A task will produce the activations with a distance according to delta_minus
         It stops, when the resource is idle (end of busy window)
     """
-    def __init__(self, env, task):
+    def __init__(self, env, task, trace_sink=None):
         self.env = env
         # link to the pycpa model
         self.task = task
 
-        # add a list to store the execution windows in the task
-        self.task.q_exec_windows = list()
+        # optional sink to stream the execution windows to
+        self.trace_sink = trace_sink
+
+        # add a list (or a view on the trace) to store the execution windows in the task
+        if trace_sink is None:
+            self.task.q_exec_windows = list()
+        else:
+            self.task.q_exec_windows = trace_sink.view(task)
 
         # all activations that have been emitted
+        # (not kept if the execution windows are streamed to a trace sink,
+        # so that the memory does not grow with the number of activations)
         self.activations = list()
 
+    def add_activation(self, activation):
+        """ Keep track of an emitted activation (unless streaming) """
+        if self.trace_sink is None:
+            self.activations.append(activation)
+
 
     def run(self, scheduler):
         """ Main simulation routine
@@ -52,10 +190,11 @@ class SimTask:
 
         while True:
             name = "Activation%s,%d" % (self.task.name, n)
-            a = SimActivation(env=self.env, name=name, task=self.task)
+            a = SimActivation(env=self.env, name=name, task=self.task,
+                              trace_sink=self.trace_sink)
             a.q = n
 
-            self.activations.append(a)
+            self.add_activation(a)
             self.env.process(a.execute())
 
             scheduler.pending.append(a)
@@ -74,9 +213,12 @@ class SimActivation:
     """ Representation of an activation
     """
 
-    def __init__(self, env, name, task):
+    def __init__(self, env, name, task, trace_sink=None):
         self.env = env
 
+        # optional sink to stream the execution windows to
+        self.trace_sink = trace_sink
+
         # number of the action
         self.q = 0
 
@@ -90,6 +232,7 @@ class SimActivation:
         self.workload = task.wcet
 
         # active segments of the execution of the form: [(0,1), (3,9)]
+        # (not filled if the segments are streamed to a trace sink)
         self.exec_windows = list()
 
         # last recent start of a execution segment
@@ -115,7 +258,11 @@ class SimActivation:
         """
             Called by the scheduler to log preemtions
         """
-        self.exec_windows.append((self.recent_window_start, self.env.now))
+        if self.trace_sink is None:
+            self.exec_windows.append((self.recent_window_start, self.env.now))
+        else:
+            self.trace_sink.write(self.task, self.q,
+                                  self.recent_window_start, self.env.now)
         self.recent_window_start = None
 
     def execute(self):
@@ -136,7 +283,8 @@ class SimActivation:
         self.response_time = self.finish_time - self.start_time
 
         # add the execution windows to the pycpa task
-        self.task.q_exec_windows.append(self.exec_windows)
+        if self.trace_sink is None:
+            self.task.q_exec_windows.append(self.exec_windows)
 
 class SimSPP:
     """ SPP Resource model
@@ -259,9 +407,10 @@ class SimSPNP:
         # if there is a blocker, create one activation and put it in the queue
         if blocker:
             name = "Blocker %s" % self.lowprio_simblocker.name
-            blocker_activation = SimActivation(env=self.env, name=name, task=blocker)
+            blocker_activation = SimActivation(env=self.env, name=name, task=blocker,
+                                               trace_sink=self.lowprio_simblocker.trace_sink)
             self.blockers.append(blocker_activation)
-            self.lowprio_simblocker.activations.append(blocker_activation)
+            self.lowprio_simblocker.add_activation(blocker_activation)
             self.env.process(blocker_activation.execute())
 
         for simtask in self.simtasks:
@@ -298,20 +447,27 @@ class SimSPNP:
 
 class ResourceModel:
 
-    def __init__(self, resource, name="Experiment"):
-        self.env = Environment()
+    def __init__(self, resource, name="Experiment", trace_sink=None):
+        self.env = simpy.Environment()
         self.name = name
         self.resource = resource
         self.scheduler = None
 
+        # if set, execution windows are streamed to this ExecutionTraceSink
+        # instead of being stored in task.q_exec_windows lists
+        self.trace_sink = trace_sink
+
     def runModel(self, task, scheduler, until=float('inf')):
         self.scheduler = scheduler
 
         for t in self.resource.tasks:
-            simtask = SimTask(self.env, t)
+            simtask = SimTask(self.env, t, self.trace_sink)
             self.scheduler.simtasks.append(simtask)
 
         self.env.process(self.scheduler.execute(self.resource, task))
         self.env.run(until=until)
 
+        if self.trace_sink is not None:
+            self.trace_sink.flush()
+
 # vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
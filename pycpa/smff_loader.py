@@ -14,7 +14,12 @@ SMFF import/annotate
 """
 from __future__ import absolute_import
 
+import io
+import sys
 import xml.dom.minidom
+import xml.etree.ElementTree as ElementTree
+import xml.sax
+import xml.sax.saxutils
 import logging
 
 from . import options
@@ -96,6 +101,9 @@ class SMFFLoader(object):
 
     def parse(self, filename):
 
+        # # the parsed file
+        self.filename = filename
+
         self.xml_root = xml.dom.minidom.parse(filename)
 
         #  save xml_root node in the system model
@@ -163,6 +171,7 @@ class SMFFLoader(object):
 
         # map id to pycpa model
         self.id_to_resource_pycpa[resource_id] = resource_model
+        self.resources_pycpa.add(resource_model)
 
     def _handle_comm_resource(self, comm_resource_node):
         # ResourceType and ResourceGroup are skipped
@@ -186,6 +195,7 @@ class SMFFLoader(object):
 
         # map id to pycpa model
         self.id_to_comm_resource_pycpa[resource_id] = resource_model
+        self.comm_resources_pycpa.add(resource_model)
 
     def _handle_applications(self, applications_node):
         for application_node in applications_node.getElementsByTagName("Application"):
@@ -212,6 +222,10 @@ class SMFFLoader(object):
         for task_link_node in application_node.getElementsByTagName("TaskLink"):
             self._handle_task_link(task_link_node, smff_application)
 
+        self._bind_application(smff_application)
+
+    def _bind_application(self, smff_application):
+        """ maps the tasks and task links of an application to their resources """
         for (lid, task_model) in smff_application.id_to_link_pycpa.items():
 
             rid = smff_application.task_link_mapping[lid]
@@ -370,8 +384,8 @@ class SMFFLoader(object):
                 logger.info("decided to skip link id %d, because it is mapped to computing resource %d" % (lid, rid))
 
 
-    def _annotate_task(self, task_result_node, task_model, smff_application):
-
+    def _task_result_attributes(self, task_model):
+        """ returns the (name, value) attributes of a task result element """
         in_jitter, out_jitter = _calc_in_out_jitter(task_model)
 
         in_dmin = 0
@@ -380,14 +394,24 @@ class SMFFLoader(object):
 
         out_dmin = task_model.analysis_results.bcrt
 
-        task_result_node.setAttribute("name", str(task_model.name))
-        task_result_node.setAttribute("id", str(task_model.smff_id))
-        task_result_node.setAttribute("wcrt", str(task_model.analysis_results.wcrt))
-        task_result_node.setAttribute("bcrt", str(task_model.analysis_results.bcrt))
-        task_result_node.setAttribute("input_dmin", str(in_dmin))
-        task_result_node.setAttribute("output_dmin", str(out_dmin))
-        task_result_node.setAttribute("input_jitter", str(in_jitter))
-        task_result_node.setAttribute("output_jitter", str(out_jitter))
+        return [("name", str(task_model.name)),
+                ("id", str(task_model.smff_id)),
+                ("wcrt", str(task_model.analysis_results.wcrt)),
+                ("bcrt", str(task_model.analysis_results.bcrt)),
+                ("input_dmin", str(in_dmin)),
+                ("output_dmin", str(out_dmin)),
+                ("input_jitter", str(in_jitter)),
+                ("output_jitter", str(out_jitter))]
+
+    def _resource_result_attributes(self, resource_model):
+        """ returns the (name, value) attributes of a resource result element """
+        return [("name", str(resource_model.name)),
+                ("ID", str(resource_model.smff_id)),
+                ("load", str(resource_model.load()))]
+
+    def _annotate_task(self, task_result_node, task_model, smff_application):
+        for name, value in self._task_result_attributes(task_model):
+            task_result_node.setAttribute(name, value)
 
     def _annotate_resource(self, resources_result_node, resource_model):
         resource_result_node = None
@@ -401,9 +425,8 @@ class SMFFLoader(object):
 
         resources_result_node.appendChild(resource_result_node)
 
-        resource_result_node.setAttribute("name", str(resource_model.name))
-        resource_result_node.setAttribute("ID", str(resource_model.smff_id))
-        resource_result_node.setAttribute("load", str(resource_model.load()))
+        for name, value in self._resource_result_attributes(resource_model):
+            resource_result_node.setAttribute(name, value)
 
     def _annotate_resources(self, analysis_node):
         resources_result_node = self.xml_root.createElement("Resources")
@@ -470,4 +493,326 @@ class SMFFLoader(object):
         data = self.xml_root.toxml()
         f.write(data)
         f.close()
+
+
+class _XMLWriter(xml.sax.saxutils.XMLGenerator):
+    """ XMLGenerator which also writes comments (the comment() method of
+    the SAX lexical handler). The document is written to a text stream
+    owned by the writer, so comments are written in order with
+    the elements.
+    """
+    def __init__(self, out, encoding='utf-8'):
+        self._encoding = encoding
+        if sys.version_info[0] < 3:
+            # Python 2: XMLGenerator writes encoded strings to out
+            self._stream = out
+            self._wrapped = False
+        else:
+            self._stream = io.TextIOWrapper(out, encoding=encoding,
+                                            errors='xmlcharrefreplace',
+                                            newline='\n', write_through=True)
+            self._wrapped = True
+        xml.sax.saxutils.XMLGenerator.__init__(self, self._stream, encoding)
+
+    def comment(self, content):
+        text = "<!--%s-->" % content
+        if not self._wrapped:
+            text = text.encode(self._encoding)
+        self._stream.write(text)
+
+    def endDocument(self):
+        xml.sax.saxutils.XMLGenerator.endDocument(self)
+        if self._wrapped:
+            # out stays open, it is closed by the caller
+            self._stream.flush()
+            self._stream.detach()
+
+
+class _AnnotatingFilter(xml.sax.ContentHandler):
+    """ SAX handler which copies a SMFF document to an _XMLWriter.
+    If write_analysis is given, old <Analysis> elements are dropped and
+    write_analysis(generator) is called before the end of the root element
+    to inject the new analysis results.
+    """
+    def __init__(self, out, write_analysis=None):
+        xml.sax.ContentHandler.__init__(self)
+        self.generator = _XMLWriter(out, 'utf-8')
+        self.write_analysis = write_analysis
+        self.depth = 0
+        # depth of the skipped <Analysis> element (or None)
+        self.skip_depth = None
+
+    def startDocument(self):
+        self.generator.startDocument()
+
+    def endDocument(self):
+        self.generator.endDocument()
+
+    def startElement(self, name, attrs):
+        self.depth += 1
+        if self.skip_depth is None and self.depth == 2 and name == "Analysis" \
+                and self.write_analysis is not None:
+            self.skip_depth = self.depth
+        if self.skip_depth is None:
+            self.generator.startElement(name, attrs)
+
+    def endElement(self, name):
+        if self.skip_depth is None:
+            if self.depth == 1 and self.write_analysis is not None:
+                self.write_analysis(self.generator)
+            self.generator.endElement(name)
+        elif self.depth == self.skip_depth:
+            self.skip_depth = None
+        self.depth -= 1
+
+    def characters(self, content):
+        if self.skip_depth is None:
+            self.generator.characters(content)
+
+    def ignorableWhitespace(self, content):
+        self.characters(content)
+
+    def processingInstruction(self, target, data):
+        if self.skip_depth is None:
+            self.generator.processingInstruction(target, data)
+
+    # lexical handler, used to copy comments
+    def comment(self, content):
+        if self.skip_depth is None:
+            self.generator.comment(content)
+
+    def startDTD(self, name, public_id, system_id):
+        pass
+
+    def endDTD(self):
+        pass
+
+    def startCDATA(self):
+        pass
+
+    def endCDATA(self):
+        pass
+
+
+class SMFFStreamLoader(SMFFLoader):
+    """ a streaming SMFF xml loader
+
+    Builds the same system as SMFFLoader in a single pass over the file
+    (xml.etree.ElementTree.iterparse). Resources, tasks, task links and
+    mappings are converted as soon as they have been read and are
+    discarded afterwards, hence no DOM is kept (xml_root and the
+    xml_node attributes are None).
+
+    annotate_results() and write() do not modify a DOM either: write()
+    copies the input file to the output file (SAX) and injects the
+    <Analysis> results element on the fly.
+    """
+    def __init__(self):
+        SMFFLoader.__init__(self)
+
+        # # whether write() injects the analysis results
+        self.annotate = False
+
+    def parse(self, filename):
+        self.filename = filename
+        self.system.xml_node = None
+
+        stack = list()
+        smff_application = None
+        task_links = list()
+        for event, element in ElementTree.iterparse(filename, events=('start', 'end')):
+            if event == 'start':
+                stack.append(element)
+                if len(stack) == 3 and stack[1].tag == "Applications" \
+                        and element.tag == "Application":
+                    smff_application = self._stream_application(element)
+                    task_links = list()
+                continue
+
+            stack.pop()
+            depth = len(stack)
+            if depth == 2 and stack[1].tag == "Platform":
+                if element.tag == "Resource":
+                    self._stream_resource(element, self.id_to_resource_pycpa,
+                                          self.resources_pycpa)
+                elif element.tag == "CommResource":
+                    self._stream_resource(element, self.id_to_comm_resource_pycpa,
+                                          self.comm_resources_pycpa)
+            elif depth == 3 and smff_application is not None:
+                if element.tag == "Task":
+                    self._stream_task(element, smff_application)
+                elif element.tag == "TaskLink":
+                    # links can only be resolved with the mapping, which
+                    # follows them. Keep the (small) element until then.
+                    task_links.append(element)
+                elif element.tag == "Mapping":
+                    self._stream_mapping(element, smff_application)
+            elif depth == 2 and element.tag == "Application" \
+                    and smff_application is not None:
+                for task_link_element in task_links:
+                    self._stream_task_link(task_link_element, smff_application)
+                task_links = list()
+                self._bind_application(smff_application)
+                smff_application = None
+
+            if 0 < depth <= 2 or (depth == 3 and stack[1].tag == "Applications"):
+                # discard the processed subtree
+                stack[-1].remove(element)
+                if element.tag != "TaskLink":
+                    element.clear()
+
+        # check mapping sanity
+        for resource_model in self.system.resources:
+            if len(resource_model.tasks) == 0:
+                logger.info("no tasks on resource %s." % resource_model.name)
+
+        return self.system
+
+    def _stream_resource(self, resource_element, id_map, resource_set):
+        short_name = resource_element.get("shortName")
+        resource_id = int(resource_element.get("resID"))
+
+        scheduler_element = resource_element.find("Scheduler")
+        scheduler = self._scheduler_from_string(scheduler_element.get("name"))
+
+        if scheduler == None:
+            raise InvalidSMFFXMLException("Scheduler not recognized", scheduler_element)
+
+        resource_model = self.system.bind_resource(model.Resource(short_name, scheduler))
+        resource_model.xml_node = None
+        resource_model.smff_id = resource_id
+
+        id_map[resource_id] = resource_model
+        resource_set.add(resource_model)
+
+    def _stream_application(self, application_element):
+        smff_application = SMFFApplication()
+        self.smff_applications.add(smff_application)
+
+        smff_application.name = application_element.get("appV")
+        smff_application.id = int(application_element.get("appID"))
+        return smff_application
+
+    def _stream_profiles(self, element, task_model):
+        """ parses the scheduling parameter and profiles of a Task or TaskLink """
+        scheduling_parameter = element.iter("SchedulingParameter")
+        scheduling_parameter = next(scheduling_parameter)
+        if scheduling_parameter.get("name") == "SchedulingPriority":
+            task_model.scheduling_parameter = int(scheduling_parameter.get("priority"))
+        else:
+            raise InvalidSMFFXMLException("scheduling policy not recognized", scheduling_parameter)
+
+        for profile in element.iter("Profile"):
+            # same semantics as SMFFLoader._handle_profile()
+            if not bool(profile.get("active")):
+                continue
+
+            activation_pattern = next(profile.iter("ActivationPattern"))
+            name = activation_pattern.get("name")
+            if name == "PJActivation":
+                jitter = int(activation_pattern.get("activationJitter"))
+                period = int(activation_pattern.get("activationPeriod"))
+                task_model.in_event_model = model.PJdEventModel(P=period, J=jitter)
+            elif name != "EventActivation":
+                raise InvalidSMFFXMLException("activation pattern not recognized", activation_pattern)
+
+            task_model.wcet = int(profile.get("wcet"))
+            task_model.bcet = int(profile.get("bcet"))
+
+        # some tasks in smff have a wcet=0, these must be set to the highest priority
+        if task_model.wcet == 0:
+            task_model.scheduling_parameter = -1
+
+    def _stream_task(self, task_element, smff_application):
+        task_id = int(task_element.get("ID"))
+
+        task_model = model.Task(name=task_element.get("shortName"))
+        task_model.xml_node = None
+        task_model.smff_id = task_id
+        self._stream_profiles(task_element, task_model)
+
+        smff_application.id_to_task_pycpa[task_id] = task_model
+        smff_application.tasks_pycpa.add(task_model)
+
+    def _stream_task_link(self, task_link_element, smff_application):
+        link_id = int(task_link_element.get("ID"))
+
+        trgt_pycpa = smff_application.id_to_task_pycpa[int(task_link_element.get("trgt"))]
+        src_pycpa = smff_application.id_to_task_pycpa[int(task_link_element.get("src"))]
+
+        if link_id in smff_application.task_link_mapping:
+            task_model = model.Task(name=task_link_element.get("shortName"))
+            task_model.xml_node = None
+            task_model.smff_id = link_id
+            self._stream_profiles(task_link_element, task_model)
+
+            smff_application.id_to_link_pycpa[link_id] = task_model
+
+            # link all tasks: src -> link -> trgt
+            src_pycpa.link_dependent_task(task_model)
+            task_model.link_dependent_task(trgt_pycpa)
+
+            smff_application.links_pycpa.add(task_model)
+        else:
+            # no task just link src and trgt
+            src_pycpa.link_dependent_task(trgt_pycpa)
+
+    def _stream_mapping(self, mapping_element, smff_application):
+        for maptask in mapping_element.iter("mapTask"):
+            smff_application.task_mapping[int(maptask.get("tid"))] = int(maptask.get("rid"))
+
+        for maplink in mapping_element.iter("mapLink"):
+            lid = int(maplink.get("lid"))
+            if maplink.get("crid") is not None:
+                smff_application.task_link_mapping[lid] = int(maplink.get("crid"))
+            else:
+                logger.info("decided to skip link id %d, because it is mapped to computing resource %s" % (lid, maplink.get("rid")))
+
+    def annotate_results(self):
+        """ results are injected by the next write() """
+        self.annotate = True
+
+    def _write_analysis(self, generator):
+        """ writes the <Analysis> element to an XMLGenerator """
+        generator.startElement("Analysis", dict(options._opts_dict or dict()))
+
+        generator.startElement("Resources", {})
+        for resource_model in self.system.resources:
+            if resource_model in self.comm_resources_pycpa:
+                tag = "CommResource"
+            else:
+                tag = "Resource"
+            generator.startElement(tag, dict(self._resource_result_attributes(resource_model)))
+            generator.endElement(tag)
+        generator.endElement("Resources")
+
+        generator.startElement("Applications", {})
+        for smff_application in self.smff_applications:
+            generator.startElement("Application", {"appV" : str(smff_application.name),
+                                                   "appID" : str(smff_application.id)})
+            for tag, task_models in (("Task", smff_application.tasks_pycpa),
+                                     ("TaskLink", smff_application.links_pycpa)):
+                for task_model in task_models:
+                    generator.startElement(tag, dict(self._task_result_attributes(task_model)))
+                    generator.endElement(tag)
+            generator.endElement("Application")
+        generator.endElement("Applications")
+
+        generator.endElement("Analysis")
+
+    def write(self, filename):
+        """ copies the parsed file to filename,
+        including the analysis results if annotate_results() was called
+        """
+        write_analysis = None
+        if self.annotate:
+            write_analysis = self._write_analysis
+
+        with open(filename, 'wb') as f:
+            handler = _AnnotatingFilter(f, write_analysis)
+            parser = xml.sax.make_parser()
+            parser.setContentHandler(handler)
+            parser.setProperty(xml.sax.handler.property_lexical_handler, handler)
+            parser.parse(self.filename)
+
 # vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
@@ -0,0 +1,506 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Versioned snapshots of systems.
+
+A snapshot describes a System declaratively, i.e. by its structure
+(resources, tasks, junctions, links, paths, mutexes and constraints),
+the parameters of all elements and the event models of the source tasks.
+Schedulers, strategies and event models are stored by the name of their
+class and their attributes. Hence, snapshots do not depend on pickling
+the object graph (which is slow, deeply recursive and fails for lambdas)
+and can be loaded in other processes much faster than re-parsing the
+original input files.
+
+A snapshot file consists of a header (magic, format version) followed
+by a zlib-compressed JSON document. Attributes of model elements that
+cannot be represented (e.g. references to DOM nodes of a loader) are not
+stored. Analysis results and propagated event models are not stored either.
+
+Only classes and functions of pycpa and those registered with register()
+can be stored and loaded, i.e. loading a snapshot never imports other
+modules. Still, a snapshot sets arbitrary attributes of the elements it
+describes, so only load snapshots from trusted sources.
+
+Example::
+
+    snapshot.register(MyScheduler)
+    snapshot.dump(system, 'system.snap')
+    system = snapshot.load('system.snap')
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import division
+
+import importlib
+import json
+import logging
+import struct
+import sys
+import zlib
+
+from . import model
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PYCPASNP'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<8sH')
+
+# classes and functions outside of pycpa which may be stored ('module:name' -> obj)
+_registered = dict()
+
+# attributes which are stored as part of the structure (or not at all)
+_TASK_STRUCTURE = frozenset(['name', 'resource', 'path', 'mutex', 'next_tasks',
+                             'prev_task', 'in_event_model', 'analysis_results',
+                             'out_event_model', 'mapping', 'strategy'])
+_RESOURCE_STRUCTURE = frozenset(['name', 'tasks', 'scheduler'])
+_JUNCTION_STRUCTURE = frozenset(['name', 'strategy', 'prev_tasks', 'out_event_model',
+                                 'next_tasks', 'in_event_models', 'analysis_results',
+                                 'mapping'])
+_PATH_STRUCTURE = frozenset(['name', 'tasks'])
+# internal state of event models which is rebuilt by EventModel.__init__
+_EVENT_MODEL_STATE = frozenset(['en_caching', 'container',
+                                'delta_min_cache', 'delta_plus_cache',
+                                'eta_min_cache', 'eta_plus_cache',
+                                'eta_min_closed_cache', 'eta_plus_closed_cache'])
+
+
+class SnapshotError(Exception):
+    """ Raised if a system cannot be stored or a snapshot cannot be loaded """
+    pass
+
+
+class _Unencodable(Exception):
+    pass
+
+
+def _is_pycpa_module(module_name):
+    return module_name == 'pycpa' or module_name.startswith('pycpa.')
+
+
+def _ref(obj):
+    """ returns 'module:name' for a module-level class or function """
+    module = getattr(obj, '__module__', None)
+    name = getattr(obj, '__qualname__', getattr(obj, '__name__', None))
+    if name == '<lambda>' and module in sys.modules:
+        # module-level lambdas, e.g. schedulers.prio_low_wins_equal_fifo
+        for k, v in vars(sys.modules[module]).items():
+            if v is obj:
+                name = k
+                break
+    if module is None or name is None or '<' in name:
+        raise _Unencodable("%r is not a module-level class or function" % (obj,))
+    ref = "%s:%s" % (module, name)
+    if not _is_pycpa_module(module) and _registered.get(ref) is not obj:
+        raise _Unencodable("%s is not registered (see snapshot.register())" % ref)
+    return ref
+
+
+def register(obj):
+    """ Allows storing and loading the module-level class or function obj,
+    e.g. a custom scheduler or a priority comparison function
+    (classes and functions of pycpa are always allowed).
+    Must be called in every process which stores or loads such snapshots.
+    Returns obj, hence it can be used as a class decorator.
+    """
+    # _ref() requires the reference to be registered already
+    module = getattr(obj, '__module__', None)
+    name = getattr(obj, '__qualname__', getattr(obj, '__name__', None))
+    if module is None or name is None or '<' in name:
+        raise SnapshotError("%r is not a module-level class or function" % (obj,))
+    _registered["%s:%s" % (module, name)] = obj
+    return obj
+
+
+def _resolve(ref):
+    """ returns the class or function referenced by _ref() """
+    if ref in _registered:
+        return _registered[ref]
+    module_name, name = ref.split(':', 1)
+    if not _is_pycpa_module(module_name):
+        raise SnapshotError("cannot resolve %s: not registered "
+                            "(see snapshot.register())" % ref)
+    try:
+        obj = importlib.import_module(module_name)
+        for part in name.split('.'):
+            obj = getattr(obj, part)
+    except (ImportError, AttributeError) as e:
+        raise SnapshotError("cannot resolve %s: %s" % (ref, e))
+    return obj
+
+
+class _Encoder(object):
+    """ Converts a System into a JSON-compatible description """
+
+    def __init__(self):
+        # element -> ['t', index] or ['j', index]
+        self.refs = dict()
+
+    def value(self, v):
+        """ encodes an attribute value """
+        if v is None or isinstance(v, (bool, int, float)):
+            return v
+        if isinstance(v, type(u'')) or isinstance(v, str):
+            return v
+        if isinstance(v, list):
+            return [self.value(x) for x in v]
+        if isinstance(v, tuple):
+            return {'__tuple__': [self.value(x) for x in v]}
+        if isinstance(v, (set, frozenset)):
+            return {'__set__': [self.value(x) for x in v]}
+        if isinstance(v, dict):
+            for k in v:
+                if not isinstance(k, (type(u''), str)):
+                    raise _Unencodable("dict key %r" % (k,))
+            return {'__dict__': dict((k, self.value(x)) for k, x in v.items())}
+        if isinstance(v, model.EventModel):
+            return {'__event_model__': self.event_model(v)}
+        # functions of python 2 do not have __qualname__
+        if isinstance(v, type) or callable(v) and hasattr(v, '__name__'):
+            return {'__ref__': _ref(v)}
+        if isinstance(v, (model.Task, model.Junction, model.Resource,
+                          model.Path, model.System, model.Mutex)):
+            raise _Unencodable("reference to %r" % (v,))
+        if hasattr(v, '__dict__'):
+            return {'__object__': _ref(type(v)),
+                    'state': dict((k, self.value(x)) for k, x in vars(v).items())}
+        raise _Unencodable("value %r" % (v,))
+
+    def required(self, v, what):
+        """ encodes a value which is required to rebuild the system """
+        try:
+            return self.value(v)
+        except _Unencodable as e:
+            raise SnapshotError("cannot store %s: %s" % (what, e))
+
+    def attributes(self, obj, structure):
+        """ encodes all attributes of obj except those in structure """
+        attributes = dict()
+        for k, v in vars(obj).items():
+            if k in structure:
+                continue
+            try:
+                attributes[k] = self.value(v)
+            except _Unencodable as e:
+                logger.debug("attribute %s of %s not stored (%s)" % (k, obj, e))
+        return attributes
+
+    def event_model(self, em):
+        if isinstance(em, model.TraceEventModel):
+            return {'class': _ref(type(em)),
+                    'trace_points': self.value(list(em.trace_points)),
+                    'min_sample_size': em.min_sample_size,
+                    'min_additive': self.required(em.min_addititive, 'additive extension'),
+                    'max_additive': self.required(em.max_additive, 'additive extension')}
+
+        state = dict()
+        for k, v in vars(em).items():
+            if k in _EVENT_MODEL_STATE:
+                continue
+            try:
+                state[k] = self.value(v)
+            except _Unencodable as e:
+                raise SnapshotError("cannot store event model %s (%s): %s"
+                                    % (em, type(em).__name__, e))
+        return {'class': _ref(type(em)), 'state': state}
+
+    def system(self, system):
+        # collect all tasks and junctions reachable from resources and junctions
+        tasks = list()
+        junctions = list()
+        for j in sorted(system.junctions, key=lambda j: str(j.name)):
+            self.refs[j] = ['j', len(junctions)]
+            junctions.append(j)
+        resources = sorted(system.resources, key=lambda r: str(r.name))
+        for r in resources:
+            for t in sorted(r.tasks, key=lambda t: str(t.name)):
+                self.refs[t] = ['t', len(tasks)]
+                tasks.append(t)
+        # tasks which are not mapped to a resource
+        i = 0
+        while i < len(tasks) + len(junctions):
+            e = tasks[i] if i < len(tasks) else junctions[i - len(tasks)]
+            for n in sorted(e.next_tasks, key=lambda n: str(n.name)):
+                if n not in self.refs:
+                    if isinstance(n, model.Junction):
+                        self.refs[n] = ['j', len(junctions)]
+                        junctions.append(n)
+                    else:
+                        self.refs[n] = ['t', len(tasks)]
+                        tasks.append(n)
+            i += 1
+
+        mutexes = list()
+        mutex_index = dict()
+        for t in tasks:
+            if t.mutex is not None and t.mutex not in mutex_index:
+                mutex_index[t.mutex] = len(mutexes)
+                mutexes.append(t.mutex)
+
+        resource_index = dict((r, i) for i, r in enumerate(resources))
+        paths = sorted(system.paths, key=lambda p: str(p.name))
+        path_index = dict((p, i) for i, p in enumerate(paths))
+
+        desc = dict()
+        desc['name'] = system.name
+        desc['resources'] = [
+            {'name': r.name,
+             'scheduler': self.required(r.scheduler, 'scheduler of %s' % r.name),
+             'attributes': self.attributes(r, _RESOURCE_STRUCTURE)}
+            for r in resources]
+        desc['mutexes'] = [{'name': m.name} for m in mutexes]
+
+        desc['tasks'] = list()
+        for t in tasks:
+            t_desc = {'name': t.name,
+                      'class': _ref(type(t)),
+                      'resource': resource_index.get(t.resource),
+                      'mutex': mutex_index.get(t.mutex),
+                      'attributes': self.attributes(t, _TASK_STRUCTURE)}
+            if t.prev_task is None and t.in_event_model is not None:
+                t_desc['in_event_model'] = self.event_model(t.in_event_model)
+            if isinstance(t, model.Fork):
+                t_desc['strategy'] = self.required(t.strategy, 'strategy of %s' % t.name)
+                t_desc['mapping'] = [[self.refs[d], self.value(i)]
+                                     for d, i in t.mapping.items() if d in self.refs]
+            desc['tasks'].append(t_desc)
+
+        desc['junctions'] = list()
+        for j in junctions:
+            desc['junctions'].append(
+                {'name': j.name,
+                 'strategy': self.required(j.strategy, 'strategy of %s' % j.name),
+                 'mapping': [[self.refs[s], self.value(i)]
+                             for s, i in j.mapping.items() if s in self.refs],
+                 'attributes': self.attributes(j, _JUNCTION_STRUCTURE)})
+
+        desc['links'] = [[self.refs[e], self.refs[n]]
+                         for e in tasks + junctions
+                         for n in sorted(e.next_tasks, key=lambda n: str(n.name))]
+
+        desc['paths'] = [{'name': p.name,
+                          'tasks': [self.refs[t] for t in p.tasks],
+                          'attributes': self.attributes(p, _PATH_STRUCTURE)}
+                         for p in paths]
+
+        constraints = system.constraints
+        desc['constraints'] = {
+            'wcrt': [[self.refs[t], d] for t, d in constraints._wcrt_constraints.items()],
+            'path': [[path_index[p], d, n]
+                     for p, (d, n) in constraints._path_constraints.items()],
+            'backlog': [[self.refs[t], s] for t, s in constraints._backlog_constraints.items()],
+            'load': [[resource_index[r], l] for r, l in constraints._load_constraints.items()]}
+        return desc
+
+
+class _Decoder(object):
+    """ Builds a System from a description created by _Encoder """
+
+    def __init__(self):
+        self.resolved = dict()
+        # decoded tasks in the order of the description
+        self.tasks = list()
+
+    def resolve(self, ref):
+        """ cached _resolve() """
+        if ref not in self.resolved:
+            self.resolved[ref] = _resolve(ref)
+        return self.resolved[ref]
+
+    def value(self, v):
+        if isinstance(v, list):
+            return [self.value(x) for x in v]
+        if not isinstance(v, dict):
+            return v
+        if '__tuple__' in v:
+            return tuple(self.value(x) for x in v['__tuple__'])
+        if '__set__' in v:
+            return set(self.value(x) for x in v['__set__'])
+        if '__dict__' in v:
+            return dict((k, self.value(x)) for k, x in v['__dict__'].items())
+        if '__event_model__' in v:
+            return self.event_model(v['__event_model__'])
+        if '__ref__' in v:
+            return self.resolve(v['__ref__'])
+        if '__object__' in v:
+            cls = self.resolve(v['__object__'])
+            obj = cls.__new__(cls)
+            for k, x in v['state'].items():
+                setattr(obj, k, self.value(x))
+            return obj
+        raise SnapshotError("invalid value %r" % (v,))
+
+    def set_attributes(self, obj, attributes):
+        for k, v in attributes.items():
+            setattr(obj, k, self.value(v))
+
+    def event_model(self, desc):
+        cls = self.resolve(desc['class'])
+        if issubclass(cls, model.TraceEventModel):
+            return cls(trace_points=self.value(desc['trace_points']),
+                       min_sample_size=desc['min_sample_size'],
+                       min_additive=self.value(desc['min_additive']),
+                       max_additive=self.value(desc['max_additive']))
+
+        em = cls.__new__(cls)
+        # sets up the caches according to the current options
+        model.EventModel.__init__(em)
+        self.set_attributes(em, desc['state'])
+        return em
+
+    def system(self, desc):
+        system = model.System(desc['name'])
+
+        resources = list()
+        for r_desc in desc['resources']:
+            r = model.Resource(r_desc['name'], self.value(r_desc['scheduler']))
+            self.set_attributes(r, r_desc['attributes'])
+            resources.append(system.bind_resource(r))
+
+        mutexes = [model.Mutex(m_desc['name']) for m_desc in desc['mutexes']]
+
+        tasks = list()
+        for t_desc in desc['tasks']:
+            cls = self.resolve(t_desc['class'])
+            attributes = t_desc['attributes']
+            kwargs = dict()
+            if 'OutEventModelClass' in attributes:
+                # avoids looking up the default propagation method
+                kwargs['OutEventModelClass'] = self.value(attributes['OutEventModelClass'])
+            if 'strategy' in t_desc:
+                kwargs['strategy'] = self.value(t_desc['strategy'])
+            t = cls(t_desc['name'], **kwargs)
+            self.set_attributes(t, attributes)
+            if t_desc['resource'] is not None:
+                resources[t_desc['resource']].bind_task(t)
+            if t_desc['mutex'] is not None:
+                t.bind_mutex(mutexes[t_desc['mutex']])
+            if 'in_event_model' in t_desc:
+                t.in_event_model = self.event_model(t_desc['in_event_model'])
+            tasks.append(t)
+        self.tasks = tasks
+
+        junctions = list()
+        for j_desc in desc['junctions']:
+            j = model.Junction(j_desc['name'], self.value(j_desc['strategy']))
+            self.set_attributes(j, j_desc['attributes'])
+            junctions.append(system.bind_junction(j))
+
+        def element(ref):
+            kind, i = ref
+            return tasks[i] if kind == 't' else junctions[i]
+
+        for t, t_desc in zip(tasks, desc['tasks']):
+            for ref, identifier in t_desc.get('mapping', []):
+                t.map_task(element(ref), self.value(identifier))
+        for j, j_desc in zip(junctions, desc['junctions']):
+            for ref, identifier in j_desc['mapping']:
+                j.map_task(element(ref), self.value(identifier))
+
+        for src, dst in desc['links']:
+            element(src).link_dependent_task(element(dst))
+
+        paths = list()
+        for p_desc in desc['paths']:
+            # the tasks are already linked, hence we do not pass them to the CTOR
+            p = model.Path(p_desc['name'])
+            p.tasks = [element(ref) for ref in p_desc['tasks']]
+            for t in p.tasks:
+                t.path = p
+            self.set_attributes(p, p_desc['attributes'])
+            system.bind_path(p)
+            paths.append(p)
+
+        constraints = desc['constraints']
+        for ref, deadline in constraints['wcrt']:
+            system.constraints.add_wcrt_constraint(element(ref), deadline)
+        for i, deadline, n in constraints['path']:
+            system.constraints.add_path_constraint(paths[i], deadline, n)
+        for ref, size in constraints['backlog']:
+            system.constraints.add_backlog_constraint(element(ref), size)
+        for i, load in constraints['load']:
+            system.constraints.add_load_constraint(resources[i], load)
+
+        return system
+
+
+def to_dict(system, refs=None):
+    """ Returns the declarative (JSON-compatible) description of system.
+    If refs is a dict, it is filled with the reference of each task
+    and junction, i.e. ['t', i] for the i-th entry of the tasks
+    and ['j', i] for the i-th entry of the junctions of the description.
+    """
+    encoder = _Encoder()
+    desc = encoder.system(system)
+    if refs is not None:
+        refs.update(encoder.refs)
+    return desc
+
+
+def from_dict(desc, tasks=None):
+    """ Builds a System from a description returned by to_dict().
+    If tasks is a list, the tasks are appended in the order of the description.
+    """
+    decoder = _Decoder()
+    try:
+        system = decoder.system(desc)
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise SnapshotError("invalid snapshot: %r" % (e,))
+    if tasks is not None:
+        tasks.extend(decoder.tasks)
+    return system
+
+
+def dumps(system):
+    """ Returns the snapshot of system as bytes """
+    payload = json.dumps(to_dict(system), separators=(',', ':')).encode('utf-8')
+    return _HEADER.pack(MAGIC, FORMAT_VERSION) + zlib.compress(payload)
+
+
+def loads(data):
+    """ Builds a System from a snapshot created by dumps() """
+    if len(data) < _HEADER.size:
+        raise SnapshotError("not a pycpa snapshot")
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("not a pycpa snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotError("unsupported snapshot version %d (expected %d)"
+                            % (version, FORMAT_VERSION))
+    try:
+        desc = json.loads(zlib.decompress(data[_HEADER.size:]).decode('utf-8'))
+    except (zlib.error, ValueError) as e:
+        raise SnapshotError("corrupt snapshot: %s" % e)
+    return from_dict(desc)
+
+
+def dump(system, filename):
+    """ Writes the snapshot of system to filename """
+    data = dumps(system)
+    with open(filename, 'wb') as f:
+        f.write(data)
+
+
+def load(filename):
+    """ Loads a System from the snapshot file filename """
+    with open(filename, 'rb') as f:
+        return loads(f.read())
+
+
+def is_snapshot(filename):
+    """ Returns True if filename starts with the snapshot header """
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+# vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
@@ -16,6 +16,7 @@ Symta 1.4 loader
 from __future__ import absolute_import
 
 import xml.dom.minidom
+import xml.etree.ElementTree as ElementTree
 
 from . import model
 from . import schedulers
@@ -29,7 +30,9 @@ class InvalidSymtaXMLException (Exception):
         self.value = value
         self.dom_node = dom_node
     def __str__(self):
-        return repr(self.value + " in node " % self.dom_node.nodeName)
+        # minidom node or ElementTree element
+        name = getattr(self.dom_node, 'nodeName', None) or getattr(self.dom_node, 'tag', None)
+        return repr(self.value + " in node %s" % name)
 
 class SymtaLoader14(object):
     """ a simple SymTA/S xml loader
@@ -78,26 +81,31 @@ class SymtaLoader14(object):
         mappings = mapping_node.getElementsByTagName("map:task")
         for map in mappings:
             task_name = map.attributes['name'].nodeValue
-            task = self.task_map[task_name]
 
             actual_mapping_node = map.getElementsByTagName("actualMapping")[0]
             schedparam_node = actual_mapping_node.getElementsByTagName("schedparam")[0]
 
-            task.scheduling_parameter = int(schedparam_node.attributes['priority'].nodeValue)
+            priority = int(schedparam_node.attributes['priority'].nodeValue)
 
             resource_name = actual_mapping_node.attributes['name'].nodeValue
 
-            resource = self.resources_map[resource_name]
+            self._map_task(task_name, resource_name, priority)
 
-            assert resource in self.system.resources
+    def _map_task(self, task_name, resource_name, priority):
+        task = self.task_map[task_name]
+        task.scheduling_parameter = priority
 
-            resource.bind_task(task)
+        resource = self.resources_map[resource_name]
 
-            assert task in resource.tasks
-            task.bcet *= resource.speedup
-            task.wcet *= resource.speedup
+        assert resource in self.system.resources
 
-            logger.info("task %s, sched_param %d is mapped to %s", task.name, task.scheduling_parameter, resource_name)
+        resource.bind_task(task)
+
+        assert task in resource.tasks
+        task.bcet *= resource.speedup
+        task.wcet *= resource.speedup
+
+        logger.info("task %s, sched_param %d is mapped to %s", task.name, task.scheduling_parameter, resource_name)
 
     def _handle_architecture(self, architecture_node):
         cpu_nodes = architecture_node.getElementsByTagName("cpu")
@@ -117,12 +125,16 @@ class SymtaLoader14(object):
     def _handle_cpu(self, cpu_node):
         resource_name = cpu_node.attributes['name'].nodeValue
         scheduler_string = cpu_node.attributes['scheduler'].nodeValue
-        scheduler = self._get_scheduler_function(scheduler_string)
-
-        resource = self.system.bind_resource(model.Resource(resource_name, scheduler))
 
         speedup_node = cpu_node.getElementsByTagName("speedup")[0]
         speedup = self._handle_speedup(speedup_node)
+
+        return self._add_resource(resource_name, scheduler_string, speedup)
+
+    def _add_resource(self, resource_name, scheduler_string, speedup):
+        scheduler = self._get_scheduler_function(scheduler_string)
+
+        resource = self.system.bind_resource(model.Resource(resource_name, scheduler))
         resource.speedup = speedup
 
         self.resources.add(resource)
@@ -156,6 +168,9 @@ class SymtaLoader14(object):
         target_name = target_node.attributes['process'].nodeValue
         target_type_name = target_node.attributes['type'].nodeValue
 
+        self._connect(name, src_name, src_type_name, target_name, target_type_name)
+
+    def _connect(self, name, src_name, src_type_name, target_name, target_type_name):
         target = None
         if target_type_name == "task":
             target = self.task_map[target_name]
@@ -179,15 +194,19 @@ class SymtaLoader14(object):
         ports = task_node.getElementsByTagName("ports")[0]  # take first
         speedup = self._handle_speedup(task_node.getElementsByTagName("speedup")[0])  # take first
         bcet, wcet = self._handle_tcore(task_node.getElementsByTagName("tCore")[0])  # take first
+        # inport_list, outport_list = self._handle_ports(ports)
+        task = self._add_task(name, bcet, wcet, speedup)
+        task.dom_node = task_node
+        task.ports = ports  # used later to connect the event streams
+
+    def _add_task(self, name, bcet, wcet, speedup):
         bcet *= speedup
         wcet *= speedup
-        # inport_list, outport_list = self._handle_ports(ports)
         logger.info("new task %s, tcore: [%f, %f] speedfactor %f" % (name, bcet, wcet, speedup))
         task = model.Task(name=name, bcet=bcet, wcet=wcet, sched_param=None)
-        task.dom_node = task_node
-        task.ports = ports  # used later to connect the event streams
         self.tasks.add(task)
         self.task_map[name] = task
+        return task
 
     def _handle_tcore(self, tCoreNode):
         return self._handle_time_interval(tCoreNode.getElementsByTagName("timeinterval")[0])
@@ -213,6 +232,9 @@ class SymtaLoader14(object):
         ports = sourceNode.getElementsByTagName("ports")[0]
         inport_list, outport_list = self._handle_ports(ports)
         port_name, em = outport_list[0]
+        self._add_source(name, em)
+
+    def _add_source(self, name, em):
         em.name = name
         self.sources.add(em)
         self.sources_map[name] = em
@@ -262,16 +284,170 @@ class SymtaLoader14(object):
         mindist_node = standardeventmodel_node.getElementsByTagName("minDist")[0]
         mindist = self._handle_time_value(mindist_node.childNodes[1])
 
-        em = model.PJdEventModel()
-        em.set_PJd(period, jitter, mindist)
+        em = self._new_event_model(period, jitter, mindist)
         em.dom_node = standardeventmodel_node
 
         return em
 
+    def _new_event_model(self, period, jitter, mindist):
+        em = model.PJdEventModel()
+        em.set_PJd(period, jitter, mindist)
+        return em
+
     def _handle_speedup(self, speedup):
         factor = speedup.attributes['factor']
         return float(factor.nodeValue)
 
+def _local_name(tag):
+    """ strips the namespace from an ElementTree tag """
+    return tag.rsplit('}', 1)[-1]
+
+def _find(element, name):
+    """ returns the first descendant of element with the given local name
+    (like getElementsByTagName(name)[0])
+    """
+    for e in element.iter():
+        if e is not element and _local_name(e.tag) == name:
+            return e
+    raise InvalidSymtaXMLException("missing element %s" % name, element)
+
+def _findall(element, name):
+    """ returns all descendants of element with the given local name """
+    return [e for e in element.iter()
+            if e is not element and _local_name(e.tag) == name]
+
+class SymtaStreamLoader14(SymtaLoader14):
+    """ a streaming SymTA/S xml loader
+
+        Builds the same system as SymtaLoader14 in a single pass over the
+        file (xml.etree.ElementTree.iterparse). Every task, source, event
+        stream, cpu and mapping element is converted as soon as it has been
+        read and is discarded afterwards, so large projects can be loaded
+        without holding the whole document in memory.
+
+        If keep_dom is True, the ElementTree elements are retained and
+        stored in system.dom_node, task.dom_node and em.dom_node (note
+        that these are ElementTree elements, not minidom nodes).
+    """
+    def __init__(self, keep_dom=False):
+        SymtaLoader14.__init__(self)
+        self.keep_dom = keep_dom
+
+    def parse(self, filename):
+        # the elements we convert are children of these top-level sections
+        handlers = {
+            ('application', 'task') : self._stream_task,
+            ('application', 'source') : self._stream_source,
+            ('application', 'eventstream') : self._stream_eventstream,
+            ('architecture', 'cpu') : self._stream_cpu,
+            ('mapping', 'task') : self._stream_mapping,
+        }
+        # only the first occurrence of each section is used
+        done_sections = set()
+
+        # event streams and mappings refer to other elements by name,
+        # they are resolved at the end of the document
+        self._eventstreams = list()
+        self._mappings = list()
+
+        stack = list()
+        for event, element in ElementTree.iterparse(filename, events=('start', 'end')):
+            if event == 'start':
+                stack.append(element)
+                continue
+
+            stack.pop()
+            depth = len(stack)
+            if depth == 2:
+                section = _local_name(stack[1].tag)
+                if section not in done_sections:
+                    handler = handlers.get((section, _local_name(element.tag)))
+                    if handler is not None:
+                        handler(element)
+            elif depth == 1:
+                done_sections.add(_local_name(element.tag))
+
+            if not self.keep_dom and 0 < depth <= 2:
+                # discard the processed subtree of an item or section
+                element.clear()
+                stack[-1].remove(element)
+
+        for eventstream in self._eventstreams:
+            self._connect(*eventstream)
+
+        for mapping in self._mappings:
+            self._map_task(*mapping)
+
+        del self._eventstreams
+        del self._mappings
+
+        if self.keep_dom:
+            self.system.dom_node = element
+        return self.system
+
+    def _stream_task(self, task_element):
+        name = task_element.get('name')
+        speedup = float(_find(task_element, 'speedup').get('factor'))
+        timeinterval = _find(_find(task_element, 'tCore'), 'timeinterval')
+        bcet, wcet = self._stream_time_interval(timeinterval)
+        task = self._add_task(name, bcet, wcet, speedup)
+        if self.keep_dom:
+            task.dom_node = task_element
+            task.ports = _find(task_element, 'ports')
+
+    def _stream_source(self, source_element):
+        name = source_element.get('name')
+        ports = _find(source_element, 'ports')
+        # we assume there is only one port
+        outport = _find(ports, 'outputport')
+        em = self._stream_propagation_container(_find(outport, 'PropagationContainer'))
+        self._add_source(name, em)
+
+    def _stream_eventstream(self, eventstream_element):
+        src = _find(eventstream_element, 'src')
+        target = _find(eventstream_element, 'target')
+        self._eventstreams.append((eventstream_element.get('name'),
+                                   src.get('process'), src.get('type'),
+                                   target.get('process'), target.get('type')))
+
+    def _stream_cpu(self, cpu_element):
+        speedup = float(_find(cpu_element, 'speedup').get('factor'))
+        self._add_resource(cpu_element.get('name'), cpu_element.get('scheduler'), speedup)
+
+    def _stream_mapping(self, map_element):
+        actual_mapping = _find(map_element, 'actualMapping')
+        schedparam = _find(actual_mapping, 'schedparam')
+        self._mappings.append((map_element.get('name'),
+                               actual_mapping.get('name'),
+                               int(schedparam.get('priority'))))
+
+    def _stream_propagation_container(self, container_element):
+        propagation_elements = _find(container_element, 'PropagationElements')
+        em_propagation_element = _find(propagation_elements, 'EventModelPropagationElement')
+        standardeventmodel = _find(_find(em_propagation_element, 'myEventModel'),
+                                   'standardeventmodel')
+
+        period = self._stream_time_value(_find(standardeventmodel, 'period')[0])
+        jitter = self._stream_time_value(_find(standardeventmodel, 'jitter')[0])
+        mindist = self._stream_time_value(_find(standardeventmodel, 'minDist')[0])
+
+        em = self._new_event_model(period, jitter, mindist)
+        if self.keep_dom:
+            em.dom_node = standardeventmodel
+        return em
+
+    def _stream_time_interval(self, timeinterval_element):
+        timevalues = _findall(timeinterval_element, 'timevalue')
+        return (self._stream_time_value(timevalues[0]),
+                self._stream_time_value(timevalues[1]))
+
+    def _stream_time_value(self, timevalue_element):
+        # loss of precison due to hard coded devision (see SymtaLoader14)
+        assert _local_name(timevalue_element.tag) == 'timevalue'
+        numerator = float(timevalue_element.get('numerator'))
+        denominator = float(timevalue_element.get('denominator'))
+        return numerator / denominator
+
 class SymtaWriter(object):
     """ not implemented """
     pass
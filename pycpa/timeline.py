@@ -0,0 +1,136 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Timeline of an analysis run in the Chrome trace format.
+
+The timeline records begin and end events of the local analyses
+(analyze_task and compute_wcrt for each q) and of the event model
+propagation (including junctions).
+The resulting JSON file can be opened in chrome://tracing,
+https://ui.perfetto.dev or https://www.speedscope.app.
+
+Usage::
+
+    tl = timeline.Timeline('analysis_trace.json', sample=10)
+    analysis.analyze_system(s, timeline=tl)
+
+In order to keep the overhead (and the file size) bounded for large
+systems, only every sample-th local analysis or propagation is recorded
+(including all of its nested events) and recording stops after max_events.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import division
+
+import json
+import os
+import threading
+import timeit
+
+
+class Timeline(object):
+    """ Records a timeline of analysis events in the Chrome trace format """
+
+    def __init__(self, filename=None, sample=1, max_events=1000000):
+        """
+        :param filename: if not None, the timeline is written to this file
+            at the end of analysis.analyze_system()
+        :param sample: record only every sample-th top-level event
+            (local analysis or propagation) and its nested events
+        :type sample: integer
+        :param max_events: no new top-level events are recorded
+            once the timeline contains this many events
+        :type max_events: integer
+        """
+        assert sample >= 1
+        self.filename = filename
+        self.sample = sample
+        self.max_events = max_events
+
+        #: list of recorded trace events
+        self.events = list()
+
+        self._start = timeit.default_timer()
+        self._pid = os.getpid()
+        # number of top-level events seen (recorded or not)
+        self._count = 0
+        # whether the current top-level event is recorded
+        self._sampled = True
+        # names of the recorded events which have not ended yet
+        self._stack = list()
+
+    def _timestamp(self):
+        """ Microseconds since the creation of the timeline """
+        return (timeit.default_timer() - self._start) * 1e6
+
+    def begin(self, name, cat, args=None, sample=False):
+        """ Records the begin of an event.
+        Returns whether the event is recorded, which must be passed to end().
+
+        :param name: name of the event (e.g. the task name)
+        :param cat: category (e.g. 'analyze_task')
+        :param args: dict of additional information
+        :param sample: if True, this is a top-level event
+            for which the sampling decision is made.
+            Nested events are recorded only if their top-level event is.
+        """
+        if sample:
+            self._count += 1
+            self._sampled = (self._count - 1) % self.sample == 0 and \
+                len(self.events) < self.max_events
+        if not self._sampled:
+            return False
+
+        event = {'name': name, 'cat': cat, 'ph': 'B',
+                 'ts': self._timestamp(),
+                 'pid': self._pid, 'tid': threading.current_thread().ident}
+        if args is not None:
+            event['args'] = args
+        self.events.append(event)
+        self._stack.append((name, cat, event['tid']))
+        return True
+
+    def end(self, recorded, args=None):
+        """ Records the end of the event for which begin() returned recorded """
+        if not recorded:
+            return
+        self._end(args)
+
+    def _end(self, args=None):
+        name, cat, tid = self._stack.pop()
+        event = {'name': name, 'cat': cat, 'ph': 'E',
+                 'ts': self._timestamp(), 'pid': self._pid, 'tid': tid}
+        if args is not None:
+            event['args'] = args
+        self.events.append(event)
+
+    def close(self):
+        """ Ends all open events, e.g. after an exception """
+        while self._stack:
+            self._end({'aborted': True})
+
+    def to_dict(self):
+        """ Returns the timeline as a Chrome trace (JSON object format) """
+        self.close()
+        return {'traceEvents': self.events,
+                'displayTimeUnit': 'ms',
+                'otherData': {'generator': 'pycpa',
+                              'sample': self.sample}}
+
+    def write(self, filename=None):
+        """ Writes the timeline to filename (default: self.filename) """
+        if filename is None:
+            filename = self.filename
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+# vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
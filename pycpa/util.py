@@ -21,15 +21,48 @@ from __future__ import division
 
 
 import fractions
+import importlib
 import logging
-import random
 import math
+import random
 import itertools
 import functools
 from collections import deque
 
 logger = logging.getLogger("pycpa")
 
+
+class LazyModule(object):
+    """ Placeholder for a module which is imported on first attribute access.
+    This keeps heavy or optional dependencies (e.g. matplotlib)
+    out of the import time of modules which do not always need them.
+
+    :param name: name of the module, e.g. 'matplotlib.pyplot'
+    :param error: message of the ImportError raised if the module is missing
+    """
+
+    def __init__(self, name, error=None):
+        self._name = name
+        self._error = error
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError as e:
+                if self._error is None:
+                    raise
+                raise ImportError("%s (%s)" % (self._error, e))
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return "<lazy module '%s'>" % self._name
+
+
 # time bases
 ps = 1000000000000
 ns = 1000000000
@@ -75,6 +108,8 @@ def breadth_first_search(task, func=None, get_reachable_tasks=get_next_tasks):
 
     get_reachable_tasks(task) specifies a function which returns all tasks
     considered immediately reachable for a given task.
+
+    To query many tasks of the same graph, build a TaskGraph once instead.
     """
     marked = set()
     queue = deque()
@@ -90,59 +125,234 @@ def breadth_first_search(task, func=None, get_reachable_tasks=get_next_tasks):
         for e in get_reachable_tasks(v):
             if e not in marked:
                 if func is not None:
-                    func(task)
+                    func(e)
                 marked.add(e)
                 queue.append(e)
     return marked
 
 
+class TaskGraph(object):
+    """ Compact adjacency index of a task graph.
+
+    The graph consists of all tasks (and junctions) reachable from roots.
+    Nodes are numbered once, edges are stored as lists of node numbers.
+    Queries (BFS, distances) are linear in the size of the reachable part.
+    All-pairs reachability is computed once for all nodes
+    as bitsets (python integers) on the condensation into strongly
+    connected components, which also yields the cycles of the graph.
+
+    The index does not track changes of the graph, hence it must be
+    rebuilt after tasks have been linked or unlinked.
+
+    :param roots: start tasks (and junctions)
+    :param get_reachable_tasks: function which returns the successors of a task
+    """
+
+    def __init__(self, roots, get_reachable_tasks=get_next_tasks):
+        # node -> number
+        self.index = dict()
+        # number -> node
+        self.nodes = list()
+        # number -> list of successor numbers
+        self.succ = list()
+
+        for root in roots:
+            self._add(root)
+        i = 0
+        while i < len(self.nodes):
+            self.succ[i] = [self._add(n) for n in get_reachable_tasks(self.nodes[i])]
+            i += 1
+
+        self._components = None
+        self._component_of = None
+        self._reach = None
+
+    @classmethod
+    def from_system(cls, system):
+        """ Returns the TaskGraph of all tasks and junctions of system
+        (linked by next_tasks) """
+        roots = [t for r in system.resources for t in r.tasks]
+        roots.extend(system.junctions)
+        return cls(roots)
+
+    def _add(self, node):
+        i = self.index.get(node)
+        if i is None:
+            i = len(self.nodes)
+            self.index[node] = i
+            self.nodes.append(node)
+            self.succ.append(None)
+        return i
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node):
+        return node in self.index
+
+    def bfs(self, source):
+        """ Returns the nodes reachable from source (including source)
+        in breadth-first order """
+        start = self.index[source]
+        marked = bytearray(len(self.nodes))
+        marked[start] = 1
+        order = [start]
+        for v in order:
+            for w in self.succ[v]:
+                if not marked[w]:
+                    marked[w] = 1
+                    order.append(w)
+        return [self.nodes[i] for i in order]
+
+    def distances(self, source):
+        """ Returns a dict of the number of edges
+        from source to all reachable nodes """
+        start = self.index[source]
+        dist = [-1] * len(self.nodes)
+        dist[start] = 0
+        order = [start]
+        for v in order:
+            d = dist[v] + 1
+            for w in self.succ[v]:
+                if dist[w] < 0:
+                    dist[w] = d
+                    order.append(w)
+        return dict((self.nodes[i], dist[i]) for i in order)
+
+    def components(self):
+        """ Returns the strongly connected components as lists of nodes,
+        successors before predecessors (reverse topological order) """
+        if self._components is None:
+            self._tarjan()
+        return [[self.nodes[i] for i in c] for c in self._components]
+
+    def _tarjan(self):
+        """ iterative version of Tarjan's SCC algorithm """
+        n = len(self.nodes)
+        number = [-1] * n
+        low = [0] * n
+        on_stack = bytearray(n)
+        stack = list()
+        components = list()
+        component_of = [0] * n
+        counter = 0
+
+        for root in range(n):
+            if number[root] >= 0:
+                continue
+            number[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, iter(self.succ[root]))]
+            while work:
+                v, successors = work[-1]
+                descended = False
+                for w in successors:
+                    if number[w] < 0:
+                        number[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = 1
+                        work.append((w, iter(self.succ[w])))
+                        descended = True
+                        break
+                    elif on_stack[w] and number[w] < low[v]:
+                        low[v] = number[w]
+                if descended:
+                    continue
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    if low[v] < low[u]:
+                        low[u] = low[v]
+                if low[v] == number[v]:
+                    component = list()
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = 0
+                        component_of[w] = len(components)
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+
+        self._components = components
+        self._component_of = component_of
+
+    def cyclic_nodes(self):
+        """ Returns the set of nodes which are part of a cycle """
+        if self._components is None:
+            self._tarjan()
+        cyclic = set()
+        for c in self._components:
+            if len(c) > 1 or c[0] in self.succ[c[0]]:
+                cyclic.update(self.nodes[i] for i in c)
+        return cyclic
+
+    def has_cycle(self):
+        """ Returns True if the graph contains a cycle """
+        return len(self.cyclic_nodes()) > 0
+
+    def _reachability(self):
+        """ Returns the bitset of reachable nodes for each node """
+        if self._reach is None:
+            if self._components is None:
+                self._tarjan()
+            # components are in reverse topological order, i.e.
+            # the successors of a component are complete when it is visited
+            comp_reach = list()
+            for c in self._components:
+                mask = 0
+                for v in c:
+                    mask |= 1 << v
+                own = len(comp_reach)
+                for v in c:
+                    for w in self.succ[v]:
+                        cw = self._component_of[w]
+                        if cw != own:
+                            mask |= comp_reach[cw]
+                comp_reach.append(mask)
+            self._reach = [comp_reach[self._component_of[i]]
+                           for i in range(len(self.nodes))]
+        return self._reach
+
+    def reachable_mask(self, source):
+        """ Returns the nodes reachable from source (including source)
+        as a bitset of node numbers """
+        return self._reachability()[self.index[source]]
+
+    def num_reachable(self, source):
+        """ Returns the number of nodes reachable from source
+        (including source) """
+        return bin(self.reachable_mask(source)).count('1')
+
+    def is_reachable(self, source, target):
+        """ Returns True if target is reachable from source """
+        return (self.reachable_mask(source) >> self.index[target]) & 1 == 1
+
+    def reachable(self, source):
+        """ Returns the set of nodes reachable from source (including source) """
+        return set(self.bfs(source))
+
+
 def generate_distance_map(system):
     """ Precomputes a distance-map for all tasks in the system.
     """
+    graph = TaskGraph.from_system(system)
     dist = dict()
     for r in system.resources:
         for t in r.tasks:
-            dist[t] = dijkstra(t)
+            dist[t] = graph.distances(t)
     return dist
 
 def dijkstra(source):
-    """ Calculates a distance-map from the source node
-    based on the dijkstra algorithm
-    The edge weight is 1 for all linked tasks
+    """ Calculates a distance-map from the source node.
+    The edge weight is 1 for all linked tasks,
+    hence this is a breadth-first search (see TaskGraph.distances).
     """
-    dist = dict()
-    previous = dict()
-
-    # since we don't have a global view on the graph, we aquire a set of all
-    # nodes using BFS
-    nodes = breadth_first_search(source)
+    return TaskGraph([source]).distances(source)
 
-    for v in nodes:
-        dist[v] = float('inf')
-        previous[v] = None
-
-    # init source
-    dist[source] = 0
-
-    # working set of nodes to revisit
-    Q = nodes.copy()
-
-    while len(Q) > 0:
-        # get node with minimum distance
-        u = min(Q, key=lambda x: dist[x])
-
-        if dist[u] == float('inf'):
-            break  # all remaining vertices are inaccessible from source
-
-        Q.remove(u)
-
-        for v in u.next_tasks:  # where v has not yet been removed from Q.
-            alt = dist[u] + 1
-            if alt < dist[v]:
-                dist[v] = alt
-                previous[v] = u
-                Q.add(v)
-    return dist
 
 def additive_extension(additive_func, q, q_max, cache=None, cache_offset=1):
     """ Additive extension for event models.
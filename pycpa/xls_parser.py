@@ -19,7 +19,10 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import re
-import xlrd
+
+from . import util
+
+xlrd = util.LazyModule('xlrd', "xlrd is required for the XLS parser")
 
 
 def xls_letter_to_col(self, letters):
@@ -0,0 +1,85 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Approximate busy times (Scheduler.epsilon) are safe upper bounds
+"""
+
+from pycpa import analysis
+from pycpa import model
+from pycpa import options
+from pycpa import schedulers
+
+
+def _system(scheduler):
+    s = model.System()
+    r = s.bind_resource(model.Resource("R1", scheduler))
+    for i, (P, J, wcet) in enumerate([(7, 3, 1), (11, 0, 2), (13, 20, 1),
+                                      (50, 10, 4), (1000, 0, 40)]):
+        t = r.bind_task(model.Task("T%d" % i, wcet=wcet, bcet=1,
+                                   scheduling_parameter=i))
+        t.in_event_model = model.PJdEventModel(P=P, J=J)
+    return s
+
+
+def _wcrts(scheduler):
+    results = analysis.analyze_system(_system(scheduler))
+    return dict((t.name, r.wcrt) for t, r in results.items()), results
+
+
+def test_approximation():
+    for scheduler in (schedulers.SPPScheduler, analysis.Scheduler):
+        exact, _ = _wcrts(scheduler())
+        for epsilon in (0.5, 0.1, 0.01):
+            approx, results = _wcrts(scheduler(epsilon=epsilon))
+            for name in exact:
+                assert exact[name] <= approx[name] <= \
+                    exact[name] * (1 + epsilon) + 1
+
+    t = [t for t in results if t.name == "T4"][0]
+    assert 'epsilon=0.01' in results[t].b_wcrt['approximation']
+    assert results[t].epsilon == 0.01
+
+
+def test_approximation_lean():
+    # the approximation is recorded even without busy-window details
+    config = options.AnalysisConfig(lean=True)
+    for epsilon in (None, 0.1):
+        results = analysis.analyze_system(
+            _system(schedulers.SPPScheduler(epsilon=epsilon)), config=config)
+        for r in results.values():
+            assert r.epsilon == epsilon
+
+
+def test_approximation_unsupported():
+    for scheduler in (schedulers.SPPSchedulerRoundRobin,
+                      schedulers.SPPSchedulerCorrelatedRox,
+                      schedulers.RoundRobinScheduler,
+                      schedulers.TDMAScheduler):
+        try:
+            scheduler(epsilon=0.1)
+            assert False, scheduler
+        except ValueError:
+            pass
+        scheduler(epsilon=None)
+
+
+def test_eta_plus_linear():
+    for em in (model.PJdEventModel(P=10, J=25),
+               model.CTEventModel(c=3, T=20)):
+        a, r = em.eta_plus_linear(4)
+        for w in range(0, 500, 7):
+            assert em.eta_plus(w) <= a + r * w
+
+
+if __name__ == "__main__":
+    test_approximation()
+    test_approximation_lean()
+    test_approximation_unsupported()
+    test_eta_plus_linear()
@@ -0,0 +1,75 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Runs the batch analysis on a directory which also contains the results table
+"""
+
+import csv
+import os
+import shutil
+import sys
+import tempfile
+
+from pycpa import model
+from pycpa import schedulers
+from pycpa import snapshot
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bin'))
+import batch_analysis
+
+
+def _system(name, wcet):
+    s = model.System(name)
+    r1 = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    t11 = r1.bind_task(model.Task("T11", wcet=wcet, bcet=1, scheduling_parameter=1))
+    t12 = r1.bind_task(model.Task("T12", wcet=2, bcet=1, scheduling_parameter=2))
+    t11.in_event_model = model.PJdEventModel(P=10, J=0)
+    t12.in_event_model = model.PJdEventModel(P=10, J=0)
+    return s
+
+
+def _rows(results_file):
+    with open(results_file) as f:
+        return list(csv.DictReader(f))
+
+
+def test_batch_analysis():
+    directory = tempfile.mkdtemp()
+    try:
+        results_file = os.path.join(directory, 'results.csv')
+        snapshot.dump(_system("ok", 3), os.path.join(directory, 'ok.snapshot'))
+        # load > 1
+        snapshot.dump(_system("overload", 9),
+                      os.path.join(directory, 'overload.snapshot'))
+        with open(os.path.join(directory, 'notes.txt'), 'w') as f:
+            f.write("no model\n")
+
+        batch_analysis.batch_analysis([directory], results_file, jobs=1)
+        rows = _rows(results_file)
+        status = dict((os.path.basename(r['model']), r['status']) for r in rows)
+        assert status == {'ok.snapshot': batch_analysis.OK,
+                          'overload.snapshot': batch_analysis.NOT_SCHEDULABLE}
+        wcrt = dict((r['task'], r['wcrt']) for r in rows
+                    if r['status'] == batch_analysis.OK)
+        assert wcrt == {'T11': '3', 'T12': '5'}
+
+        # resume: only the new model is analyzed,
+        # the results table itself is not taken for a model
+        snapshot.dump(_system("new", 4), os.path.join(directory, 'new.snapshot'))
+        batch_analysis.batch_analysis([directory], results_file, jobs=1)
+        resumed = _rows(results_file)
+        assert resumed[:len(rows)] == rows
+        assert [os.path.basename(r['model']) for r in resumed[len(rows):]] == \
+            ['new.snapshot', 'new.snapshot']
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    test_batch_analysis()
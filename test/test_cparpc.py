@@ -0,0 +1,386 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+XML-RPC server: loading systems, analysis jobs, retrieval of results
+and lifetime of the server-side objects
+"""
+
+import json
+import threading
+import time
+
+from twisted.internet import defer
+from twisted.internet import reactor
+from twisted.python import failure
+from twisted.web import xmlrpc
+
+from pycpa import cparpc
+
+
+def _system(server):
+    s = server.xmlrpc_new_system("S")
+    r1 = server.xmlrpc_new_resource(s, "R1")
+    server.xmlrpc_assign_scheduler(r1, "spp")
+    t11 = server.xmlrpc_new_task(r1, "T11", {'wcet': 2, 'bcet': 1,
+                                             'scheduling_parameter': 1})
+    t12 = server.xmlrpc_new_task(r1, "T12", {'wcet': 3, 'bcet': 1,
+                                             'scheduling_parameter': 2})
+    server.xmlrpc_assign_pjd_event_model(t11, 10, 0, 0)
+    server.xmlrpc_assign_pjd_event_model(t12, 20, 0, 0)
+    return s, r1, t11, t12
+
+
+def _rejected(call, *args, **kwargs):
+    code = kwargs.get('code', cparpc.GENERAL_ERROR)
+    try:
+        call(*args)
+    except xmlrpc.Fault as e:
+        return e.faultCode == code
+    return False
+
+
+@defer.inlineCallbacks
+def _scenario(server, release):
+    s, r1, t11, t12 = _system(server)
+    other, _, other_task, _ = _system(server)
+
+    job = server.xmlrpc_submit_analysis(s)
+    assert server.xmlrpc_job_status(job) == cparpc.AnalysisJob.RUNNING
+    assert _rejected(server.xmlrpc_job_result, job, False,
+                     code=cparpc.JOB_PENDING)
+
+    assert _rejected(server.xmlrpc_set_attribute, t11, 'wcet', 5)
+    assert _rejected(server.xmlrpc_assign_pjd_event_model, t11, 5, 0, 0)
+    assert _rejected(server.xmlrpc_assign_ct_event_model, t11, 2, 10, 1)
+    assert _rejected(server.xmlrpc_assign_scheduler, r1, "spp")
+    assert _rejected(server.xmlrpc_link_task, t11, t12)
+    assert _rejected(server.xmlrpc_new_task, r1, "T13")
+    assert _rejected(server.xmlrpc_new_resource, s, "R2")
+    assert _rejected(server.xmlrpc_new_path, s, "P", [t11, t12])
+    assert _rejected(server.xmlrpc_analyze_system, s)
+    assert _rejected(server.xmlrpc_submit_analysis, s)
+    assert server.xmlrpc_get_attribute(t11, 'wcet') == 2
+
+    # other systems can still be modified
+    server.xmlrpc_set_attribute(other_task, 'wcet', 3)
+
+    pending = server.xmlrpc_job_result(job)
+    release.set()
+    job_rid = yield pending
+    assert server.xmlrpc_job_status(job) == cparpc.AnalysisJob.DONE
+    assert server.xmlrpc_job_result(job) == job_rid
+    assert server.xmlrpc_get_task_result(job_rid, t11)['wcrt'] == 2
+    assert server.xmlrpc_get_task_result(job_rid, t12)['wcrt'] == 5
+
+    server.xmlrpc_set_attribute(t11, 'wcet', 5)
+    rid = server.xmlrpc_analyze_system(s)
+    assert server.xmlrpc_get_task_result(rid, t11)['wcrt'] == 5
+
+    # successful jobs are released with their results
+    assert server.xmlrpc_job_status(job) == cparpc.AnalysisJob.DONE
+    server.xmlrpc_release(job_rid)
+    assert _rejected(server.xmlrpc_job_status, job, code=cparpc.INVALID_ID)
+
+    # failed jobs are released once the fault has been returned
+    server.xmlrpc_set_attribute(t12, 'wcet', 50)
+    job = server.xmlrpc_submit_analysis(s)
+    try:
+        yield server.xmlrpc_job_result(job)
+    except xmlrpc.Fault as e:
+        assert e.faultCode == cparpc.NOT_SCHEDULABLE
+    else:
+        assert False, "unschedulable system not reported"
+    assert _rejected(server.xmlrpc_job_status, job, code=cparpc.INVALID_ID)
+    server.xmlrpc_set_attribute(t12, 'wcet', 3)
+
+
+def test_no_modification_while_analyzing():
+    server = cparpc.CPARPC()
+
+    # keep the job running until the checks have been done
+    release = threading.Event()
+    analyze = server._analyze
+
+    def _blocking_analyze(*args):
+        release.wait(10)
+        return analyze(*args)
+    server._analyze = _blocking_analyze
+
+    outcome = list()
+
+    def _run():
+        d = _scenario(server, release)
+        d.addBoth(outcome.append)
+        d.addBoth(lambda _: reactor.stop())
+
+    reactor.callWhenRunning(_run)
+    timeout = reactor.callLater(30, reactor.stop)
+    reactor.run(installSignalHandlers=False)
+    if timeout.active():
+        timeout.cancel()
+
+    assert len(outcome) == 1, "job did not finish"
+    if isinstance(outcome[0], failure.Failure):
+        outcome[0].raiseException()
+
+
+def test_get_all_results():
+    server = cparpc.CPARPC()
+    s, r1, t11, t12 = _system(server)
+    other, _, other_task, _ = _system(server)
+    server.xmlrpc_link_task(t11, t12)
+    p = server.xmlrpc_new_path(s, "P", [t11, t12])
+    rid = server.xmlrpc_analyze_system(s)
+    server.xmlrpc_analyze_system(other)
+
+    # default fields, only the tasks of the analyzed system
+    all_results = server.xmlrpc_get_all_results(rid)
+    assert sorted(all_results['tasks']) == sorted([t11, t12])
+    for t in (t11, t12):
+        expected = server.xmlrpc_get_task_result(rid, t)
+        assert all_results['tasks'][t] == dict(
+            (f, expected[f]) for f in ['wcrt', 'bcrt', 'max_backlog', 'q_wcrt'])
+    assert all_results['paths'] == {}
+
+    fields = ['wcrt', 'busy_times', 'b_wcrt']
+    rows = server.xmlrpc_get_all_results(rid, fields, [p], 2)
+    assert sorted(rows['tasks'][t12]) == sorted(fields)
+    assert rows['tasks'][t12]['busy_times'] == \
+        server.xmlrpc_get_task_result(rid, t12)['busy_times']
+    latencies = [list(server.xmlrpc_end_to_end_latency(p, rid, n))
+                 for n in (1, 2)]
+    assert rows['paths'] == {p: latencies}
+
+    columns = server.xmlrpc_get_all_results(rid, fields, [p], 2, True)
+    assert columns['tasks']['ids'] == sorted([t11, t12])
+    for f in fields:
+        assert columns['tasks'][f] == [rows['tasks'][t][f]
+                                       for t in columns['tasks']['ids']]
+    assert columns['paths'][p] == {'bcl': [l[0] for l in latencies],
+                                   'wcl': [l[1] for l in latencies]}
+
+    # only result fields can be requested
+    for f in ['clean', 'b_wcrt_str', '_busy_times', '__class__', 'name']:
+        assert _rejected(server.xmlrpc_get_all_results, rid, [f])
+    assert _rejected(server.xmlrpc_get_all_results, rid, None, [other_task],
+                     code=cparpc.INVALID_ID)
+
+
+_system_desc = {
+    'name': 'S',
+    'resources': [
+        {'name': 'R1', 'scheduler': 'spp',
+         'tasks': [
+            {'name': 'T11',
+             'attributes': {'wcet': 5, 'bcet': 2, 'scheduling_parameter': 1},
+             'event_model': {'type': 'pjd', 'P': 30, 'J': 5}},
+            {'name': 'T12',
+             'attributes': {'wcet': 3, 'bcet': 1, 'scheduling_parameter': 2},
+             'event_model': {'type': 'ct', 'c': 2, 'T': 40, 'dmin': 1}}]},
+        {'name': 'R2', 'scheduler': 'spp', 'attributes': {'speedup': 1},
+         'tasks': [
+            {'name': 'T21', 'key': 'T21',
+             'attributes': {'wcet': 4, 'bcet': 4, 'scheduling_parameter': 1}},
+            {'name': 'T22',
+             'attributes': {'wcet': 6, 'bcet': 2, 'scheduling_parameter': 2}}]}],
+    'junctions': [{'name': 'J1', 'strategy': 'or'}],
+    'links': [['T11', 'T21'], ['T11', 'J1'], ['T12', 'J1'], ['J1', 'T22']],
+    'paths': [{'name': 'P1', 'tasks': ['T11', 'T21']}]}
+
+
+def _rpc_build(server):
+    """ Builds the system of _system_desc with the individual RPCs """
+    s = server.xmlrpc_new_system('S')
+    r1 = server.xmlrpc_new_resource(s, 'R1')
+    server.xmlrpc_assign_scheduler(r1, 'spp')
+    r2 = server.xmlrpc_new_resource(s, 'R2', {'speedup': 1})
+    server.xmlrpc_assign_scheduler(r2, 'spp')
+    tasks = {
+        'T11': server.xmlrpc_new_task(r1, 'T11', {'wcet': 5, 'bcet': 2,
+                                                  'scheduling_parameter': 1}),
+        'T12': server.xmlrpc_new_task(r1, 'T12', {'wcet': 3, 'bcet': 1,
+                                                  'scheduling_parameter': 2}),
+        'T21': server.xmlrpc_new_task(r2, 'T21', {'wcet': 4, 'bcet': 4,
+                                                  'scheduling_parameter': 1}),
+        'T22': server.xmlrpc_new_task(r2, 'T22', {'wcet': 6, 'bcet': 2,
+                                                  'scheduling_parameter': 2})}
+    server.xmlrpc_assign_pjd_event_model(tasks['T11'], 30, 5, 0)
+    server.xmlrpc_assign_ct_event_model(tasks['T12'], 2, 40, 1)
+    j1 = server.xmlrpc_new_junction(s, 'J1', 'or')
+    server.xmlrpc_link_task(tasks['T11'], tasks['T21'])
+    server.xmlrpc_link_task(tasks['T11'], j1)
+    server.xmlrpc_link_task(tasks['T12'], j1)
+    server.xmlrpc_link_task(j1, tasks['T22'])
+    p1 = server.xmlrpc_new_path(s, 'P1', [tasks['T11'], tasks['T21']])
+    return s, tasks, p1
+
+
+def test_load_system():
+    server = cparpc.CPARPC()
+    s, tasks, p1 = _rpc_build(server)
+    rid = server.xmlrpc_analyze_system(s)
+
+    for desc in (_system_desc, json.dumps(_system_desc)):
+        id_map = server.xmlrpc_load_system(desc)
+        assert sorted(id_map['resources']) == ['R1', 'R2']
+        assert sorted(id_map['tasks']) == sorted(tasks)
+        assert list(id_map['junctions']) == ['J1']
+        assert list(id_map['paths']) == ['P1']
+        assert server.xmlrpc_get_attribute(id_map['resources']['R2'],
+                                           'speedup') == 1
+
+        loaded_rid = server.xmlrpc_analyze_system(id_map['system'])
+        for key, tid in tasks.items():
+            assert server.xmlrpc_get_task_result(
+                loaded_rid, id_map['tasks'][key]) == \
+                server.xmlrpc_get_task_result(rid, tid)
+        for n in (1, 3):
+            assert server.xmlrpc_end_to_end_latency(
+                id_map['paths']['P1'], loaded_rid, n) == \
+                server.xmlrpc_end_to_end_latency(p1, rid, n)
+
+
+def test_load_system_errors():
+    server = cparpc.CPARPC()
+    n_objects = len(server._objects)
+
+    def _invalid(code, **changes):
+        desc = json.loads(json.dumps(_system_desc))
+        for k, v in changes.items():
+            desc[k] = v
+        assert _rejected(server.xmlrpc_load_system, desc, code=code)
+        # partially created systems are discarded
+        assert len(server._objects) == n_objects
+
+    resources = json.loads(json.dumps(_system_desc['resources']))
+    resources[1]['scheduler'] = 'edf'
+    _invalid(cparpc.INVALID_SCHEDULER, resources=resources)
+
+    _invalid(cparpc.INVALID_ID, links=[['T11', 'T31']])
+    _invalid(cparpc.INVALID_ID, links=[['J2', 'T22']])
+    _invalid(cparpc.INVALID_ID, paths=[{'name': 'P1', 'tasks': ['T11', 'J1']}])
+    _invalid(cparpc.GENERAL_ERROR, junctions=[{'name': 'J1', 'strategy': 'xor'}])
+    _invalid(cparpc.GENERAL_ERROR, junctions=[{'name': 'T11'}])
+
+    resources = json.loads(json.dumps(_system_desc['resources']))
+    resources[0]['tasks'][1]['event_model'] = {'type': 'ct', 'T': 40}
+    _invalid(cparpc.INVALID_EVENT_MODEL_DESC, resources=resources)
+
+    assert _rejected(server.xmlrpc_load_system, '{"name": ')
+
+
+def test_sessions():
+    server = cparpc.CPARPC()
+    session1 = server.xmlrpc_open_session()
+    session2 = server.xmlrpc_open_session()
+    s1 = server.xmlrpc_new_system("S", session1)
+    s2 = server.xmlrpc_new_system("S", session2)
+    r1 = server.xmlrpc_new_resource(s1, "R1")
+    t11 = server.xmlrpc_new_task(r1, "T11")
+    r2 = server.xmlrpc_new_resource(s2, "R1")
+    assert s1.startswith(session1 + '.') and r1.startswith(session1 + '.')
+
+    server.xmlrpc_close_session(session1)
+    for obj_id in (s1, r1, t11):
+        assert _rejected(server.xmlrpc_get_attribute, obj_id, 'name',
+                         code=cparpc.INVALID_ID)
+    assert server.xmlrpc_get_attribute(r2, 'name') == 'R1'
+
+    assert _rejected(server.xmlrpc_close_session, session1,
+                     code=cparpc.INVALID_ID)
+    assert _rejected(server.xmlrpc_new_system, "S", session1,
+                     code=cparpc.INVALID_ID)
+    server.xmlrpc_close_session(session2)
+    assert len(server._objects) == 0
+
+
+def test_release():
+    server = cparpc.CPARPC()
+    s, r1, t11, t12 = _system(server)
+    rid = server.xmlrpc_analyze_system(s)
+
+    # a released task is still part of its system
+    server.xmlrpc_release(t12)
+    assert _rejected(server.xmlrpc_get_attribute, t12, 'wcet',
+                     code=cparpc.INVALID_ID)
+    assert len(server._objects[rid]) == 2
+
+    # releasing the system releases everything created from it
+    server.xmlrpc_release(s)
+    for obj_id in (s, r1, t11, rid):
+        assert _rejected(server.xmlrpc_release, obj_id, code=cparpc.INVALID_ID)
+    assert len(server._objects) == 0
+    assert server._results_size_total == 0
+
+
+def _new_results(server, s, t11, n):
+    """ Analyzes s n times (toggling the WCET of t11 between 1 and 2)
+    and returns the results ids """
+    results = list()
+    for i in range(n):
+        wcet = server.xmlrpc_get_attribute(t11, 'wcet')
+        server.xmlrpc_set_attribute(t11, 'wcet', 3 - wcet)
+        results.append(server.xmlrpc_analyze_system(s))
+    return results
+
+
+def test_results_budget():
+    server = cparpc.CPARPC()
+    s, r1, t11, t12 = _system(server)
+    rid = server.xmlrpc_analyze_system(s)
+    size = server._results_size(server._objects[rid])
+    server.xmlrpc_release(rid)
+
+    server.results_memory_budget = 2 * size
+    rids = _new_results(server, s, t11, 2)
+    assert server._results_size_total == 2 * size
+
+    # least-recently used results are evicted
+    server.xmlrpc_get_task_result(rids[0], t11)
+    rids += _new_results(server, s, t11, 1)
+    assert rids[0] in server._objects and rids[2] in server._objects
+    assert _rejected(server.xmlrpc_get_task_result, rids[1], t11,
+                     code=cparpc.INVALID_ID)
+    assert server._results_size_total == 2 * size
+
+    # results which exceed the budget on their own are not kept
+    server.results_memory_budget = size - 1
+    rids = _new_results(server, s, t11, 1)
+    assert rids[0] not in server._objects
+    assert server._results_size_total == 0
+    assert server.xmlrpc_get_attribute(t11, 'wcet') == 2
+
+
+def test_results_ttl():
+    server = cparpc.CPARPC(results_ttl=3600)
+    s, r1, t11, t12 = _system(server)
+    rids = _new_results(server, s, t11, 2)
+    assert server.xmlrpc_get_task_result(rids[0], t11)['wcrt'] == 1
+
+    # expired results are evicted when accessed or when results are stored
+    server.results_ttl = 0
+    time.sleep(0.01)
+    assert _rejected(server.xmlrpc_get_task_result, rids[0], t11,
+                     code=cparpc.INVALID_ID)
+    assert rids[1] in server._objects
+    _new_results(server, s, t11, 1)
+    assert rids[1] not in server._objects
+    assert server._results_size_total == \
+        sum(size for size, _ in server._results_lru.values())
+
+if __name__ == "__main__":
+    test_no_modification_while_analyzing()
+    test_get_all_results()
+    test_load_system()
+    test_load_system_errors()
+    test_sessions()
+    test_release()
+    test_results_budget()
+    test_results_ttl()
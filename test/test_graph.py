@@ -0,0 +1,80 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+DOT output of graph_system
+"""
+
+import os
+import shutil
+import tempfile
+
+from pycpa import graph
+from pycpa import model
+from pycpa import schedulers
+
+
+def _system():
+    s = model.System()
+    r1 = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    r2 = s.bind_resource(model.Resource("R2", schedulers.SPPScheduler()))
+    t11 = r1.bind_task(model.Task("T11", wcet=1, bcet=1, scheduling_parameter=1))
+    t12 = r1.bind_task(model.Task("T12", wcet=1, bcet=1, scheduling_parameter=2))
+    t21 = r2.bind_task(model.Task("T21", wcet=1, bcet=1, scheduling_parameter=1))
+    t22 = r2.bind_task(model.Task("T22", wcet=1, bcet=1, scheduling_parameter=2))
+    t11.link_dependent_task(t21)
+    t12.link_dependent_task(t22)
+    t11.in_event_model = model.PJdEventModel(P=10, J=0)
+    t12.in_event_model = model.PJdEventModel(P=10, J=0)
+    return s
+
+
+def test_dotgraph():
+    dot = graph.graph_system(_system()).string()
+    assert dot.startswith('strict digraph {\n') and dot.endswith('}\n')
+    assert 'subgraph "cluster_R1"' in dot
+    assert '"T11" -> "T21"' in dot
+    # the event model is shared by T11 and T12
+    assert dot.count('"P=10 J=0 d=0"[') == 1
+
+
+def test_collapsed_resources():
+    dot = graph.graph_system(_system(), max_cluster_size=1).string()
+    assert 'cluster_' not in dot
+    assert '"T11"' not in dot
+    assert '(2 tasks)' in dot
+    # edges between collapsed resources are drawn once
+    assert dot.count('"R1" -> "R2"') == 1
+
+
+def test_draw():
+    g = graph.graph_system(_system())
+    directory = tempfile.mkdtemp()
+    try:
+        # a layout program which stores its input
+        dot_file = os.path.join(directory, 'in.dot')
+        g.draw(os.path.join(directory, 'out.pdf'),
+               prog='sh -c "cat > %s" --' % dot_file)
+        with open(dot_file) as f:
+            assert f.read() == g.string()
+
+        try:
+            g.draw(os.path.join(directory, 'out.pdf'), prog='false')
+        except IOError:
+            pass
+        else:
+            assert False, "failed layout program not reported"
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    test_dotgraph()
+    test_collapsed_resources()
+    test_draw()
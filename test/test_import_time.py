@@ -0,0 +1,71 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Optional dependencies must not be imported before they are used.
+Run this file to measure the import time of the analysis core.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+# seconds for importing model, analysis and schedulers in a fresh interpreter
+# (only reported when run as a script, as it depends on the machine)
+IMPORT_TIME_BUDGET = 0.1
+
+HEAVY_MODULES = ['argparse', 'matplotlib', 'simpy', 'networkx', 'xlrd',
+                 'twisted']
+
+_script = """
+import json, sys, time
+start = time.time()
+import pycpa.model, pycpa.analysis, pycpa.schedulers
+core = time.time() - start
+import pycpa.plot, pycpa.simulation, pycpa.nxamalthea, pycpa.xls_parser
+pycpa.analysis.analyze_system(pycpa.model.System())
+print(json.dumps({'time': core, 'modules': sorted(m.split('.')[0] for m in sys.modules)}))
+"""
+
+
+_parser_script = """
+import json, sys
+from pycpa import options
+before = 'argparse' in sys.modules
+options.parser.add_argument('--model', type=str, default='m')
+options.init_pycpa(implicit=True)
+print(json.dumps({'before': before, 'model': options.get_opt('model'),
+                  'timeout': options.get_opt('timeout')}))
+"""
+
+
+def _run(script=_script):
+    root = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+    env = dict(os.environ, PYTHONPATH=root)
+    out = subprocess.check_output([sys.executable, '-c', script], env=env)
+    return json.loads(out.decode().splitlines()[-1])
+
+
+def test_lazy_imports():
+    modules = _run()['modules']
+    for m in HEAVY_MODULES:
+        assert m not in modules, "%s imported eagerly" % m
+
+
+def test_lazy_parser():
+    # scripts add their arguments to options.parser, which is built then
+    run = _run(_parser_script)
+    assert run == {'before': False, 'model': 'm', 'timeout': float('inf')}
+
+
+if __name__ == "__main__":
+    runs = [_run() for _ in range(3)]
+    print("import time: %.1f ms (budget %.1f ms)" %
+          (min(r['time'] for r in runs) * 1000, IMPORT_TIME_BUDGET * 1000))
@@ -0,0 +1,152 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Incremental re-analysis must yield the same results as a full analysis
+"""
+
+import copy
+
+from pycpa import model
+from pycpa import analysis
+from pycpa import schedulers
+from pycpa import cparpc
+
+
+def _system(wcet_t21):
+    s = model.System()
+    r1 = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    r2 = s.bind_resource(model.Resource("R2", schedulers.SPPScheduler()))
+
+    t11 = r1.bind_task(model.Task("T11", wcet=10, bcet=5, scheduling_parameter=1))
+    t12 = r1.bind_task(model.Task("T12", wcet=3, bcet=1, scheduling_parameter=2))
+    t21 = r2.bind_task(model.Task("T21", wcet=wcet_t21, bcet=2, scheduling_parameter=1))
+    t22 = r2.bind_task(model.Task("T22", wcet=9, bcet=4, scheduling_parameter=2))
+
+    t11.link_dependent_task(t21)
+    t12.link_dependent_task(t22)
+
+    t11.in_event_model = model.PJdEventModel(P=30, J=5)
+    t12.in_event_model = model.PJdEventModel(P=15, J=6)
+
+    return s, [t11, t12, t21, t22]
+
+
+def _results(task_results, tasks):
+    return [(task_results[t].wcrt, task_results[t].bcrt,
+             task_results[t].busy_times) for t in tasks]
+
+
+def test_incremental():
+    s, tasks = _system(2)
+    task_results = analysis.analyze_system(s)
+    previous = _results(task_results, tasks)
+
+    # increase the wcet of T21 and only re-analyze the affected tasks
+    t21 = tasks[2]
+    t21.wcet = 5
+    previous_results = dict((t, copy.copy(r)) for t, r in task_results.items())
+    incremental = analysis.analyze_system(s, previous_results,
+                                          dirty_tasks=[t21])
+
+    s_ref, tasks_ref = _system(5)
+    reference = analysis.analyze_system(s_ref)
+
+    assert _results(incremental, tasks) == _results(reference, tasks_ref)
+    assert _results(incremental, tasks) != previous
+
+
+def _rpc_system(server, wcet):
+    """ Two resources whose tasks activate higher-priority tasks
+    on the other resource, i.e. the interference forms a loop """
+    s = server.xmlrpc_new_system("S")
+    r1 = server.xmlrpc_new_resource(s, "R1")
+    r2 = server.xmlrpc_new_resource(s, "R2")
+    server.xmlrpc_assign_scheduler(r1, "spp")
+    server.xmlrpc_assign_scheduler(r2, "spp")
+
+    a = server.xmlrpc_new_task(r1, "A", {'wcet': wcet, 'bcet': 1,
+                                         'scheduling_parameter': 2})
+    x = server.xmlrpc_new_task(r1, "X", {'wcet': 2, 'bcet': 1,
+                                         'scheduling_parameter': 1})
+    c = server.xmlrpc_new_task(r2, "C", {'wcet': wcet, 'bcet': 1,
+                                         'scheduling_parameter': 2})
+    y = server.xmlrpc_new_task(r2, "Y", {'wcet': 2, 'bcet': 1,
+                                         'scheduling_parameter': 1})
+    server.xmlrpc_assign_pjd_event_model(a, 10, 0, 0)
+    server.xmlrpc_assign_pjd_event_model(c, 10, 0, 0)
+    server.xmlrpc_link_task(a, y)
+    server.xmlrpc_link_task(c, x)
+    return s, [a, x, c, y]
+
+
+def _rpc_wcrts(server, system_id, tasks):
+    rid = server.xmlrpc_analyze_system(system_id)
+    return [server.xmlrpc_get_task_result(rid, t)['wcrt'] for t in tasks]
+
+
+def _rpc_reanalyze(wcet_before, wcet_after):
+    """ Returns the wcrts of the re-analysis after changing the wcets
+    of A and C and the wcrts of a fresh analysis """
+    server = cparpc.CPARPC()
+    s, tasks = _rpc_system(server, wcet_before)
+    _rpc_wcrts(server, s, tasks)
+    server.xmlrpc_set_attribute(tasks[0], 'wcet', wcet_after)
+    server.xmlrpc_set_attribute(tasks[2], 'wcet', wcet_after)
+    reanalysis = _rpc_wcrts(server, s, tasks)
+
+    server_ref = cparpc.CPARPC()
+    s_ref, tasks_ref = _rpc_system(server_ref, wcet_after)
+    return reanalysis, _rpc_wcrts(server_ref, s_ref, tasks_ref)
+
+
+def test_rpc_decrease_in_loop():
+    # continuing from the previous fixed point would yield [7, 2, 7, 2]
+    reanalysis, reference = _rpc_reanalyze(5, 3)
+    assert reference == [5, 2, 5, 2]
+    assert reanalysis == reference
+
+
+def test_rpc_increase_in_loop():
+    server = cparpc.CPARPC()
+    s, tasks = _rpc_system(server, 3)
+    _rpc_wcrts(server, s, tasks)
+    server.xmlrpc_set_attribute(tasks[0], 'wcet', 5)
+    assert server._changes[s] == set([server._objects[tasks[0]]])
+
+    reanalysis, reference = _rpc_reanalyze(3, 5)
+    assert reanalysis == reference
+
+
+def test_rpc_unchanged_and_priority():
+    server = cparpc.CPARPC()
+    s, tasks = _rpc_system(server, 3)
+    rid = server.xmlrpc_analyze_system(s)
+
+    # setting the current value is no change
+    server.xmlrpc_set_attribute(tasks[0], 'wcet', 3)
+    server.xmlrpc_set_attribute(tasks[1], 'scheduling_parameter', 1)
+    assert server.xmlrpc_analyze_system(s) == rid
+
+    # a changed priority is re-analyzed from scratch
+    server.xmlrpc_set_attribute(tasks[0], 'scheduling_parameter', 0)
+    assert server._changes[s] is None
+    reanalysis = _rpc_wcrts(server, s, tasks)
+
+    server_ref = cparpc.CPARPC()
+    s_ref, tasks_ref = _rpc_system(server_ref, 3)
+    server_ref.xmlrpc_set_attribute(tasks_ref[0], 'scheduling_parameter', 0)
+    assert reanalysis == _rpc_wcrts(server_ref, s_ref, tasks_ref)
+
+
+if __name__ == "__main__":
+    test_incremental()
+    test_rpc_decrease_in_loop()
+    test_rpc_increase_in_loop()
+    test_rpc_unchanged_and_priority()
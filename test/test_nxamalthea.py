@@ -0,0 +1,92 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Parses a small Amalthea model with and without streaming
+and converts it to a pyCPA system
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+
+from pycpa import nxamalthea
+
+amalthea_file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             "..", "data", "amalthea_test.xml")
+
+# (resource, wcet, bcet, scheduling_parameter, period) of each task
+expected_tasks = {
+    'Task_10ms': ('Scheduler_Core0', 6500, 4000, '1', 10000000),
+    'Task_20ms': ('Scheduler_Core0', 15000, 10000, '2', 20000000),
+    'Task_Sporadic': ('Scheduler_Core1', 2800, 1500, '3', 700000),
+}
+
+
+def _graph(streaming):
+    parser = nxamalthea.NxAmaltheaParser(amalthea_file, streaming=streaming)
+    return parser.parse_all()
+
+
+def _graph_data(G):
+    return (sorted(G.nodes(data=True), key=str),
+            sorted(G.edges(data=True), key=str))
+
+
+def _tasks(s):
+    return dict((t.name, (r.name, t.wcet, t.bcet, t.scheduling_parameter,
+                          t.in_event_model.P))
+                for r in s.resources for t in r.tasks)
+
+
+def test_streaming():
+    G = _graph(streaming=False)
+    assert _graph_data(_graph(streaming=True)) == _graph_data(G)
+    assert len(G.nodes()) == 12
+
+
+def test_converter():
+    for streaming in (False, True):
+        converter = nxamalthea.NxConverter(_graph(streaming))
+        assert _tasks(converter.get_cpa_sys()) == expected_tasks
+
+    out_dir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(out_dir, "tasks.csv")
+        converter.write_to_csv(filename)
+        with open(filename) as f:
+            rows = dict((r['task_name'], (r['resource'], int(r['wcet']),
+                                          int(r['bcet']),
+                                          r['scheduling_parameter'],
+                                          int(r['period'])))
+                        for r in csv.DictReader(f))
+        assert rows == expected_tasks
+    finally:
+        shutil.rmtree(out_dir)
+
+
+def test_index_update():
+    G = _graph(streaming=False)
+    converter = nxamalthea.NxConverter(G)
+    assert converter.get_task_params('Task_20ms')['wcet'] == 15000
+
+    # added edges are picked up automatically
+    G.add_edge('Task_20ms', 'Runnable_D', TYPE=nxamalthea.MAPPING)
+    assert converter.get_task_params('Task_20ms')['wcet'] == 15800
+
+    # changed attributes require clear_index()
+    G.nodes['Runnable_C']['wcet'] = 16000
+    converter.clear_index()
+    assert converter.get_task_params('Task_20ms')['wcet'] == 16800
+
+if __name__ == "__main__":
+    test_streaming()
+    test_converter()
+    test_index_update()
@@ -0,0 +1,103 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Decomposition into independent components and their parallel analysis
+"""
+
+from pycpa import analysis
+from pycpa import junctions
+from pycpa import model
+from pycpa import parallel
+from pycpa import path_analysis
+from pycpa import schedulers
+
+
+def _system(wcet=2):
+    """ Two ECUs, the second one has a junction and a mutex """
+    s = model.System()
+    r = dict((n, s.bind_resource(model.Resource(n, schedulers.SPPScheduler())))
+             for n in ["E1R1", "E1R2", "E2R1", "E2R2", "E2R3"])
+
+    def task(name, res, prio, wcet=wcet):
+        return r[res].bind_task(model.Task(name, wcet=wcet, bcet=1,
+                                           scheduling_parameter=prio))
+
+    a = [task("A1", "E1R1", 1), task("A2", "E1R2", 1)]
+    b = [task("B1", "E1R1", 2), task("B2", "E1R2", 2)]
+    a[0].in_event_model = model.PJdEventModel(P=10, J=2)
+    b[0].in_event_model = model.PJdEventModel(P=15, J=0)
+    s.bind_path(model.Path("A", a))
+    s.bind_path(model.Path("B", b))
+
+    c1, c2 = task("C1", "E2R1", 1), task("C2", "E2R2", 1)
+    c1.in_event_model = model.PJdEventModel(P=20, J=5)
+    c2.in_event_model = model.PJdEventModel(P=30, J=5)
+    j = s.bind_junction(model.Junction("J", junctions.ORJoin()))
+    c1.link_dependent_task(j)
+    c2.link_dependent_task(j)
+    c3 = task("C3", "E2R3", 1, 3)
+    j.link_dependent_task(c3)
+
+    # coupled to C3 by the mutex only
+    d = task("D", "E2R1", 2)
+    d.in_event_model = model.PJdEventModel(P=50)
+    m = model.Mutex("M")
+    c3.bind_mutex(m)
+    d.bind_mutex(m)
+
+    # an isolated task
+    e = s.bind_resource(model.Resource("E3", schedulers.SPPScheduler()))
+    e.bind_task(model.Task("E", wcet=1, bcet=1, scheduling_parameter=1))\
+        .in_event_model = model.PJdEventModel(P=10)
+    s.constraints.add_wcrt_constraint(c3, 100)
+    return s
+
+
+def _summary(results):
+    return dict((t.name, (r.wcrt, r.bcrt, list(r.busy_times), r.b_wcrt_str()))
+                for t, r in results.items())
+
+
+def test_components():
+    s = _system()
+    names = [sorted(e.name for e in c) for c in s.components()]
+    assert names == [["C1", "C2", "C3", "D", "J"],
+                     ["A1", "A2", "B1", "B2"],
+                     ["E"]]
+
+
+def test_parallel_analysis():
+    expected = _summary(analysis.analyze_system(_system()))
+
+    s = _system()
+    results = parallel.analyze_system(s, processes=2)
+    assert _summary(results) == expected
+    # the event models are propagated in this process
+    for p in s.paths:
+        assert path_analysis.end_to_end_latency(p, results, 2)[1] > 0
+    tasks = dict((t.name, t) for t in results)
+    assert tasks["C3"].in_event_model is not None
+    # the interference of C1 on D refers to the task C1 of this process
+    assert tasks["C1"] in results[tasks["D"]].b_wcrt
+
+
+def test_parallel_not_schedulable():
+    s = _system(wcet=9)
+    try:
+        parallel.analyze_system(s, processes=2)
+        assert False, "overload not detected"
+    except analysis.NotSchedulableException as e:
+        assert "load" in str(e)
+
+
+if __name__ == "__main__":
+    test_components()
+    test_parallel_analysis()
+    test_parallel_not_schedulable()
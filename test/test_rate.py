@@ -0,0 +1,75 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Long-term event rates (EventModel.rate) match the sampled load
+"""
+
+import random
+
+from pycpa import analysis
+from pycpa import junctions
+from pycpa import model
+from pycpa import propagation
+from pycpa import schedulers
+
+
+def _sampled(em, n):
+    return float(n - 1) / em.delta_min(n)
+
+
+def _trace():
+    random.seed(1)
+    trace = [0]
+    for _ in range(200):
+        trace.append(trace[-1] + random.randint(5, 15))
+    return model.TraceEventModel(trace)
+
+
+def test_rate():
+    pjd = model.PJdEventModel(P=10, J=25)
+    ct = model.CTEventModel(c=3, T=20)
+    trace = _trace()
+    ors = junctions.OREventModel([model.PJdEventModel(P=10, J=5),
+                                  model.PJdEventModel(P=7, J=50)])
+
+    assert pjd.rate() == 0.1
+    assert model.PJdEventModel(P=10, dmin=20).rate() == 0.05
+    assert ct.rate() == 0.15
+    assert ors.rate() == pjd.rate() + 1. / 7
+    assert model.EventModel().rate() is None
+
+    # the sampled load converges to the rate from above
+    for em in (pjd, ct, trace, ors):
+        for n in (100, 500):
+            assert em.rate() <= _sampled(em, n) <= em.rate() * 1.1
+        assert em.load(10000) == em.rate()
+
+
+def test_propagated_rate():
+    s = model.System()
+    r = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    t1 = r.bind_task(model.Task("T1", wcet=3, bcet=1, scheduling_parameter=1))
+    t2 = r.bind_task(model.Task("T2", wcet=4, bcet=2, scheduling_parameter=2))
+    t1.in_event_model = model.PJdEventModel(P=10, J=5)
+    t2.in_event_model = model.PJdEventModel(P=20)
+    results = analysis.analyze_system(s)
+
+    for method in (propagation.JitterPropagationEventModel,
+                   propagation.BusyWindowPropagationEventModel,
+                   propagation.OptimalPropagationEventModel):
+        em = method(t2, results)
+        assert em.rate() == 0.05
+        assert em.rate() <= _sampled(em, 200)
+    assert r.load() == 0.3 + 0.2
+
+
+if __name__ == "__main__":
+    test_rate()
+    test_propagated_rate()
@@ -0,0 +1,113 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Analysis state in a RunContext instead of the model
+"""
+
+import threading
+
+from pycpa import analysis
+from pycpa import junctions
+from pycpa import model
+from pycpa import options
+from pycpa import path_analysis
+from pycpa import propagation
+from pycpa import schedulers
+
+
+def _system():
+    s = model.System()
+    r1 = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    r2 = s.bind_resource(model.Resource("R2", schedulers.SPPScheduler()))
+
+    def task(r, name, wcet, prio):
+        return r.bind_task(model.Task(
+            name, wcet=wcet, bcet=wcet, scheduling_parameter=prio,
+            OutEventModelClass=propagation.JitterPropagationEventModel))
+
+    t1 = task(r1, "T1", 10, 1)
+    t2 = task(r1, "T2", 5, 2)
+    t3 = task(r2, "T3", 20, 1)
+    t4 = task(r2, "T4", 5, 2)
+    t1.in_event_model = model.PJdEventModel(P=100, J=250)
+    t2.in_event_model = model.PJdEventModel(P=70, J=0)
+    j = s.bind_junction(model.Junction("J", junctions.ORJoin()))
+    t1.link_dependent_task(t3)
+    t1.link_dependent_task(j)
+    t2.link_dependent_task(j)
+    j.link_dependent_task(t4)
+    s.bind_path(model.Path("P", [t1, t3]))
+    return s
+
+
+def _summary(results):
+    return dict((t.name, (r.wcrt, r.bcrt, list(r.busy_times)))
+                for t, r in results.items())
+
+
+def _analyze(propagation_method, context=None):
+    s = _system()
+    config = options.AnalysisConfig(propagation=propagation_method)
+    results = analysis.analyze_system(s, config=config, context=context)
+    return s, results
+
+
+def test_run_context():
+    s, expected = _analyze('jitter_dmin')
+    path = list(s.paths)[0]
+    latency = path_analysis.end_to_end_latency(path, expected, 2)
+
+    context = model.RunContext()
+    s, results = _analyze('jitter_dmin', context)
+    assert _summary(results) == _summary(expected)
+
+    # the model is not changed by the analysis
+    tasks = dict((t.name, t) for r in s.resources for t in r.tasks)
+    j = list(s.junctions)[0]
+    assert tasks["T3"].in_event_model is None
+    assert tasks["T1"].analysis_results is None
+    assert j.out_event_model is None and len(j.in_event_models) == 0
+
+    with context:
+        assert tasks["T3"].in_event_model is not None
+        assert tasks["T1"].analysis_results is results[tasks["T1"]]
+        assert len(j.in_event_models) == 2
+        path = list(s.paths)[0]
+        assert path_analysis.end_to_end_latency(path, results, 2) == latency
+
+
+def test_concurrent_runs():
+    expected = dict((m, _summary(_analyze(m)[1]))
+                    for m in ('jitter', 'jitter_dmin'))
+    assert expected['jitter'] != expected['jitter_dmin']
+
+    s = _system()
+    results = dict()
+
+    def run(method):
+        config = options.AnalysisConfig(propagation=method)
+        for _ in range(20):
+            r = analysis.analyze_system(s, config=config,
+                                        context=model.RunContext())
+            results.setdefault(method, list()).append(_summary(r))
+
+    threads = [threading.Thread(target=run, args=(m,)) for m in expected]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for m in expected:
+        assert all(r == expected[m] for r in results[m])
+
+
+if __name__ == "__main__":
+    test_run_context()
+    test_concurrent_runs()
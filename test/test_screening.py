@@ -0,0 +1,97 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Early rejection of infeasible systems if check_violations is set
+"""
+
+import pytest
+
+from pycpa import analysis
+from pycpa import model
+from pycpa import options
+from pycpa import schedulers
+
+
+def _system():
+    s = model.System()
+    r = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    t1 = r.bind_task(model.Task("T1", wcet=10, bcet=1, scheduling_parameter=1))
+    t2 = r.bind_task(model.Task("T2", wcet=30, bcet=1, scheduling_parameter=2))
+    t1.in_event_model = model.PJdEventModel(P=20, J=0)
+    # large jitter, i.e. many activations in the busy window of T2
+    t2.in_event_model = model.PJdEventModel(P=100, J=1000)
+    return s, t1, t2
+
+
+def _analyze(s, stats=None):
+    config = options.AnalysisConfig(check_violations=True)
+    return analysis.analyze_system(s, config=config, stats=stats)
+
+
+def test_screening():
+    s, t1, t2 = _system()
+    # wcet of T2 plus one activation of T1
+    assert t2.resource.scheduler.wcrt_lower_bound(t2) == 40
+    s.constraints.add_wcrt_constraint(t2, 39)
+
+    stats = analysis.AnalysisStats()
+    with pytest.raises(analysis.NotSchedulableException):
+        _analyze(s, stats)
+    assert len(stats.tasks) == 0
+
+
+def test_deadline_exit():
+    s, t1, t2 = _system()
+    wcrt = analysis.analyze_system(s)[t2].wcrt
+    q_max = len(t2.analysis_results.busy_times) - 1
+    assert q_max > 5
+
+    s, t1, t2 = _system()
+    s.constraints.add_wcrt_constraint(t2, 100)
+    assert wcrt > 100
+    stats = analysis.AnalysisStats()
+    with pytest.raises(analysis.NotSchedulableException):
+        _analyze(s, stats)
+    # stopped before all activations of the busy window were analyzed
+    assert stats.tasks[t2].b_plus_calls < q_max
+
+    # met constraints do not change the results
+    s, t1, t2 = _system()
+    s.constraints.add_wcrt_constraint(t2, wcrt)
+    assert _analyze(s)[t2].wcrt == wcrt
+
+
+def test_screening_interference():
+    s, t1, t2 = _system()
+    # T1 interferes 3 times with the first activation of T2
+    assert t2.resource.scheduler.wcrt_lower_bound(t2, 59) == 60
+    assert t2.resource.scheduler.wcrt_lower_bound(t2, 1000) == 60
+    s.constraints.add_wcrt_constraint(t2, 59)
+
+    stats = analysis.AnalysisStats()
+    with pytest.raises(analysis.NotSchedulableException):
+        _analyze(s, stats)
+    assert len(stats.tasks) == 0
+
+    # the bound never exceeds the wcrt
+    s, t1, t2 = _system()
+    t3 = t2.resource.bind_task(model.Task("T3", wcet=1, bcet=1,
+                                          scheduling_parameter=3))
+    t1.link_dependent_task(t3)
+    wcrt = analysis.analyze_system(s)
+    for t in (t1, t2, t3):
+        assert t.resource.scheduler.wcrt_lower_bound(t, float('inf')) <= \
+            wcrt[t].wcrt
+
+
+if __name__ == "__main__":
+    test_screening()
+    test_screening_interference()
+    test_deadline_exit()
@@ -0,0 +1,96 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Simulation with and without streaming the execution windows to a trace sink
+"""
+
+import os
+import shutil
+import tempfile
+
+import matplotlib
+matplotlib.use('Agg')
+
+from pycpa import analysis
+from pycpa import model
+from pycpa import plot
+from pycpa import schedulers
+from pycpa import simulation
+
+
+def _system():
+    s = model.System()
+    r1 = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    t11 = r1.bind_task(model.Task("T11", wcet=5, bcet=5, scheduling_parameter=1))
+    t12 = r1.bind_task(model.Task("T12", wcet=9, bcet=1, scheduling_parameter=2))
+    t11.link_dependent_task(t12)
+    t11.in_event_model = model.PJdEventModel(P=30, J=60)
+    return s, r1, t11, t12
+
+
+def _simulate(r1, t12, trace_sink=None):
+    """ Simulates the busy window of t12 and returns the execution windows
+    of all tasks and the activations kept by the simulated tasks """
+    simmodel = simulation.ResourceModel(r1, trace_sink=trace_sink)
+    scheduler = simulation.SimSPP(name="SPP", env=simmodel.env)
+    simmodel.runModel(task=t12, scheduler=scheduler)
+    windows = dict((t.name, list(t.q_exec_windows)) for t in r1.tasks)
+    activations = sum(len(st.activations) for st in scheduler.simtasks)
+    return windows, activations
+
+
+def test_trace_sink():
+    s, r1, t11, t12 = _system()
+    task_results = analysis.analyze_system(s)
+
+    windows, activations = _simulate(r1, t12)
+    assert len(windows['T11']) > 1
+    assert activations > 0
+
+    # in-memory sink
+    memory_windows, activations = _simulate(r1, t12,
+                                            simulation.ExecutionTraceSink())
+    assert memory_windows == windows
+    assert activations == 0
+
+    directory = tempfile.mkdtemp()
+    try:
+        # file sink
+        sink = simulation.ExecutionTraceSink(os.path.join(directory, 'trace'))
+        file_windows, activations = _simulate(r1, t12, sink)
+        assert file_windows == windows
+        assert activations == 0
+
+        # q_exec_windows of the tasks are views on the trace
+        assert isinstance(t11.q_exec_windows, simulation._ExecWindowsView)
+        file_name = os.path.join(directory, 'gantt.pdf')
+        plot.plot_gantt([t11, t12], task_results, task=t12, show=False,
+                        file_name=file_name)
+        assert os.path.getsize(file_name) > 0
+        sink.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_trace_sink_integer_times():
+    sink = simulation.ExecutionTraceSink()
+    task = model.Task("T11")
+    sink.write(task, 0, 0, 5.0)
+    try:
+        sink.write(task, 1, 5, 7.5)
+    except ValueError:
+        pass
+    else:
+        assert False, "fractional time accepted"
+    assert list(sink.records()) == [(task, 0, 0, 5)]
+
+if __name__ == "__main__":
+    test_trace_sink()
+    test_trace_sink_integer_times()
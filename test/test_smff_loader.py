@@ -0,0 +1,99 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Compares the streaming SMFF loader and writer with the DOM-based loader
+"""
+
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as ElementTree
+
+from pycpa import analysis
+from pycpa import options
+from pycpa import smff_loader
+
+path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "data",
+                    "smff_system.xml")
+
+
+def _summary(s):
+    results = analysis.analyze_system(s)
+    return sorted((r.name, t.name, t.bcet, t.wcet, t.scheduling_parameter,
+                   results[t].wcrt, sorted(n.name for n in t.next_tasks))
+                  for r in s.resources for t in r.tasks)
+
+
+def _task_results(filename):
+    analysis_element = ElementTree.parse(filename).getroot().find("Analysis")
+    return sorted(tuple(sorted(e.attrib.items()))
+                  for e in analysis_element.iter() if e.tag in ("Task", "TaskLink"))
+
+
+def test_stream_loader():
+    options.init_pycpa(implicit=True)
+    out_dir = tempfile.mkdtemp()
+    try:
+        loader = smff_loader.SMFFLoader()
+        expected = _summary(loader.parse(path))
+        loader.annotate_results()
+        loader.write(os.path.join(out_dir, "dom.xml"))
+
+        stream_loader = smff_loader.SMFFStreamLoader()
+        assert _summary(stream_loader.parse(path)) == expected
+        stream_loader.annotate_results()
+        stream_loader.write(os.path.join(out_dir, "stream.xml"))
+
+        assert _task_results(os.path.join(out_dir, "stream.xml")) == \
+            _task_results(os.path.join(out_dir, "dom.xml"))
+
+        # annotating an annotated file replaces the old results
+        stream_loader = smff_loader.SMFFStreamLoader()
+        stream_loader.parse(os.path.join(out_dir, "stream.xml"))
+        _summary(stream_loader.system)
+        stream_loader.annotate_results()
+        stream_loader.write(os.path.join(out_dir, "stream2.xml"))
+        root = ElementTree.parse(os.path.join(out_dir, "stream2.xml")).getroot()
+        assert len(root.findall("Analysis")) == 1
+    finally:
+        shutil.rmtree(out_dir)
+
+
+def test_stream_comments():
+    options.init_pycpa(implicit=True)
+    out_dir = tempfile.mkdtemp()
+    try:
+        # comments (in and after elements) are copied by write()
+        with open(path, 'rb') as f:
+            data = f.read().decode('utf-8')
+        data = data.replace('<Platform>', '<!-- platform \u00b5C --><Platform>', 1)
+        data = data.replace('<Applications>', '<Applications><!-- apps -->', 1)
+        commented = os.path.join(out_dir, "commented.xml")
+        with open(commented, 'wb') as f:
+            f.write(data.encode('utf-8'))
+
+        stream_loader = smff_loader.SMFFStreamLoader()
+        analysis.analyze_system(stream_loader.parse(commented))
+        stream_loader.annotate_results()
+        stream_loader.write(os.path.join(out_dir, "stream.xml"))
+
+        with open(os.path.join(out_dir, "stream.xml"), 'rb') as f:
+            written = f.read().decode('utf-8')
+        assert '<!-- platform \u00b5C --><Platform>' in written
+        assert '<Applications><!-- apps -->' in written
+        assert len(ElementTree.parse(os.path.join(out_dir, "stream.xml"))
+                   .getroot().findall("Analysis")) == 1
+    finally:
+        shutil.rmtree(out_dir)
+
+
+if __name__ == "__main__":
+    test_stream_loader()
+    test_stream_comments()
@@ -0,0 +1,130 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Round-trips systems through snapshots and compares the analysis results
+"""
+
+import os
+import shutil
+import tempfile
+
+from pycpa import analysis
+from pycpa import junctions
+from pycpa import model
+from pycpa import path_analysis
+from pycpa import schedulers
+from pycpa import snapshot
+
+
+def _system():
+    s = model.System("snapshot")
+    r1 = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    r2 = s.bind_resource(model.Resource("R2", schedulers.SPNPScheduler(ctx_switch_overhead=1)))
+
+    t11 = r1.bind_task(model.Task("T11", wcet=10, bcet=5, scheduling_parameter=1))
+    t12 = r1.bind_task(model.Fork("T12", wcet=3, bcet=1, scheduling_parameter=2))
+    t21 = r2.bind_task(model.Task("T21", wcet=2, bcet=2, scheduling_parameter=1))
+    t22 = r2.bind_task(model.Task("T22", wcet=9, bcet=4, scheduling_parameter=2))
+
+    j1 = s.bind_junction(model.Junction(name="J1", strategy=junctions.ORJoin()))
+    t11.link_dependent_task(j1)
+    t12.link_dependent_task(j1)
+    j1.link_dependent_task(t21)
+    t12.link_dependent_task(t22)
+
+    t11.in_event_model = model.PJdEventModel(P=30, J=5)
+    t12.in_event_model = model.CTEventModel(c=2, T=40, dmin=3)
+
+    p = s.bind_path(model.Path("P1", [t12, t22]))
+    s.constraints.add_path_constraint(p, 200)
+    s.constraints.add_wcrt_constraint(t21, 100)
+    return s
+
+
+def _summary(s):
+    results = analysis.analyze_system(s)
+    summary = sorted((r.name, t.name, t.wcet, t.scheduling_parameter,
+                      results[t].wcrt, results[t].bcrt,
+                      sorted(n.name for n in t.next_tasks))
+                     for r in s.resources for t in r.tasks)
+    for p in s.paths:
+        summary.append((p.name, [t.name for t in p.tasks],
+                        path_analysis.end_to_end_latency(p, results, 2)))
+    return summary
+
+
+def test_snapshot():
+    expected = _summary(_system())
+
+    data = snapshot.dumps(_system())
+    s = snapshot.loads(data)
+    assert _summary(s) == expected
+    assert len(s.constraints._path_constraints) == 1
+    assert len(s.constraints._wcrt_constraints) == 1
+
+    out_dir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(out_dir, "system.snap")
+        snapshot.dump(s, filename)
+        assert snapshot.is_snapshot(filename)
+        assert _summary(snapshot.load(filename)) == expected
+    finally:
+        shutil.rmtree(out_dir)
+
+    try:
+        snapshot.loads(b"PYCPASNP\xff\x00" + data[10:])
+        assert False, "unsupported version was accepted"
+    except snapshot.SnapshotError:
+        pass
+
+
+class _Scheduler(schedulers.SPPScheduler):
+    pass
+
+
+def _prio_high_wins(a, b):
+    return a > b
+
+
+def test_register():
+    s = _system()
+    r = s.get_resource_by_name("R1")
+    r.scheduler = _Scheduler(priority_cmp=_prio_high_wins)
+    try:
+        snapshot.dumps(s)
+        assert False, "unregistered scheduler was stored"
+    except snapshot.SnapshotError:
+        pass
+
+    snapshot.register(_Scheduler)
+    snapshot.register(_prio_high_wins)
+    expected = _summary(s)
+    loaded = snapshot.loads(snapshot.dumps(s))
+    scheduler = loaded.get_resource_by_name("R1").scheduler
+    assert type(scheduler) is _Scheduler
+    assert scheduler.priority_cmp is _prio_high_wins
+    assert _summary(loaded) == expected
+
+
+def test_untrusted():
+    # only classes and functions of pycpa or registered ones are resolved
+    desc = snapshot.to_dict(_system())
+    desc['resources'][0]['attributes']['x'] = {'__ref__': 'os:system'}
+    try:
+        snapshot.from_dict(desc)
+        assert False, "os.system was resolved"
+    except snapshot.SnapshotError:
+        pass
+
+
+if __name__ == "__main__":
+    test_snapshot()
+    test_register()
+    test_untrusted()
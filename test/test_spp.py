@@ -16,6 +16,7 @@ Simple SPP example
 from pycpa import model
 from pycpa import analysis
 from pycpa import schedulers
+from pycpa import options
 
 
 def test_spp():
@@ -63,5 +64,27 @@ def test_spp():
     assert task_results[t22].wcrt == 19
 
 
+def test_spp_config():
+    s = model.System()
+    r1 = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    t11 = r1.bind_task(model.Task("T11", wcet=10, bcet=5, scheduling_parameter=1))
+    t12 = r1.bind_task(model.Task("T12", wcet=3, bcet=1, scheduling_parameter=2))
+    t11.in_event_model = model.PJdEventModel(P=30, J=5)
+    t12.in_event_model = model.PJdEventModel(P=15, J=6)
+
+    # the options of a config only apply to its analysis
+    config = options.AnalysisConfig(max_wcrt=12)
+    try:
+        analysis.analyze_system(s, config=config)
+        assert False, "max_wcrt of config was ignored"
+    except analysis.NotSchedulableException:
+        pass
+
+    task_results = analysis.analyze_system(s)
+    assert task_results[t12].wcrt == 13
+    assert options.get_opt('max_wcrt') == options.INFINITY
+
+
 if __name__ == "__main__":
     test_spp()
+    test_spp_config()
@@ -0,0 +1,102 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Instrumentation of analyze_system (analysis.AnalysisStats)
+"""
+
+from pycpa import analysis
+from pycpa import junctions
+from pycpa import model
+from pycpa import schedulers
+
+
+def _system():
+    s = model.System()
+    r1 = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    r2 = s.bind_resource(model.Resource("R2", schedulers.SPPScheduler()))
+    t11 = r1.bind_task(model.Task("T11", wcet=5, bcet=5, scheduling_parameter=1))
+    t12 = r1.bind_task(model.Task("T12", wcet=9, bcet=1, scheduling_parameter=2))
+    t21 = r2.bind_task(model.Task("T21", wcet=2, bcet=2, scheduling_parameter=1))
+    t22 = r2.bind_task(model.Task("T22", wcet=9, bcet=4, scheduling_parameter=2))
+    t11.link_dependent_task(t21)
+    t12.link_dependent_task(t22)
+    t11.in_event_model = model.PJdEventModel(P=30, J=5)
+    t12.in_event_model = model.PJdEventModel(P=15, J=6)
+    return s
+
+
+def test_stats():
+    s = _system()
+    stats = analysis.AnalysisStats()
+    seen = list()
+    results = analysis.analyze_system(
+        s, stats=stats, post_hook=lambda state: seen.append(state.stats))
+    assert seen == [stats]
+
+    # same results as without instrumentation
+    plain = analysis.analyze_system(_system())
+    assert sorted(r.wcrt for r in results.values()) == \
+        sorted(r.wcrt for r in plain.values())
+
+    assert set(stats.tasks) == set(results)
+    for t, ts in stats.tasks.items():
+        assert ts.analyses >= 1
+        assert ts.b_plus_calls >= ts.q_max >= 1
+        assert ts.iterations >= ts.b_plus_calls
+        assert ts.q_max == len(results[t].busy_times) - 1
+
+    resources = stats.resources()
+    assert set(resources) == set(s.resources)
+    assert sum(r.analyses for r in resources.values()) == \
+        sum(t.analyses for t in stats.tasks.values())
+
+    assert stats.global_iterations >= 1
+    assert stats.wall_time > 0
+    assert stats.phases['local_analysis'] <= stats.wall_time
+    assert any(e.eta_plus_calls > 0 for e in stats.event_models.values())
+    for e in stats.event_models.values():
+        rate = e.delta_min_hit_rate()
+        assert rate is None or 0 <= rate <= 1
+
+    # event model calls are only counted during the analysis
+    assert model._instrumented_runs == 0
+    assert analysis.current_stats() is None
+
+
+def test_stats_or_junction():
+    s = model.System()
+    r1 = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    r2 = s.bind_resource(model.Resource("R2", schedulers.SPPScheduler()))
+    t11 = r1.bind_task(model.Task("T11", wcet=5, bcet=5, scheduling_parameter=1))
+    t12 = r1.bind_task(model.Task("T12", wcet=3, bcet=1, scheduling_parameter=2))
+    t21 = r2.bind_task(model.Task("T21", wcet=2, bcet=2, scheduling_parameter=1))
+    t22 = r2.bind_task(model.Task("T22", wcet=4, bcet=1, scheduling_parameter=2))
+    j1 = s.bind_junction(model.Junction(name="J1", strategy=junctions.ORJoin()))
+    t11.link_dependent_task(j1)
+    t12.link_dependent_task(j1)
+    j1.link_dependent_task(t22)
+    t11.in_event_model = model.PJdEventModel(P=30, J=5)
+    t12.in_event_model = model.PJdEventModel(P=15, J=6)
+    t21.in_event_model = model.PJdEventModel(P=20, J=0)
+
+    stats = analysis.AnalysisStats()
+    analysis.analyze_system(s, stats=stats)
+
+    # calls of the OR output model (which overrides eta_plus) are counted
+    or_stats = [e for em, e in stats.event_models.items()
+                if isinstance(em, junctions.OREventModel)]
+    assert len(or_stats) >= 1
+    assert any(e.eta_plus_calls > 0 for e in or_stats)
+    assert all(e.eta_plus_hits == 0 for e in or_stats)
+
+
+if __name__ == "__main__":
+    test_stats()
+    test_stats_or_junction()
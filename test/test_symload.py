@@ -0,0 +1,43 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Compares the streaming SymTA/S loader with the DOM-based loader
+"""
+
+import os
+
+from pycpa import analysis
+from pycpa import symload
+
+path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "data",
+                    "symta14_test.xml")
+
+
+def _summary(s):
+    results = analysis.analyze_system(s)
+    return sorted((r.name, t.name, t.bcet, t.wcet, t.scheduling_parameter,
+                   str(t.in_event_model), results[t].wcrt,
+                   sorted(n.name for n in t.next_tasks))
+                  for r in s.resources for t in r.tasks)
+
+
+def test_stream_loader():
+    expected = _summary(symload.SymtaLoader14().parse(path))
+    assert len(expected) == 4
+
+    assert _summary(symload.SymtaStreamLoader14().parse(path)) == expected
+
+    s = symload.SymtaStreamLoader14(keep_dom=True).parse(path)
+    assert s.dom_node.tag.endswith("SymTASystem")
+    assert _summary(s) == expected
+
+
+if __name__ == "__main__":
+    test_stream_loader()
@@ -0,0 +1,85 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Demand-driven analysis of the dependency slice of targets
+"""
+
+from pycpa import analysis
+from pycpa import model
+from pycpa import options
+from pycpa import path_analysis
+from pycpa import schedulers
+
+
+def _system():
+    """ Two chains sharing R2, an independent chain on R3 and R4 """
+    s = model.System()
+    r = dict((n, s.bind_resource(model.Resource(n, schedulers.SPPScheduler())))
+             for n in ["R1", "R2", "R3", "R4"])
+
+    def task(name, res, wcet, prio):
+        return r[res].bind_task(model.Task(name, wcet=wcet, bcet=1,
+                                           scheduling_parameter=prio))
+
+    a = [task("A1", "R1", 3, 1), task("A2", "R2", 2, 2)]
+    b = [task("B1", "R1", 2, 2), task("B2", "R2", 4, 1)]
+    c = [task("C1", "R3", 5, 1), task("C2", "R4", 1, 1)]
+    for chain, P, J in ((a, 20, 5), (b, 30, 0), (c, 50, 10)):
+        chain[0].in_event_model = model.PJdEventModel(P=P, J=J)
+    paths = [s.bind_path(model.Path(n, chain))
+             for n, chain in (("A", a), ("B", b), ("C", c))]
+    return s, paths
+
+
+def _wcrts(results):
+    return dict((t.name, r.wcrt) for t, r in results.items())
+
+
+def test_targets():
+    s, paths = _system()
+    full = _wcrts(analysis.analyze_system(s))
+
+    s, paths = _system()
+    results = analysis.analyze_system(s, targets=[paths[0]])
+    # B2 interferes with A2 on R2, hence B1 (which determines the input
+    # of B2) must be analyzed. B2 itself need not be analyzed.
+    assert sorted(_wcrts(results)) == ["A1", "A2", "B1"]
+    for name, wcrt in _wcrts(results).items():
+        assert full[name] == wcrt
+    assert path_analysis.end_to_end_latency(paths[0], results, 1)[1] == \
+        full["A1"] + full["A2"]
+
+    s, paths = _system()
+    c2 = paths[2].tasks[1]
+    results = analysis.analyze_system(s, targets=[c2])
+    assert sorted(_wcrts(results)) == ["C1", "C2"]
+    assert _wcrts(results)["C2"] == full["C2"]
+
+
+def test_target_constraints():
+    # constraints of tasks outside the slice are not checked
+    s, paths = _system()
+    s.constraints.add_wcrt_constraint(paths[2].tasks[0], 1)
+    config = options.AnalysisConfig(check_violations=True)
+    results = analysis.analyze_system(s, targets=[paths[0]], config=config)
+    assert len(results) == 3
+
+    s, paths = _system()
+    s.constraints.add_wcrt_constraint(paths[2].tasks[0], 1)
+    try:
+        analysis.analyze_system(s, targets=[paths[2]], config=config)
+        assert False, "deadline violation not detected"
+    except analysis.NotSchedulableException:
+        pass
+
+
+if __name__ == "__main__":
+    test_targets()
+    test_target_constraints()
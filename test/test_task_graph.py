@@ -0,0 +1,51 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Reachability, distances and cycles of util.TaskGraph
+"""
+
+from pycpa import model
+from pycpa import util
+
+
+def test_task_graph():
+    s = model.System()
+    r = s.bind_resource(model.Resource("R1"))
+    t = dict((n, r.bind_task(model.Task(n))) for n in ["A", "B", "C", "D", "E"])
+    j = s.bind_junction(model.Junction("J"))
+
+    # A -> B -> J -> C -> D -> B (cycle), C -> E
+    t["A"].link_dependent_task(t["B"])
+    t["B"].link_dependent_task(j)
+    j.link_dependent_task(t["C"])
+    t["C"].link_dependent_task(t["D"])
+    t["D"].link_dependent_task(t["B"])
+    t["C"].link_dependent_task(t["E"])
+
+    g = util.TaskGraph.from_system(s)
+    assert len(g) == 6
+
+    assert g.reachable(t["A"]) == util.breadth_first_search(t["A"])
+    assert g.num_reachable(t["A"]) == 6
+    assert g.num_reachable(t["C"]) == 5
+    assert g.num_reachable(t["E"]) == 1
+    assert g.is_reachable(t["D"], t["C"])
+    assert not g.is_reachable(t["B"], t["A"])
+
+    assert g.distances(t["A"]) == {t["A"]: 0, t["B"]: 1, j: 2, t["C"]: 3,
+                                   t["D"]: 4, t["E"]: 4}
+    assert util.dijkstra(t["A"]) == g.distances(t["A"])
+
+    assert g.has_cycle()
+    assert g.cyclic_nodes() == set([t["B"], j, t["C"], t["D"]])
+
+
+if __name__ == "__main__":
+    test_task_graph()
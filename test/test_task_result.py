@@ -0,0 +1,66 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Compact storage of TaskResult and its busy times
+"""
+
+import copy
+import pickle
+
+from pycpa import analysis
+from pycpa import model
+from pycpa import options
+from pycpa import schedulers
+
+
+def test_busy_times():
+    r = analysis.TaskResult()
+    r.busy_times = [0]
+    r.busy_times.append(10)
+    assert isinstance(r.busy_times, analysis.BusyTimes)
+    assert r.busy_times == [0, 10]
+    assert r.busy_times != [0, 11]
+    assert r.busy_times[-1] == 10 and r.busy_times[1:] == [10]
+
+    # non-integer busy times are kept exactly
+    r.busy_times.append(12.5)
+    assert r.busy_times == [0, 10, 12.5]
+
+
+def test_task_result_copy():
+    r = analysis.TaskResult()
+    r.wcrt = 5
+    r.busy_times = [0, 5]
+    for c in (copy.copy(r), pickle.loads(pickle.dumps(r))):
+        assert c.wcrt == 5 and c.busy_times == r.busy_times
+    assert not hasattr(r, '__dict__')
+
+
+def test_busy_window_details():
+    s = model.System()
+    r = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    t1 = r.bind_task(model.Task("T1", wcet=2, bcet=1, scheduling_parameter=1))
+    t2 = r.bind_task(model.Task("T2", wcet=3, bcet=1, scheduling_parameter=2))
+    t1.in_event_model = model.PJdEventModel(P=10, J=0)
+    t2.in_event_model = model.PJdEventModel(P=10, J=0)
+
+    results = analysis.analyze_system(s)
+    assert results[t2].b_wcrt == {'q*WCET': (1, 3), t1: (1, 2)}
+    assert results[t2].b_wcrt_str() == 'T1:eta*WCET:1*2=2, q*WCET:1*3=3'
+
+    lean = analysis.analyze_system(s, config=options.AnalysisConfig(lean=True))
+    assert lean[t2].wcrt == results[t2].wcrt
+    assert len(lean[t2].b_wcrt) == 0
+
+
+if __name__ == "__main__":
+    test_busy_times()
+    test_task_result_copy()
+    test_busy_window_details()
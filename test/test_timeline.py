@@ -0,0 +1,80 @@
+"""
+| Copyright (C) 2026 agent
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - agent
+
+Description
+-----------
+
+Chrome trace timeline of analyze_system
+"""
+
+import json
+import os
+import tempfile
+
+from pycpa import analysis
+from pycpa import model
+from pycpa import schedulers
+from pycpa import timeline
+
+
+def _system():
+    s = model.System()
+    r1 = s.bind_resource(model.Resource("R1", schedulers.SPPScheduler()))
+    r2 = s.bind_resource(model.Resource("R2", schedulers.SPPScheduler()))
+    t11 = r1.bind_task(model.Task("T11", wcet=5, bcet=5, scheduling_parameter=1))
+    t12 = r1.bind_task(model.Task("T12", wcet=9, bcet=1, scheduling_parameter=2))
+    t21 = r2.bind_task(model.Task("T21", wcet=2, bcet=2, scheduling_parameter=1))
+    t11.link_dependent_task(t21)
+    t11.in_event_model = model.PJdEventModel(P=30, J=5)
+    t12.in_event_model = model.PJdEventModel(P=15, J=6)
+    return s
+
+
+def _check_balanced(events):
+    stack = list()
+    for e in events:
+        if e['ph'] == 'B':
+            stack.append(e['name'])
+        else:
+            assert stack.pop() == e['name']
+    assert not stack
+
+
+def test_timeline():
+    fd, filename = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        analysis.analyze_system(_system(),
+                                timeline=timeline.Timeline(filename))
+        with open(filename) as f:
+            trace = json.load(f)
+    finally:
+        os.remove(filename)
+
+    events = trace['traceEvents']
+    _check_balanced(events)
+    cats = set(e['cat'] for e in events)
+    assert cats == set(['analyze_task', 'compute_wcrt', 'propagate'])
+    assert all(b['ts'] <= e['ts'] for b, e in zip(events, events[1:]))
+
+
+def test_timeline_sampling():
+    full = timeline.Timeline()
+    analysis.analyze_system(_system(), timeline=full)
+    sampled = timeline.Timeline(sample=2)
+    analysis.analyze_system(_system(), timeline=sampled)
+    _check_balanced(sampled.events)
+
+    def top(tl):
+        return [e for e in tl.events if e['ph'] == 'B' and
+                e['cat'] in ('analyze_task', 'propagate')]
+    assert len(top(sampled)) == (len(top(full)) + 1) // 2
+
+
+if __name__ == "__main__":
+    test_timeline()
+    test_timeline_sampling()